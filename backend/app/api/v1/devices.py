@@ -294,7 +294,9 @@ async def device_service_health(
         has_connection = current_user["id"] in device_service.active_connections
 
         # Check if Home Assistant client is connected
-        has_ha_client = current_user["id"] in device_service.ha_clients
+        has_ha_client = await device_service.home_assistant_connected(
+            current_user["id"]
+        )
 
         return {
             "service_running": device_service.running,
@@ -655,16 +655,10 @@ async def get_sensor_data(
     try:
         user_id = str(current_user.id)
 
-        # Get sensor devices for the user
-        sensors = await user_ha_service.get_user_devices(user_id, "sensor")
-
-        # Filter by sensor type if specified
-        if sensor_type:
-            sensors = [
-                s
-                for s in sensors
-                if s.get("attributes", {}).get("device_class") == sensor_type
-            ]
+        # Get sensor devices for the user, of the sensor type if specified
+        sensors = await user_ha_service.get_user_devices(
+            user_id, "sensor", device_class=sensor_type
+        )
 
         # Convert to sensor data models
         sensor_models = []
@@ -1030,6 +1024,9 @@ async def create_user_config(
     config_request: HomeAssistantConfigRequest,
     current_user=Depends(get_current_user),
     db=Depends(get_async_rls_client),
+    user_ha_service: UserHomeAssistantService = Depends(
+        get_user_home_assistant_service
+    ),
 ) -> HomeAssistantConfigResponse:
     """Create a new Home Assistant configuration"""
     try:
@@ -1120,6 +1117,7 @@ async def create_user_config(
             )
 
         created_config = result.data[0]
+        await user_ha_service.invalidate_user_config(str(current_user.id))
 
         return HomeAssistantConfigResponse(
             id=created_config["id"],
@@ -1212,6 +1210,9 @@ async def update_user_config(
     config_request: HomeAssistantConfigRequest,
     current_user=Depends(get_current_user),
     db=Depends(get_async_rls_client),
+    user_ha_service: UserHomeAssistantService = Depends(
+        get_user_home_assistant_service
+    ),
 ) -> HomeAssistantConfigResponse:
     """Update an existing Home Assistant configuration"""
     try:
@@ -1259,6 +1260,7 @@ async def update_user_config(
             )
 
         updated_config = result.data[0]
+        await user_ha_service.invalidate_user_config(str(current_user.id))
 
         return HomeAssistantConfigResponse(
             id=updated_config["id"],
@@ -1294,6 +1296,9 @@ async def delete_user_config(
     config_id: str,
     current_user=Depends(get_current_user),
     db=Depends(get_async_rls_client),
+    user_ha_service: UserHomeAssistantService = Depends(
+        get_user_home_assistant_service
+    ),
 ):
     """Delete a Home Assistant configuration"""
     try:
@@ -1313,6 +1318,7 @@ async def delete_user_config(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Configuration not found"
             )
 
+        await user_ha_service.invalidate_user_config(str(current_user.id))
         return {"message": "Configuration deleted successfully"}
 
     except HTTPException:
@@ -9,13 +9,19 @@ These endpoints provide fast access to sensor data for dashboards and analytics
 while maintaining separation between cached data and realtime alerts.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 
+from app.core.config import settings
 from app.core.security import get_current_active_user as get_current_user
 from app.models.user import User
 from app.schemas.sensor import (
     SensorAggregateResponse,
+    SensorHistoryBatchRequest,
+    SensorHistoryBatchResponse,
     SensorHistoryResponse,
+    SensorHistorySeries,
+    SensorIngestResponse,
+    SensorIngestRowError,
     SensorReadingResponse,
     StaticDataResponse,
 )
@@ -23,6 +29,17 @@ from app.services.sensor_cache_service import (
     SensorCacheService,
     get_sensor_cache_service,
 )
+from app.services.sensor_downsampling import DownsampleMode
+from app.services.sensor_ingestion_service import (
+    MAX_REPORTED_ERRORS,
+    IngestionBufferFullError,
+    IngestionError,
+    SensorIngestionService,
+    TooManyReadingsError,
+    get_sensor_ingestion_service,
+    parse_columnar,
+    parse_ndjson,
+)
 
 router = APIRouter()
 
@@ -94,6 +111,16 @@ async def get_sensor_history(
     hours: int = Query(
         24, description="Number of hours of history to retrieve", ge=1, le=168
     ),
+    max_points: int | None = Query(
+        None,
+        description="Downsample the history to at most this many points",
+        ge=3,
+        le=10_000,
+    ),
+    downsample: DownsampleMode = Query(
+        "lttb",
+        description="Downsampling mode: lttb (shape) or minmax (extremes)",
+    ),
     current_user: User = Depends(get_current_user),
     cache_service: SensorCacheService = Depends(get_sensor_cache_service),
 ):
@@ -102,11 +129,20 @@ async def get_sensor_history(
 
     This endpoint provides historical sensor data for charts and trend analysis.
     Data is cached for 15 minutes to balance performance with data freshness.
+    Short windows return raw readings; longer windows return 1m, 15m or 1h
+    rollup buckets (bucket averages) so the response stays within the
+    configured point budget. The resolution used is reported in the response.
+
+    With ``max_points`` the series is downsampled on the server, using
+    Largest-Triangle-Three-Buckets or min/max per bucket, so charts receive
+    only the points they can draw.
 
     Args:
         device_id: Device assignment ID
         sensor_type: Type of sensor (temperature, humidity, ph, etc.)
         hours: Number of hours of history (1-168, default 24)
+        max_points: Optional maximum number of points to return
+        downsample: Downsampling mode used with max_points
         current_user: Authenticated user
         cache_service: Sensor cache service
 
@@ -114,13 +150,25 @@ async def get_sensor_history(
         Sensor history with readings and metadata
     """
     try:
-        # Get cached sensor history
-        readings = await cache_service.get_sensor_history(
-            user_id=str(current_user.id),
-            device_id=device_id,
-            sensor_type=sensor_type,
-            hours=hours,
-        )
+        if max_points:
+            resolution, readings = await cache_service.get_downsampled_sensor_history(
+                user_id=str(current_user.id),
+                device_id=device_id,
+                sensor_type=sensor_type,
+                hours=hours,
+                max_points=max_points,
+                mode=downsample,
+            )
+        else:
+            # Get cached sensor history at the resolution fitting the window
+            resolution = cache_service.select_history_resolution(hours)
+            readings = await cache_service.get_sensor_history(
+                user_id=str(current_user.id),
+                device_id=device_id,
+                sensor_type=sensor_type,
+                hours=hours,
+                resolution=resolution,
+            )
 
         if not readings:
             raise HTTPException(
@@ -149,6 +197,7 @@ async def get_sensor_history(
             device_id=device_id,
             sensor_type=sensor_type,
             period_hours=hours,
+            resolution=resolution,
             readings=reading_responses,
             total_readings=len(reading_responses),
             cached=True,
@@ -162,6 +211,69 @@ async def get_sensor_history(
         )
 
 
+@router.post("/history/batch", response_model=SensorHistoryBatchResponse)
+async def get_sensor_history_batch(
+    batch: SensorHistoryBatchRequest,
+    current_user: User = Depends(get_current_user),
+    cache_service: SensorCacheService = Depends(get_sensor_cache_service),
+):
+    """
+    Get sensor history for many devices and sensor types in one request
+
+    Dashboards can load every chart with one request instead of one per
+    device and sensor. Each series is answered from the cache when possible;
+    all remaining series are read with a single database query and cached
+    under the same keys as the single-series history endpoint.
+
+    Series are returned in request order as parallel ``timestamps`` and
+    ``values`` columns. Series without data are returned empty.
+
+    Args:
+        batch: Series to fetch and the history window
+        current_user: Authenticated user
+        cache_service: Sensor cache service
+
+    Returns:
+        Columnar sensor history per series
+    """
+    try:
+        resolution = cache_service.select_history_resolution(batch.hours)
+        history = await cache_service.get_sensor_history_batch(
+            user_id=str(current_user.id),
+            series=[(ref.device_id, ref.sensor_type) for ref in batch.series],
+            hours=batch.hours,
+            resolution=resolution,
+        )
+
+        series = []
+        for (device_id, sensor_type), readings in history.items():
+            first = readings[0] if readings else None
+            series.append(
+                SensorHistorySeries(
+                    device_id=device_id,
+                    sensor_type=sensor_type,
+                    unit=first.unit if first else None,
+                    device_name=first.device_name if first else None,
+                    location=first.location if first else None,
+                    timestamps=[reading.timestamp for reading in readings],
+                    values=[reading.value for reading in readings],
+                    total_readings=len(readings),
+                )
+            )
+
+        return SensorHistoryBatchResponse(
+            period_hours=batch.hours,
+            resolution=resolution,
+            series=series,
+            cached=True,
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching sensor history: {str(e)}"
+        )
+
+
 @router.get("/aggregates", response_model=list[SensorAggregateResponse])
 async def get_sensor_aggregates(
     device_ids: str | None = Query(None, description="Comma-separated device IDs"),
@@ -228,6 +340,75 @@ async def get_sensor_aggregates(
         )
 
 
+@router.post("/readings/bulk", response_model=SensorIngestResponse)
+async def ingest_sensor_readings(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    ingestion_service: SensorIngestionService = Depends(get_sensor_ingestion_service),
+):
+    """
+    Ingest a batch of sensor readings
+
+    Accepts thousands of readings per request so that gateways can push one
+    request per interval instead of one per reading. Two formats are
+    supported, selected by Content-Type:
+
+    - ``application/x-ndjson``: one JSON reading object per line
+    - ``application/json``: columnar arrays, e.g.
+      ``{"device_assignment_id": "...", "reading_type": "temperature",
+      "value": [21.5, 21.6], "timestamp": [...]}`` where any column other
+      than ``value`` may be a single value shared by every reading
+
+    Readings from concurrent requests are written together in batches. The
+    response is returned once the batch holding this request's readings has
+    been written, and identifies that batch.
+
+    Args:
+        request: Raw request (the body is parsed without per-row models)
+        current_user: Authenticated user
+        ingestion_service: Sensor ingestion service
+
+    Returns:
+        Batch acknowledgement with accepted/rejected counts
+    """
+    content_type = request.headers.get("content-type", "")
+    body = await request.body()
+    # The parsers stop as soon as the payload exceeds the limit
+    max_readings = settings.SENSOR_INGEST_MAX_READINGS_PER_REQUEST
+    try:
+        if "ndjson" in content_type or "jsonl" in content_type:
+            readings, errors = parse_ndjson(body, max_readings=max_readings)
+        else:
+            readings, errors = parse_columnar(body, max_readings=max_readings)
+    except TooManyReadingsError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except (IngestionError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid payload: {str(e)}")
+
+    try:
+        ack, ownership_errors = await ingestion_service.ingest(
+            str(current_user.id), readings
+        )
+    except IngestionBufferFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error ingesting sensor readings: {str(e)}"
+        )
+
+    errors = sorted(errors + ownership_errors, key=lambda error: error.index)
+    return SensorIngestResponse(
+        batch_id=ack.batch_id if ack else None,
+        accepted=ack.accepted if ack else 0,
+        rejected=len(errors),
+        errors=[
+            SensorIngestRowError(index=error.index, error=error.error)
+            for error in errors[:MAX_REPORTED_ERRORS]
+        ],
+        written_at=ack.written_at if ack else None,
+    )
+
+
 @router.get("/static/species", response_model=StaticDataResponse)
 async def get_species_data(
     cache_service: SensorCacheService = Depends(get_sensor_cache_service),
@@ -383,11 +564,11 @@ async def get_cache_stats(
         Cache statistics and health data
     """
     try:
-        # This would need to be implemented in the cache service
-        # For now, return basic info
+        backend_stats = await cache_service.cache.stats()
         return {
             "cache_enabled": True,
-            "cache_type": "redis",
+            "cache_type": backend_stats.get("backend"),
+            "backend_stats": backend_stats,
             "ttl_settings": {
                 "sensor_latest": "5 minutes",
                 "sensor_history": "15 minutes",
@@ -1,29 +1,299 @@
 """
 Cache management for the FastAPI application.
 
-This module provides caching functionality using in-memory storage
-for development and testing purposes.
+This module defines the ``CacheBackend`` interface shared by all cache
+implementations and provides the default in-process engine, a bounded
+cache with LRU eviction, a max-bytes budget and heap-driven TTL expiry.
+Entries are spread across independently locked shards so that concurrent
+readers never queue behind a single global lock.
+
+A Redis-protocol backend that is shared across workers lives in
+``app.core.redis_cache`` and is selected with ``CACHE_BACKEND=redis``.
 """
 
 import asyncio
+import fnmatch
+import heapq
 import logging
+import sys
+import threading
 import time
-from typing import Any
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
 
-class CacheManager:
+# Defaults used when no explicit limits are supplied
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MiB
+DEFAULT_SHARD_COUNT = 16
+DEFAULT_CLEANUP_INTERVAL_SECONDS = 60.0
+
+
+# Nesting levels estimate_size descends into, and items measured per
+# sequence before the rest are extrapolated from their average
+SIZE_ESTIMATE_MAX_DEPTH = 4
+SIZE_ESTIMATE_SAMPLE = 16
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Cheaply estimate the memory footprint of a cached value in bytes.
+
+    Strings and bytes are measured by length. Containers and objects with
+    ``__slots__`` or a ``__dict__`` (such as dataclasses) are measured
+    recursively up to ``SIZE_ESTIMATE_MAX_DEPTH`` levels, so cached result
+    objects are charged for their contents rather than just their wrapper.
+    Long sequences are measured from a sample of their items, which keeps
+    the estimate cheap for results of thousands of rows.
+
+    Args:
+        value: Value to measure
+
+    Returns:
+        Approximate size in bytes
     """
-    Simple in-memory cache manager for development and testing.
+    if isinstance(value, bytes | bytearray | memoryview):
+        return len(value)
+    if isinstance(value, str):
+        return len(value)
+    size = sys.getsizeof(value)
+    if _depth >= SIZE_ESTIMATE_MAX_DEPTH:
+        return size
+
+    depth = _depth + 1
+    if isinstance(value, dict):
+        for item_key, item_value in value.items():
+            size += estimate_size(item_key, depth) + estimate_size(item_value, depth)
+    elif isinstance(value, list | tuple | set | frozenset):
+        count = len(value)
+        if count:
+            sample = [
+                estimate_size(item, depth)
+                for _, item in zip(range(SIZE_ESTIMATE_SAMPLE), value, strict=False)
+            ]
+            size += sum(sample) * count // len(sample)
+    else:
+        slots = getattr(type(value), "__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for name in slots:
+            size += estimate_size(getattr(value, name, None), depth)
+        if hasattr(value, "__dict__"):
+            size += estimate_size(vars(value), depth)
+    return size
+
+
+class CacheBackend(ABC):
+    """
+    Interface implemented by every cache backend.
 
-    In production, this should be replaced with Redis or another
-    distributed cache solution.
+    Services depend on this interface rather than a concrete backend so that
+    the in-process cache can be swapped for a shared one without code changes.
     """
 
-    def __init__(self) -> None:
-        self._cache: dict[str, dict[str, Any]] = {}
-        self._lock = asyncio.Lock()
+    #: Whether values live in this process (no serialization needed)
+    is_local: bool = True
+
+    @abstractmethod
+    async def get(self, key: str) -> Any | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """Get several keys at once; missing keys are omitted from the result."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl_seconds: int | None = None) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set_many(
+        self, items: dict[str, Any], ttl_seconds: int | None = None
+    ) -> None:
+        """Set several keys at once with a shared TTL."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_pattern(self, pattern: str) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+    async def exists(self, key: str) -> bool:
+        return await self.get(key) is not None
+
+    @abstractmethod
+    async def keys(self, pattern: str | None = None) -> list[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def size(self) -> int:
+        raise NotImplementedError
+
+    async def cleanup_expired(self) -> int:
+        """Backends with native expiry have nothing to clean up."""
+        return 0
+
+    @abstractmethod
+    async def stats(self) -> dict[str, Any]:
+        raise NotImplementedError
+
+    def start_cleanup_task(  # noqa: B027 - optional hook
+        self, interval_seconds: float = DEFAULT_CLEANUP_INTERVAL_SECONDS
+    ) -> None:
+        """Start periodic cleanup; a no-op for backends with native expiry."""
+
+    async def stop_cleanup_task(self) -> None:  # noqa: B027 - optional hook
+        """Stop periodic cleanup; a no-op for backends with native expiry."""
+
+    async def close(self) -> None:  # noqa: B027 - optional hook
+        """Release any resources held by the backend."""
+
+
+class _CacheEntry:
+    """A single cache entry. Slots keep per-entry overhead small."""
+
+    __slots__ = ("value", "expires_at", "created_at", "size")
+
+    def __init__(
+        self, value: Any, expires_at: float | None, created_at: float, size: int
+    ) -> None:
+        self.value = value
+        self.expires_at = expires_at
+        self.created_at = created_at
+        self.size = size
+
+
+class _CacheShard:
+    """
+    One independently locked partition of the cache.
+
+    Each shard keeps its entries in LRU order and owns a min-heap of
+    ``(expires_at, key)`` pairs. Heap items are invalidated lazily: a popped
+    item is only acted upon if the live entry still carries the same expiry.
+    """
+
+    __slots__ = (
+        "entries",
+        "expiry_heap",
+        "lock",
+        "max_entries",
+        "max_bytes",
+        "current_bytes",
+        "evictions",
+        "expirations",
+    )
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self.expiry_heap: list[tuple[float, str]] = []
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # All helpers below expect ``self.lock`` to be held by the caller.
+
+    def remove(self, key: str) -> _CacheEntry | None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+        return entry
+
+    def purge_expired(self, now: float, limit: int | None = None) -> int:
+        """Pop expired heap items, removing entries whose expiry still matches."""
+        removed = 0
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= now:
+            if limit is not None and removed >= limit:
+                break
+            expires_at, key = heapq.heappop(heap)
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires_at == expires_at:
+                self.remove(key)
+                self.expirations += 1
+                removed += 1
+        return removed
+
+    def compact_heap(self) -> None:
+        """Rebuild the heap when stale items outnumber live ones."""
+        if len(self.expiry_heap) <= 2 * len(self.entries) + 64:
+            return
+        self.expiry_heap = [
+            (entry.expires_at, key)
+            for key, entry in self.entries.items()
+            if entry.expires_at is not None
+        ]
+        heapq.heapify(self.expiry_heap)
+
+    def evict_to_fit(self) -> int:
+        """Evict least recently used entries until both budgets are met."""
+        evicted = 0
+        while self.entries and (
+            len(self.entries) > self.max_entries or self.current_bytes > self.max_bytes
+        ):
+            _, entry = self.entries.popitem(last=False)
+            self.current_bytes -= entry.size
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+
+class CacheManager(CacheBackend):
+    """
+    Bounded in-process cache backend.
+
+    Entries are hashed into shards, each holding an LRU-ordered dict and an
+    expiry heap. Every operation completes without yielding to the event
+    loop, so reads take only an uncontended per-shard lock rather than
+    queueing behind a global ``asyncio.Lock``. Memory is bounded by both a
+    maximum entry count and a maximum byte budget; the least recently used
+    entries are evicted first. Expired entries are removed lazily on access,
+    incrementally on every write, and periodically by an optional background
+    cleanup task.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        shard_count: int = DEFAULT_SHARD_COUNT,
+        sizeof: Callable[[Any], int] = estimate_size,
+    ) -> None:
+        if max_entries <= 0 or max_bytes <= 0 or shard_count <= 0:
+            raise ValueError("Cache limits and shard count must be positive")
+
+        shard_count = min(shard_count, max_entries)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._shards = [
+            _CacheShard(
+                max_entries=max(1, max_entries // shard_count),
+                max_bytes=max(1, max_bytes // shard_count),
+            )
+            for _ in range(shard_count)
+        ]
+        self._cleanup_task: asyncio.Task | None = None
+
+    def _shard_for(self, key: str) -> _CacheShard:
+        # crc32 is stable across processes, unlike the salted built-in hash()
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
 
     async def get(self, key: str) -> Any | None:
         """
@@ -35,38 +305,82 @@ class CacheManager:
         Returns:
             Cached value or None if not found or expired
         """
-        async with self._lock:
-            if key not in self._cache:
+        shard = self._shard_for(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
                 return None
 
-            cache_entry = self._cache[key]
-
             # Check if expired
-            if cache_entry["expires_at"] and time.time() > cache_entry["expires_at"]:
-                del self._cache[key]
+            if entry.expires_at is not None and time.time() >= entry.expires_at:
+                shard.remove(key)
+                shard.expirations += 1
                 return None
 
-            return cache_entry["value"]
+            shard.entries.move_to_end(key)
+            return entry.value
+
+    async def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """
+        Get several values from the cache.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Mapping of found keys to their values
+        """
+        found: dict[str, Any] = {}
+        for key in keys:
+            value = await self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
 
     async def set(self, key: str, value: Any, ttl_seconds: int | None = None) -> None:
         """
         Set a value in the cache.
 
+        Values larger than a shard's byte budget are not cached.
+
         Args:
             key: Cache key
             value: Value to cache
             ttl_seconds: Time to live in seconds (None for no expiration)
         """
-        async with self._lock:
-            expires_at = None
-            if ttl_seconds:
-                expires_at = time.time() + ttl_seconds
+        now = time.time()
+        expires_at = now + ttl_seconds if ttl_seconds else None
+        size = self._sizeof(value)
+        shard = self._shard_for(key)
+
+        with shard.lock:
+            shard.remove(key)
+            if size > shard.max_bytes:
+                logger.debug(f"Value for cache key {key} exceeds shard budget")
+                return
+
+            shard.entries[key] = _CacheEntry(value, expires_at, now, size)
+            shard.current_bytes += size
+            if expires_at is not None:
+                heapq.heappush(shard.expiry_heap, (expires_at, key))
+
+            # Amortised housekeeping keeps memory bounded without a full scan
+            shard.purge_expired(now, limit=8)
+            shard.evict_to_fit()
+            shard.compact_heap()
+
+    async def set_many(
+        self, items: dict[str, Any], ttl_seconds: int | None = None
+    ) -> None:
+        """
+        Set several values in the cache with a shared TTL.
 
-            self._cache[key] = {
-                "value": value,
-                "expires_at": expires_at,
-                "created_at": time.time(),
-            }
+        Args:
+            items: Mapping of cache keys to values
+            ttl_seconds: Time to live in seconds (None for no expiration)
+        """
+        for key, value in items.items():
+            await self.set(key, value, ttl_seconds)
 
     async def delete(self, key: str) -> bool:
         """
@@ -78,28 +392,38 @@ class CacheManager:
         Returns:
             True if key was deleted, False if not found
         """
-        async with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-                return True
-            return False
-
-    async def clear(self) -> None:
-        """Clear all cache entries."""
-        async with self._lock:
-            self._cache.clear()
+        shard = self._shard_for(key)
+        with shard.lock:
+            return shard.remove(key) is not None
 
-    async def exists(self, key: str) -> bool:
+    async def delete_pattern(self, pattern: str) -> int:
         """
-        Check if a key exists in the cache.
+        Delete all keys matching a glob-style pattern (``*`` and ``?``).
 
         Args:
-            key: Cache key to check
+            pattern: Glob pattern, e.g. ``sensor_latest:user-1:*``
 
         Returns:
-            True if key exists and is not expired
+            Number of keys deleted
         """
-        return await self.get(key) is not None
+        deleted = 0
+        for shard in self._shards:
+            with shard.lock:
+                matching = [
+                    key for key in shard.entries if fnmatch.fnmatchcase(key, pattern)
+                ]
+                for key in matching:
+                    shard.remove(key)
+                deleted += len(matching)
+        return deleted
+
+    async def clear(self) -> None:
+        """Clear all cache entries."""
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.expiry_heap.clear()
+                shard.current_bytes = 0
 
     async def keys(self, pattern: str | None = None) -> list[str]:
         """
@@ -111,86 +435,214 @@ class CacheManager:
         Returns:
             List of cache keys
         """
-        async with self._lock:
-            all_keys = list(self._cache.keys())
+        all_keys: list[str] = []
+        for shard in self._shards:
+            with shard.lock:
+                all_keys.extend(shard.entries.keys())
 
-            if pattern:
-                return [key for key in all_keys if pattern in key]
+        if pattern:
+            return [key for key in all_keys if pattern in key]
 
-            return all_keys
+        return all_keys
 
-    async def cleanup_expired(self) -> int:
+    async def size(self) -> int:
         """
-        Remove expired entries from the cache.
+        Get the number of entries currently held (including not yet purged
+        expired entries).
 
         Returns:
-            Number of entries removed
+            Number of cache entries
         """
-        async with self._lock:
-            current_time = time.time()
-            expired_keys = []
+        return sum(len(shard.entries) for shard in self._shards)
 
-            for key, cache_entry in self._cache.items():
-                if (
-                    cache_entry["expires_at"]
-                    and current_time > cache_entry["expires_at"]
-                ):
-                    expired_keys.append(key)
+    async def cleanup_expired(self) -> int:
+        """
+        Remove expired entries from the cache.
 
-            for key in expired_keys:
-                del self._cache[key]
+        Only heap items that are already due are visited, so the cost is
+        proportional to the number of expired entries rather than the size
+        of the cache.
 
-            return len(expired_keys)
+        Returns:
+            Number of entries removed
+        """
+        now = time.time()
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                removed += shard.purge_expired(now)
+                shard.compact_heap()
+        return removed
 
     async def stats(self) -> dict[str, Any]:
         """
         Get cache statistics.
 
+        Statistics are maintained incrementally; no entries are scanned.
+
         Returns:
             Dictionary with cache statistics
         """
-        async with self._lock:
-            total_entries = len(self._cache)
-            expired_count = 0
-            current_time = time.time()
+        total_entries = 0
+        memory_usage = 0
+        evictions = 0
+        expirations = 0
+        for shard in self._shards:
+            total_entries += len(shard.entries)
+            memory_usage += shard.current_bytes
+            evictions += shard.evictions
+            expirations += shard.expirations
+
+        return {
+            "backend": "memory",
+            "total_entries": total_entries,
+            "max_entries": self.max_entries,
+            "memory_usage_estimate": memory_usage,
+            "max_bytes": self.max_bytes,
+            "shards": len(self._shards),
+            "evictions": evictions,
+            "expirations": expirations,
+        }
+
+    def start_cleanup_task(
+        self, interval_seconds: float = DEFAULT_CLEANUP_INTERVAL_SECONDS
+    ) -> None:
+        """
+        Start a background task that periodically purges expired entries.
 
-            for cache_entry in self._cache.values():
-                if (
-                    cache_entry["expires_at"]
-                    and current_time > cache_entry["expires_at"]
-                ):
-                    expired_count += 1
+        Args:
+            interval_seconds: Delay between cleanup passes
+        """
+        if self._cleanup_task is not None and not self._cleanup_task.done():
+            return
+        self._cleanup_task = asyncio.create_task(self._cleanup_loop(interval_seconds))
+
+    async def stop_cleanup_task(self) -> None:
+        """Stop the background cleanup task if it is running."""
+        if self._cleanup_task is None:
+            return
+        self._cleanup_task.cancel()
+        try:
+            await self._cleanup_task
+        except asyncio.CancelledError:
+            pass
+        self._cleanup_task = None
+
+    async def _cleanup_loop(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                removed = await self.cleanup_expired()
+                if removed:
+                    logger.debug(f"Cache cleanup removed {removed} expired entries")
+            except Exception as e:
+                logger.error(f"Error during cache cleanup: {e}")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one in-flight task.
+
+    The first caller for a key starts the work as a task; every caller that
+    arrives while it is running awaits the same task instead of repeating the
+    work. The task is shielded, so a cancelled caller does not cancel the work
+    for everyone else.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def in_flight(self, key: str) -> bool:
+        """Check whether work for a key is currently running."""
+        return key in self._inflight
+
+    def start(self, key: str, fn: Callable[[], Awaitable[T]]) -> asyncio.Task:
+        """
+        Start work for a key unless it is already running.
+
+        Args:
+            key: Coalescing key
+            fn: Zero-argument coroutine function performing the work
+
+        Returns:
+            The task running the work for this key
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return task
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run work for a key, or join the run already in flight.
 
-            return {
-                "total_entries": total_entries,
-                "expired_entries": expired_count,
-                "active_entries": total_entries - expired_count,
-                "memory_usage_estimate": len(str(self._cache)),
-            }
+        Args:
+            key: Coalescing key
+            fn: Zero-argument coroutine function performing the work
+
+        Returns:
+            Result of the (possibly shared) work
+        """
+        return await asyncio.shield(self.start(key, fn))
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Single-flight task for {key} failed: {task.exception()}")
 
 
 # Global cache manager instance
-_cache_manager: CacheManager | None = None
+_cache_manager: CacheBackend | None = None
+
+
+def _create_cache_backend() -> CacheBackend:
+    """Build the cache backend selected by ``CACHE_BACKEND``."""
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    if settings.CACHE_BACKEND == "redis":
+        try:
+            from app.core.redis_cache import RedisCacheManager
+
+            backend = RedisCacheManager(
+                url=settings.CACHE_REDIS_URL, key_prefix=settings.CACHE_KEY_PREFIX
+            )
+            logger.info("✅ Using Redis cache backend")
+            return backend
+        except Exception as e:
+            # Graceful degradation - fall back to a per-process cache
+            logger.warning(
+                f"⚠️  Redis cache backend unavailable ({e}), using in-process cache"
+            )
+
+    return CacheManager(
+        max_entries=settings.CACHE_MAX_ENTRIES,
+        max_bytes=settings.CACHE_MAX_BYTES,
+        shard_count=settings.CACHE_SHARD_COUNT,
+    )
 
 
-def get_cache_manager() -> CacheManager:
+def get_cache_manager() -> CacheBackend:
     """
     Get the global cache manager instance.
 
     Returns:
-        CacheManager instance
+        Configured CacheBackend instance
     """
     global _cache_manager
     if _cache_manager is None:
-        _cache_manager = CacheManager()
+        _cache_manager = _create_cache_backend()
     return _cache_manager
 
 
-async def cache_dependency() -> CacheManager:
+async def cache_dependency() -> CacheBackend:
     """
     FastAPI dependency for getting the cache manager.
 
     Returns:
-        CacheManager instance
+        Configured CacheBackend instance
     """
     return get_cache_manager()
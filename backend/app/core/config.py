@@ -69,6 +69,9 @@ class Settings(BaseSettings):
     SUPABASE_SERVICE_KEY: str  # Service role key for backend operations (bypasses RLS)
     SUPABASE_ANON_KEY: str  # Public anonymous key for RLS operations
 
+    # Optional direct Postgres connection for asyncpg (bulk writes, LISTEN)
+    DATABASE_URL: str | None = None
+
     # Optional Supabase JWT Configuration
     SUPABASE_JWT_SECRET: str | None = None
     # SUPABASE_JWKS_URI will be dynamically generated if not set
@@ -104,6 +107,78 @@ class Settings(BaseSettings):
     CLOUDFLARE_SERVICE_CLIENT_SECRET: str | None = None
     CLOUDFLARE_ACCESS_PROTECTED: bool = False
 
+    # Pooled HTTP connections to Home Assistant (per client, i.e. per host)
+    HA_HTTP_POOL_LIMIT: int = 100
+    HA_HTTP_POOL_LIMIT_PER_HOST: int = 20
+    HA_HTTP_KEEPALIVE_SECONDS: float = 60.0
+    HA_HTTP_DNS_CACHE_SECONDS: int = 300
+    HA_HTTP_TIMEOUT_SECONDS: float = 30.0
+    HA_HTTP_CONNECT_TIMEOUT_SECONDS: float = 10.0
+
+    # Seconds to wait for the result of a Home Assistant WebSocket command
+    HA_WS_COMMAND_TIMEOUT_SECONDS: float = 10.0
+
+    # Adaptive REST rate limit per Home Assistant host (requests per second);
+    # responses slower than the latency target count as overload signals
+    HA_RATE_LIMIT_INITIAL: float = 10.0
+    HA_RATE_LIMIT_MIN: float = 1.0
+    HA_RATE_LIMIT_MAX: float = 50.0
+    HA_RATE_LIMIT_LATENCY_TARGET_SECONDS: float = 1.0
+
+    # Shared Home Assistant connections: most kept open at once, and seconds
+    # without use before the reaper closes one
+    HA_MAX_CONNECTIONS: int = 50
+    HA_CONNECTION_IDLE_SECONDS: float = 3600.0
+    HA_CONNECTION_REAP_INTERVAL_SECONDS: float = 60.0
+
+    # Seconds a user's Home Assistant configuration stays cached; changes
+    # made through the API invalidate it immediately
+    HA_CONFIG_CACHE_TTL_SECONDS: int = 300
+
+    # Cache backend: "memory" (per-process) or "redis" (shared across workers)
+    CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    CACHE_REDIS_URL: str | None = None
+    CACHE_KEY_PREFIX: str = "vertical-farm:"
+
+    # In-process cache limits
+    CACHE_MAX_ENTRIES: int = 10_000
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 64 MiB
+    CACHE_SHARD_COUNT: int = 16
+    CACHE_CLEANUP_INTERVAL_SECONDS: float = 60.0
+
+    # Recent sensor readings ring buffer (per device/reading type series)
+    SENSOR_BUFFER_CAPACITY: int = 4320  # 12 hours at a 10 second interval
+    SENSOR_BUFFER_MAX_SERIES: int = 256
+
+    # History responses stay within this many points by switching from raw
+    # readings to 1m/15m/1h rollups; the raw interval estimates window sizes
+    SENSOR_HISTORY_POINT_BUDGET: int = 2000
+    SENSOR_RAW_INTERVAL_SECONDS: float = 10.0
+
+    # Bulk sensor reading ingestion
+    SENSOR_INGEST_MAX_READINGS_PER_REQUEST: int = 10_000
+    SENSOR_INGEST_FLUSH_SIZE: int = 5_000
+    SENSOR_INGEST_FLUSH_INTERVAL_SECONDS: float = 0.25
+    SENSOR_INGEST_MAX_BUFFERED: int = 50_000
+
+    # Home Assistant device states are buffered per entity (latest state
+    # wins) and upserted in batches
+    DEVICE_STATE_FLUSH_SIZE: int = 500
+    DEVICE_STATE_FLUSH_INTERVAL_SECONDS: float = 1.0
+
+    # Device update WebSockets: seconds updates are merged into one frame,
+    # and frames queued per socket before the oldest are dropped
+    DEVICE_WS_BATCH_INTERVAL_SECONDS: float = 0.075
+    DEVICE_WS_QUEUE_SIZE: int = 256
+
+    # Seconds between attempts of a worker with open device sockets to take
+    # over monitoring a user's devices from a worker that stopped
+    DEVICE_MONITOR_ELECTION_INTERVAL_SECONDS: float = 5.0
+
+    # Hard limit in seconds for an emergency stop; device groups still being
+    # turned off by then are reported as failed
+    EMERGENCY_STOP_DEADLINE_SECONDS: float = 5.0
+
     # Configure Pydantic to load from .env files and other settings
     model_config = SettingsConfigDict(
         env_file=[
@@ -142,6 +217,11 @@ class Settings(BaseSettings):
         """Parse CORS origins from environment variable string or list."""
         return parse_cors(v)
 
+    @property
+    def database_url(self) -> str | None:
+        """Postgres connection URL used by DatabaseService."""
+        return self.DATABASE_URL
+
     @property
     def supabase_jwks_uri(self) -> str:
         """Generate JWKS URI from Supabase URL if not explicitly overridden."""
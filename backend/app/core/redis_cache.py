@@ -0,0 +1,279 @@
+"""
+Redis-protocol cache backend.
+
+Stores cache entries in a Redis-compatible server so that every uvicorn
+worker shares one warm cache and one invalidation point. Multi-key reads
+and writes are pipelined into a single round trip.
+
+Values are serialized with orjson when it is installed, which natively and
+compactly encodes dataclasses and datetimes; the standard library json
+module is used as a fallback.
+
+Requires the optional ``redis`` dependency (``pip install .[redis]``).
+"""
+
+import dataclasses
+import json
+import logging
+from collections.abc import Callable
+from datetime import date, datetime
+from typing import Any
+
+from app.core.cache import CacheBackend
+
+try:
+    from redis import asyncio as redis_asyncio
+except ImportError:  # pragma: no cover - optional dependency
+    redis_asyncio = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Number of keys requested per SCAN / deleted per UNLINK batch
+SCAN_BATCH_SIZE = 500
+
+
+def _json_default(value: Any) -> Any:
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, datetime | date):
+        return value.isoformat()
+    if isinstance(value, tuple | set | frozenset):
+        return list(value)
+    return str(value)
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    Serialize a cache value for storage in Redis.
+
+    Dataclasses become objects and datetimes become ISO 8601 strings.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default)
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+
+def decode_value(data: bytes) -> Any:
+    """Deserialize a cache value read from Redis."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class RedisCacheManager(CacheBackend):
+    """
+    Cache backend backed by a Redis-protocol server.
+
+    Keys are namespaced with ``key_prefix`` so that several applications can
+    share one server. Expiry is delegated to Redis, so no local cleanup task
+    is needed.
+    """
+
+    is_local = False
+
+    def __init__(
+        self,
+        url: str | None = None,
+        key_prefix: str = "",
+        client: Any | None = None,
+        encode: Callable[[Any], bytes] = encode_value,
+        decode: Callable[[bytes], Any] = decode_value,
+    ) -> None:
+        """
+        Args:
+            url: Redis connection URL, e.g. ``redis://localhost:6379/0``
+            key_prefix: Namespace prepended to every key
+            client: Pre-built async Redis client (takes precedence over url)
+            encode: Serializer applied to values before they are stored
+            decode: Deserializer applied to values read back
+        """
+        if client is None:
+            if redis_asyncio is None:
+                raise RuntimeError("The 'redis' package is required for Redis caching")
+            if not url:
+                raise RuntimeError("CACHE_REDIS_URL must be set for Redis caching")
+            client = redis_asyncio.Redis.from_url(url)
+
+        self._client = client
+        self._prefix = key_prefix
+        self._encode = encode
+        self._decode = decode
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}{key}"
+
+    def _strip(self, key: bytes | str) -> str:
+        if isinstance(key, bytes):
+            key = key.decode()
+        return key[len(self._prefix) :]
+
+    async def _scan(self, match: str) -> list[str]:
+        return [
+            key.decode() if isinstance(key, bytes) else key
+            async for key in self._client.scan_iter(
+                match=f"{self._prefix}{match}", count=SCAN_BATCH_SIZE
+            )
+        ]
+
+    async def get(self, key: str) -> Any | None:
+        """
+        Get a value from the cache.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or None if not found or expired
+        """
+        data = await self._client.get(self._key(key))
+        if data is None:
+            return None
+        return self._decode(data)
+
+    async def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """
+        Get several values in a single MGET round trip.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Mapping of found keys to their values
+        """
+        if not keys:
+            return {}
+        values = await self._client.mget([self._key(key) for key in keys])
+        return {
+            key: self._decode(data)
+            for key, data in zip(keys, values, strict=True)
+            if data is not None
+        }
+
+    async def set(self, key: str, value: Any, ttl_seconds: int | None = None) -> None:
+        """
+        Set a value in the cache.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl_seconds: Time to live in seconds (None for no expiration)
+        """
+        await self._client.set(
+            self._key(key), self._encode(value), ex=ttl_seconds or None
+        )
+
+    async def set_many(
+        self, items: dict[str, Any], ttl_seconds: int | None = None
+    ) -> None:
+        """
+        Set several values in one pipelined round trip.
+
+        Args:
+            items: Mapping of cache keys to values
+            ttl_seconds: Time to live in seconds (None for no expiration)
+        """
+        if not items:
+            return
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(self._key(key), self._encode(value), ex=ttl_seconds or None)
+            await pipe.execute()
+
+    async def delete(self, key: str) -> bool:
+        """
+        Delete a key from the cache.
+
+        Args:
+            key: Cache key to delete
+
+        Returns:
+            True if key was deleted, False if not found
+        """
+        return bool(await self._client.delete(self._key(key)))
+
+    async def delete_pattern(self, pattern: str) -> int:
+        """
+        Delete all keys matching a glob-style pattern.
+
+        Uses incremental SCAN rather than KEYS so the server is never blocked.
+
+        Args:
+            pattern: Glob pattern, e.g. ``sensor_latest:user-1:*``
+
+        Returns:
+            Number of keys deleted
+        """
+        matching = await self._scan(pattern)
+        deleted = 0
+        for start in range(0, len(matching), SCAN_BATCH_SIZE):
+            deleted += await self._client.unlink(
+                *matching[start : start + SCAN_BATCH_SIZE]
+            )
+        return deleted
+
+    async def clear(self) -> None:
+        """Clear all cache entries under this backend's prefix."""
+        if self._prefix:
+            await self.delete_pattern("*")
+        else:
+            await self._client.flushdb()
+
+    async def exists(self, key: str) -> bool:
+        """
+        Check if a key exists in the cache.
+
+        Args:
+            key: Cache key to check
+
+        Returns:
+            True if key exists and is not expired
+        """
+        return bool(await self._client.exists(self._key(key)))
+
+    async def keys(self, pattern: str | None = None) -> list[str]:
+        """
+        Get all cache keys, optionally filtered by pattern.
+
+        Args:
+            pattern: Optional pattern to filter keys (basic string matching)
+
+        Returns:
+            List of cache keys
+        """
+        match = f"*{pattern}*" if pattern else "*"
+        return [self._strip(key) for key in await self._scan(match)]
+
+    async def size(self) -> int:
+        """
+        Get the number of entries held under this backend's prefix.
+
+        Returns:
+            Number of cache entries
+        """
+        if not self._prefix:
+            return await self._client.dbsize()
+        return len(await self._scan("*"))
+
+    async def stats(self) -> dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with cache statistics
+        """
+        memory = await self._client.info("memory")
+        return {
+            "backend": "redis",
+            "total_entries": await self.size(),
+            "memory_usage_estimate": memory.get("used_memory"),
+            "max_bytes": memory.get("maxmemory"),
+        }
+
+    async def close(self) -> None:
+        """Close the underlying Redis connection pool."""
+        await self._client.aclose()
@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import Depends
 from supabase import AClient, AClientOptions, Client, acreate_client, create_client
 
@@ -35,6 +37,27 @@ async def get_async_supabase_client() -> AClient:
     return await acreate_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
 
 
+# Process-wide async service client for hot paths (see below)
+_shared_async_client: AClient | None = None
+_shared_async_client_lock = asyncio.Lock()
+
+
+async def get_shared_async_supabase_client() -> AClient:
+    """
+    Returns a process-wide async service client, created on first use.
+
+    Unlike get_async_supabase_client, the client and its HTTP connection pool
+    are reused across calls, so frequently executed queries do not pay for a
+    new client and TLS handshake each time.
+    """
+    global _shared_async_client
+    if _shared_async_client is None:
+        async with _shared_async_client_lock:
+            if _shared_async_client is None:
+                _shared_async_client = await get_async_supabase_client()
+    return _shared_async_client
+
+
 async def get_async_rls_client(
     raw_token: str = Depends(get_raw_supabase_token),
 ) -> AClient:
@@ -11,6 +11,9 @@ from app.models.user import User
 from app.schemas.token import TokenPayload
 from app.services.database_service import DatabaseService
 from app.services.device_monitoring_service import DeviceMonitoringService
+from app.services.device_monitoring_service import (
+    get_device_monitoring_service as get_shared_device_monitoring_service,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/token"
@@ -80,8 +83,6 @@ async def get_database_service() -> DatabaseService:
     return DatabaseService()
 
 
-async def get_device_monitoring_service(
-    db_service: DatabaseService = Depends(get_database_service),
-) -> DeviceMonitoringService:
-    """Get device monitoring service instance"""
-    return DeviceMonitoringService(db_service)
+async def get_device_monitoring_service() -> DeviceMonitoringService:
+    """Get the worker's device monitoring service instance"""
+    return await get_shared_device_monitoring_service()
@@ -10,12 +10,18 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 from supabase import AClient
 
 from app.api.v1.api import api_router as api_router_v1
+from app.core.cache import get_cache_manager
 
 # from app.db.supabase_client import get_supabase_client # Only if example endpoint is used
 # from dotenv import load_dotenv # Likely redundant due to Pydantic .env loading
 from app.core.config import settings
 from app.core.security import get_raw_supabase_token
 from app.db.supabase_client import get_async_rls_client
+from app.services.database_service import close_database_service
+from app.services.device_monitoring_service import shutdown_device_monitoring_service
+from app.services.device_state_writer import close_device_state_writer
+from app.services.home_assistant_rate_limiter import rate_limiter_summary
+from app.services.sensor_ingestion_service import close_sensor_ingestion_service
 
 # Home Assistant service now uses user-specific configurations - no global imports needed
 # from app.services.database_service import get_database_service # Removed - no longer needed after PostGREST migration
@@ -23,6 +29,10 @@ from app.db.supabase_client import get_async_rls_client
 from app.services.supabase_background_service import (  # New Supabase-based service
     supabase_background_service,
 )
+from app.services.user_home_assistant_service import (
+    get_user_home_assistant_service,
+    shutdown_user_home_assistant_service,
+)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -46,6 +56,17 @@ async def lifespan(app: FastAPI):
     app_state["home_assistant"] = True
     logger.info("✅ Home Assistant service ready (user-specific configurations only)")
 
+    # Drop cached HA configurations changed by other workers
+    try:
+        ha_service = await get_user_home_assistant_service()
+        await ha_service.start_config_listener()
+    except Exception as e:
+        logger.error(f"❌ Failed to listen for HA configuration changes: {e}")
+
+    # Periodically purge expired cache entries so memory stays bounded
+    get_cache_manager().start_cleanup_task(settings.CACHE_CLEANUP_INTERVAL_SECONDS)
+    logger.info("✅ Cache cleanup task started")
+
     # Initialize Supabase background service (no startup needed - it's stateless)
     try:
         # Test the service connection
@@ -71,11 +92,45 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Error cleaning up Supabase background service: {e}")
 
-    # Home Assistant service cleanup not needed (user-specific instances auto-cleanup)
-    logger.info("✅ Home Assistant services cleaned up")
+    # Write any buffered sensor readings before connections go away
+    try:
+        await close_sensor_ingestion_service()
+        logger.info("✅ Sensor ingestion buffer flushed")
+    except Exception as e:
+        logger.error(f"❌ Error flushing sensor ingestion buffer: {e}")
+
+    # Close device sockets and release monitoring leadership to other workers
+    try:
+        await shutdown_device_monitoring_service()
+        logger.info("✅ Device monitoring service stopped")
+    except Exception as e:
+        logger.error(f"❌ Error stopping device monitoring service: {e}")
 
-    # No database connections to clean up - using PostGREST
-    logger.info("✅ No database connections to clean up (using PostGREST)")
+    # Write buffered device states before connections go away
+    try:
+        await close_device_state_writer()
+        logger.info("✅ Device state buffer flushed")
+    except Exception as e:
+        logger.error(f"❌ Error flushing device state buffer: {e}")
+
+    await get_cache_manager().stop_cleanup_task()
+    await get_cache_manager().close()
+    logger.info("✅ Cache backend closed")
+
+    # Close shared Home Assistant connections and stop their reaper
+    try:
+        await shutdown_user_home_assistant_service()
+        logger.info("✅ Home Assistant services cleaned up")
+    except Exception as e:
+        logger.error(f"❌ Error closing Home Assistant connections: {e}")
+
+    # Close the direct database connections last; buffered writes above use
+    # the pool, and the session connection holds LISTENs and leader locks
+    try:
+        await close_database_service()
+        logger.info("✅ Database connections closed")
+    except Exception as e:
+        logger.error(f"❌ Error closing database connections: {e}")
 
     logger.info("👋 Application shutdown complete")
 
@@ -176,6 +231,7 @@ async def health_check():
         "status": "healthy",
         "services": {
             "home_assistant": app_state.get("home_assistant", False),
+            "home_assistant_rate_limits": rate_limiter_summary(),
             "background_processor": background_status,
             "database": {
                 "status": "supabase_postgrest",
@@ -9,17 +9,20 @@ history, and static data endpoints.
 from datetime import datetime
 from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+# Maximum number of series in one batch history request
+MAX_HISTORY_BATCH_SERIES = 100
 
 
 class SensorReadingResponse(BaseModel):
     """Response model for individual sensor readings"""
 
-    id: int
+    id: int | None = None
     device_assignment_id: str
     reading_type: str
     value: float
-    unit: str
+    unit: str | None = None
     timestamp: datetime
     device_name: str | None = None
     location: str | None = None
@@ -35,6 +38,7 @@ class SensorHistoryResponse(BaseModel):
     device_id: str
     sensor_type: str
     period_hours: int
+    resolution: str = "raw"
     readings: list[SensorReadingResponse]
     total_readings: int
     cached: bool = False
@@ -43,6 +47,44 @@ class SensorHistoryResponse(BaseModel):
         from_attributes = True
 
 
+class SensorSeriesRef(BaseModel):
+    """A (device, sensor type) series requested in a batch"""
+
+    device_id: str
+    sensor_type: str
+
+
+class SensorHistoryBatchRequest(BaseModel):
+    """Request model for batched sensor history"""
+
+    series: list[SensorSeriesRef] = Field(
+        ..., min_length=1, max_length=MAX_HISTORY_BATCH_SERIES
+    )
+    hours: int = Field(24, ge=1, le=168)
+
+
+class SensorHistorySeries(BaseModel):
+    """One series of a batch history response, as parallel columns"""
+
+    device_id: str
+    sensor_type: str
+    unit: str | None = None
+    device_name: str | None = None
+    location: str | None = None
+    timestamps: list[datetime]
+    values: list[float]
+    total_readings: int
+
+
+class SensorHistoryBatchResponse(BaseModel):
+    """Response model for batched sensor history"""
+
+    period_hours: int
+    resolution: str = "raw"
+    series: list[SensorHistorySeries]
+    cached: bool = False
+
+
 class SensorAggregateResponse(BaseModel):
     """Response model for sensor data aggregates"""
 
@@ -61,6 +103,23 @@ class SensorAggregateResponse(BaseModel):
         from_attributes = True
 
 
+class SensorIngestRowError(BaseModel):
+    """A reading rejected by the bulk ingestion endpoint"""
+
+    index: int
+    error: str
+
+
+class SensorIngestResponse(BaseModel):
+    """Acknowledgement for a bulk sensor reading upload"""
+
+    batch_id: str | None = None
+    accepted: int
+    rejected: int
+    errors: list[SensorIngestRowError] = []
+    written_at: datetime | None = None
+
+
 class StaticDataResponse(BaseModel):
     """Response model for static data (species, varieties, recipes)"""
 
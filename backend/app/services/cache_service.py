@@ -10,7 +10,7 @@ import time
 from datetime import datetime
 from typing import Any
 
-from ..core.cache import CacheManager
+from ..core.cache import CacheBackend, get_cache_manager
 
 logger = logging.getLogger(__name__)
 
@@ -20,11 +20,12 @@ class CacheService:
     Service for managing application caching operations.
 
     This service provides high-level caching operations and statistics
-    for the application.
+    for the application. It wraps the configured cache backend, so with a
+    shared backend every worker sees the same entries and invalidations.
     """
 
-    def __init__(self) -> None:
-        self.cache_manager = CacheManager()
+    def __init__(self, cache_manager: CacheBackend | None = None) -> None:
+        self.cache_manager = cache_manager or get_cache_manager()
         self._stats = {
             "hits": 0,
             "misses": 0,
@@ -79,6 +80,45 @@ class CacheService:
             logger.error(f"Error setting cache key {key}: {e}")
             return False
 
+    async def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """
+        Get several values from the cache in one backend round trip.
+
+        Args:
+            keys: The cache keys
+
+        Returns:
+            Mapping of found keys to their cached values
+        """
+        try:
+            found = await self.cache_manager.get_many(keys)
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(keys) - len(found)
+            return found
+        except Exception as e:
+            logger.error(f"Error getting cache keys {keys}: {e}")
+            self._stats["misses"] += len(keys)
+            return {}
+
+    async def set_many(self, items: dict[str, Any], ttl: int | None = None) -> bool:
+        """
+        Set several values in the cache in one backend round trip.
+
+        Args:
+            items: Mapping of cache keys to values
+            ttl: Time to live in seconds
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            await self.cache_manager.set_many(items, ttl)
+            self._stats["sets"] += len(items)
+            return True
+        except Exception as e:
+            logger.error(f"Error setting cache keys {list(items)}: {e}")
+            return False
+
     async def delete(self, key: str) -> bool:
         """
         Delete a value from the cache.
@@ -1,8 +1,9 @@
 """Modern database service for connecting to PostgreSQL/Supabase with graceful degradation"""
 
+import asyncio
 import logging
 import re
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Callable
 from urllib.parse import urlparse
 
 import asyncpg
@@ -60,6 +61,15 @@ class DatabaseService:
         self.settings = get_settings()
         self._pool: asyncpg.Pool | None = None
         self._connection_failed = False
+        # Dedicated connection for LISTEN and session advisory locks, which
+        # pooled connections drop
+        self._session_connection: asyncpg.Connection | None = None
+        self._session_lock = asyncio.Lock()
+        # Replayed on a new session connection after the old one drops
+        self._listeners: dict[str, list[Callable[[str], None]]] = {}
+        # Advisory locks held by the current session connection
+        self._advisory_locks: set[str] = set()
+        self._reconnect_task: asyncio.Task | None = None
 
     @property
     def is_available(self) -> bool:
@@ -162,6 +172,15 @@ class DatabaseService:
 
     async def disconnect(self) -> None:
         """Close database connection pool"""
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        self._listeners.clear()
+        self._advisory_locks.clear()
+        if self._session_connection:
+            connection, self._session_connection = self._session_connection, None
+            connection.remove_termination_listener(self._on_session_terminated)
+            await connection.close()
         if self._pool:
             await self._pool.close()
             self._pool = None
@@ -199,6 +218,132 @@ class DatabaseService:
         async with self._pool.acquire() as conn:
             return await conn.execute(query, *args)
 
+    async def copy_records_to_table(
+        self, table_name: str, records: list[tuple], columns: list[str]
+    ) -> str:
+        """Bulk-load records into a table with COPY"""
+        if not self.is_available:
+            raise RuntimeError("Database service is not available")
+
+        async with self._pool.acquire() as conn:
+            return await conn.copy_records_to_table(
+                table_name, records=records, columns=columns
+            )
+
+    async def notify(self, channel: str, payload: str) -> None:
+        """Send a NOTIFY to every listener of a channel"""
+        await self.execute("SELECT pg_notify($1, $2)", channel, payload)
+
+    async def listen(self, channel: str, callback: Callable[[str], None]) -> None:
+        """
+        Call a function with the payload of every NOTIFY on a channel.
+
+        Uses a dedicated direct connection, since LISTEN does not survive
+        pooled connections or transaction-mode poolers. If that connection
+        drops, it is reopened in the background and its listeners restored.
+        """
+        async with self._session_lock:
+            connection = await self._get_session_connection()
+            await self._add_listener(connection, channel, callback)
+            self._listeners.setdefault(channel, []).append(callback)
+        logger.info(f"Listening for database notifications on {channel}")
+
+    async def try_advisory_lock(self, name: str) -> bool:
+        """
+        Take a session-level advisory lock without waiting.
+
+        The lock is held on the dedicated session connection, so it is
+        released when this process unlocks it or its connection drops.
+        Locks are re-entrant: every successful call needs its own unlock.
+
+        Returns:
+            True if the lock was taken
+        """
+        async with self._session_lock:
+            connection = await self._get_session_connection()
+            taken = await connection.fetchval(
+                "SELECT pg_try_advisory_lock(hashtext($1))", name
+            )
+            if taken:
+                self._advisory_locks.add(name)
+            return taken
+
+    def holds_advisory_lock(self, name: str) -> bool:
+        """Check that a lock taken with try_advisory_lock is still held"""
+        connection = self._session_connection
+        return (
+            name in self._advisory_locks
+            and connection is not None
+            and not connection.is_closed()
+        )
+
+    async def advisory_unlock(self, name: str) -> None:
+        """Release a lock taken with try_advisory_lock"""
+        async with self._session_lock:
+            self._advisory_locks.discard(name)
+            if self._session_connection is None or self._session_connection.is_closed():
+                return
+            await self._session_connection.fetchval(
+                "SELECT pg_advisory_unlock(hashtext($1))", name
+            )
+
+    async def _get_session_connection(self) -> asyncpg.Connection:
+        """Get the session connection, reopening it with its listeners if needed"""
+        if not self.is_available:
+            raise RuntimeError("Database service is not available")
+
+        if self._session_connection is None or self._session_connection.is_closed():
+            reconnecting = self._session_connection is not None
+            connection = await asyncpg.connect(self.settings.database_url)
+            connection.add_termination_listener(self._on_session_terminated)
+            for channel, callbacks in self._listeners.items():
+                for callback in callbacks:
+                    await self._add_listener(connection, channel, callback)
+            self._session_connection = connection
+            if reconnecting:
+                logger.warning(
+                    "Reopened database session connection, restored listeners on "
+                    f"{len(self._listeners)} channels"
+                )
+        return self._session_connection
+
+    @staticmethod
+    async def _add_listener(
+        connection: asyncpg.Connection, channel: str, callback: Callable[[str], None]
+    ) -> None:
+        await connection.add_listener(
+            channel, lambda _conn, _pid, _channel, payload: callback(payload)
+        )
+
+    def _on_session_terminated(self, connection: asyncpg.Connection) -> None:
+        if connection is not self._session_connection:
+            return
+        self._advisory_locks.clear()
+        logger.warning(
+            "Database session connection lost; advisory locks released, "
+            "notifications paused until it is reopened"
+        )
+        if self._listeners and (
+            self._reconnect_task is None or self._reconnect_task.done()
+        ):
+            self._reconnect_task = asyncio.create_task(self._restore_session())
+
+    async def _restore_session(self) -> None:
+        """Reopen the session connection with backoff so listeners resume"""
+        delay = 1.0
+        while True:
+            try:
+                async with self._session_lock:
+                    await self._get_session_connection()
+                return
+            except Exception as e:
+                logger.error(
+                    f"Failed to reopen database session connection, retrying in "
+                    f"{delay:.0f}s: {e}"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60.0)
+
     async def health_check(self) -> dict:
         """Perform a health check on the database connection"""
         try:
@@ -225,6 +370,14 @@ async def get_database_service() -> DatabaseService:
     return _database_service
 
 
+async def close_database_service() -> None:
+    """Close the pool and the session connection, releasing LISTENs and locks"""
+    global _database_service
+    if _database_service is not None:
+        await _database_service.disconnect()
+        _database_service = None
+
+
 async def get_database() -> DatabaseService | None:
     """FastAPI dependency for database service with graceful degradation"""
     try:
@@ -4,15 +4,24 @@ Handles device assignments, state caching, and WebSocket connections
 """
 
 import asyncio
-import json
 import logging
+from collections.abc import Callable, Coroutine
 from datetime import datetime, timezone
 from enum import Enum
+from typing import Any
 
-from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import HTTPException, WebSocket
+
+from app.core.config import get_settings
+from app.db.supabase_client import get_shared_async_supabase_client
 
 from .database_service import DatabaseService
+from .device_state_writer import DeviceStateWriter, get_device_state_writer
+from .device_update_bus import DeviceUpdateBus
 from .home_assistant_client import HomeAssistantClient
+from .home_assistant_rate_limiter import RequestPriority
+from .user_home_assistant_service import get_user_home_assistant_service
+from .websocket_fanout import WebSocketFanout
 
 # TODO: Replace with Supabase native queuing/caching when implementing real-time features
 
@@ -37,43 +46,77 @@ class DeviceState(str, Enum):
 class DeviceMonitoringService:
     """Service for managing device monitoring, control, and WebSocket connections"""
 
-    def __init__(self, db_service: DatabaseService) -> None:
+    def __init__(
+        self,
+        db_service: DatabaseService,
+        state_writer: DeviceStateWriter | None = None,
+        fanout: WebSocketFanout | None = None,
+        bus: DeviceUpdateBus | None = None,
+    ) -> None:
         self.db_service = db_service
-        # TODO: Replace with Supabase Realtime subscriptions for real-time state updates
-        self.active_connections: dict[str, set[WebSocket]] = {}  # user_id -> websockets
+        self.state_writer = state_writer or get_device_state_writer()
+        settings = get_settings()
+        if fanout is None:
+            fanout = WebSocketFanout(
+                batch_interval=settings.DEVICE_WS_BATCH_INTERVAL_SECONDS,
+                queue_size=settings.DEVICE_WS_QUEUE_SIZE,
+            )
+        self.fanout = fanout
+        self.bus = bus or DeviceUpdateBus(self.fanout.publish)
+        self.election_interval = settings.DEVICE_MONITOR_ELECTION_INTERVAL_SECONDS
+
+        # Users whose devices this worker monitors (it holds their leadership),
+        # with the shared HA client and the state callback registered on it
         self.ha_clients: dict[str, HomeAssistantClient] = {}  # user_id -> HA client
+        self._state_callbacks: dict[str, Callable] = {}
+        # Assigned entities each monitored user's callback reports
+        self._monitored_entities: dict[str, set[str]] = {}
+        # Users with local sockets -> task competing for their leadership
+        self._elections: dict[str, asyncio.Task] = {}
+        self._background_tasks: set[asyncio.Task] = set()
         self.running = False
 
+    @property
+    def active_connections(self) -> dict[str, dict[WebSocket, Any]]:
+        """Open WebSockets per user"""
+        return self.fanout.connections
+
     async def start(self) -> None:
         """Start the device monitoring service"""
+        await self.bus.start()
         self.running = True
         logger.info("Device monitoring service started")
 
     async def stop(self) -> None:
         """Stop the device monitoring service"""
         self.running = False
+        for task in self._elections.values():
+            task.cancel()
+        self._elections.clear()
+        for user_id in list(self.ha_clients):
+            await self.stop_user_monitoring(user_id)
+
         # Close all WebSocket connections
-        for user_id, websockets in self.active_connections.items():
-            for ws in websockets.copy():
-                try:
-                    await ws.close()
-                except Exception:
-                    pass  # WebSocket already closed
-        self.active_connections.clear()
+        websockets = [
+            ws for sockets in self.active_connections.values() for ws in sockets
+        ]
+        await self.fanout.close()
+        for ws in websockets:
+            try:
+                await ws.close()
+            except Exception:
+                pass  # WebSocket already closed
         logger.info("Device monitoring service stopped")
 
     async def connect_websocket(self, websocket: WebSocket, user_id: str) -> None:
         """Connect a WebSocket for a user"""
         await websocket.accept()
 
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = set()
-
-        self.active_connections[user_id].add(websocket)
+        self.fanout.add(user_id, websocket)
         logger.info(f"WebSocket connected for user {user_id}")
 
-        # Send current connection status
-        await self.send_to_user(
+        # Send current connection status (to this worker's sockets only)
+        self.fanout.publish(
             user_id,
             {
                 "type": "connection_status",
@@ -82,89 +125,176 @@ class DeviceMonitoringService:
             },
         )
 
-        # Start device state monitoring for this user if not already running
-        if user_id not in self.ha_clients:
-            await self.start_user_monitoring(user_id)
+        # Compete for monitoring this user's devices while sockets are open
+        if user_id not in self._elections:
+            self._elections[user_id] = asyncio.create_task(
+                self._lead_user_monitoring(user_id)
+            )
 
     async def disconnect_websocket(self, websocket: WebSocket, user_id: str) -> None:
         """Disconnect a WebSocket for a user"""
-        if user_id in self.active_connections:
-            self.active_connections[user_id].discard(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
-                # Stop monitoring if no more connections
-                await self.stop_user_monitoring(user_id)
+        if self.fanout.remove(user_id, websocket):
+            # Stop monitoring if no more connections, letting another worker
+            # with open sockets take over
+            election = self._elections.pop(user_id, None)
+            if election is not None:
+                election.cancel()
+            await self.stop_user_monitoring(user_id)
 
         logger.info(f"WebSocket disconnected for user {user_id}")
 
-    async def start_user_monitoring(self, user_id: str) -> None:
-        """Start monitoring devices for a specific user"""
+    async def _lead_user_monitoring(self, user_id: str) -> None:
+        """Monitor the user's devices whenever this worker wins the election"""
+        while True:
+            if user_id in self.ha_clients:
+                await self._check_user_connection(user_id)
+            elif await self.bus.try_lead(user_id):
+                try:
+                    started = await self.start_user_monitoring(user_id)
+                except asyncio.CancelledError:
+                    # Cancelled while taking over; don't keep the lock held
+                    if user_id in self.ha_clients:
+                        await self.stop_user_monitoring(user_id)
+                    else:
+                        await self.bus.resign(user_id)
+                    raise
+                if not started:
+                    await self.bus.resign(user_id)
+            await asyncio.sleep(self.election_interval)
+
+    def _run_in_background(self, coro: Coroutine[Any, Any, Any]) -> None:
+        """Run a coroutine as a task kept referenced until it finishes"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _check_user_connection(self, user_id: str) -> None:
+        """
+        Keep the monitored shared connection in use, and resubscribe through
+        the election when it has been closed or replaced or the leadership
+        lock was lost.
+        """
+        if not self.bus.holds_lead(user_id):
+            # Another worker may already have taken over; stop publishing
+            logger.warning(f"Lost device monitor leadership for user {user_id}")
+            await self.stop_user_monitoring(user_id)
+            return
+
         try:
-            # Get user's Home Assistant config
-            ha_config = await self.db_service.get_user_default_ha_config(user_id)
-            if not ha_config:
-                logger.warning(f"No Home Assistant config found for user {user_id}")
-                return
+            user_ha_service = await get_user_home_assistant_service()
+            ha_client = await user_ha_service.get_or_create_connection(user_id)
+        except Exception as e:
+            logger.warning(f"Home Assistant connection lost for user {user_id}: {e}")
+            ha_client = None
 
-            # Create HA client
-            ha_client = HomeAssistantClient(
-                url=ha_config["url"], token=ha_config["access_token"]
-            )
+        if ha_client is not self.ha_clients.get(user_id):
+            await self.stop_user_monitoring(user_id)
 
-            # Test connection
-            if not await ha_client.test_connection():
-                logger.error(f"Failed to connect to Home Assistant for user {user_id}")
-                return
+    async def start_user_monitoring(self, user_id: str) -> bool:
+        """
+        Start monitoring devices for a specific user.
+
+        Uses the user's shared Home Assistant connection from
+        UserHomeAssistantService rather than opening one per worker session.
+
+        Returns:
+            True if the user's devices are now monitored
+        """
+        try:
+            user_ha_service = await get_user_home_assistant_service()
+            if not await user_ha_service.get_user_config(user_id):
+                logger.warning(f"No Home Assistant config found for user {user_id}")
+                return False
+
+            try:
+                ha_client = await user_ha_service.get_or_create_connection(user_id)
+            except Exception as e:
+                logger.error(
+                    f"Failed to connect to Home Assistant for user {user_id}: {e}"
+                )
+                return False
 
             self.ha_clients[user_id] = ha_client
+            if not await self.monitor_user_devices(user_id):
+                self.ha_clients.pop(user_id, None)
+                return False
 
-            # Start monitoring task
-            asyncio.create_task(self.monitor_user_devices(user_id))
+            logger.info(f"Monitoring devices for user {user_id}")
+            return True
 
         except Exception as e:
             logger.error(f"Error starting monitoring for user {user_id}: {e}")
+            self.ha_clients.pop(user_id, None)
+            return False
 
     async def stop_user_monitoring(self, user_id: str) -> None:
         """Stop monitoring devices for a specific user"""
-        if user_id in self.ha_clients:
+        ha_client = self.ha_clients.pop(user_id, None)
+        if ha_client is None:
+            return
+
+        # The client is shared; only detach this user's callback
+        self._monitored_entities.pop(user_id, None)
+        callback = self._state_callbacks.pop(user_id, None)
+        if callback is not None:
             try:
-                await self.ha_clients[user_id].close()
-            except Exception:
-                pass  # Client already closed
-            del self.ha_clients[user_id]
+                ha_client.state_change_callbacks.remove(callback)
+            except ValueError:
+                pass
+        await self.bus.resign(user_id)
 
         logger.info(f"Stopped device monitoring for user {user_id}")
 
-    async def monitor_user_devices(self, user_id: str) -> None:
-        """Monitor devices for a specific user"""
+    async def monitor_user_devices(self, user_id: str) -> bool:
+        """
+        Subscribe to state changes of the user's assigned devices.
+
+        Returns:
+            True if the subscription is in place
+        """
         try:
             ha_client = self.ha_clients.get(user_id)
             if not ha_client:
-                return
+                return False
 
             # Get user's device assignments
             device_assignments = await self.get_user_device_assignments(user_id)
-            entity_ids = [
+            entity_ids = {
                 assignment["home_assistant_entity_id"]
                 for assignment in device_assignments
-            ]
+            }
 
             if not entity_ids:
                 logger.info(f"No device assignments found for user {user_id}")
-                return
-
-            # Subscribe to state changes
-            await ha_client.subscribe_to_state_changes(
-                entity_ids=entity_ids,
-                callback=lambda entity_id, old_state, new_state: asyncio.create_task(
-                    self.handle_device_state_change(
-                        user_id, entity_id, old_state, new_state
+                return False
+
+            def on_state_change(
+                entity_id: str, old_state: dict | None, new_state: dict
+            ) -> None:
+                # The shared client also reports entities of its other users
+                if entity_id in entity_ids:
+                    self._run_in_background(
+                        self.handle_device_state_change(
+                            user_id, entity_id, old_state, new_state
+                        )
                     )
-                ),
-            )
+
+            self._monitored_entities[user_id] = entity_ids
+            if ha_client.watched_entities is None:
+                # The shared client mirrors every entity for all of its users;
+                # narrowing its watched set would drop that mirror, so changes
+                # are filtered in the callback instead
+                ha_client.state_change_callbacks.append(on_state_change)
+            else:
+                await ha_client.subscribe_to_state_changes(
+                    entity_ids=entity_ids, callback=on_state_change
+                )
+            self._state_callbacks[user_id] = on_state_change
+            return True
 
         except Exception as e:
             logger.error(f"Error monitoring devices for user {user_id}: {e}")
+            return False
 
     async def handle_device_state_change(
         self, user_id: str, entity_id: str, old_state: dict, new_state: dict
@@ -175,9 +305,8 @@ class DeviceMonitoringService:
             state = new_state.get("state", DeviceState.UNKNOWN)
             attributes = new_state.get("attributes", {})
 
-            # Update database directly (no caching layer)
-            # TODO: Consider using Supabase Realtime for instant state propagation
-            await self.update_device_state_db(user_id, entity_id, state, attributes)
+            # Buffered: written with the next batch of device states
+            self.update_device_state_db(user_id, entity_id, state, attributes)
 
             # Broadcast to WebSocket clients
             await self.send_to_user(
@@ -200,52 +329,27 @@ class DeviceMonitoringService:
 
     # Removed: Redis-based caching - will use Supabase native caching/realtime capabilities
 
-    async def update_device_state_db(
+    def update_device_state_db(
         self, user_id: str, entity_id: str, state: str, attributes: dict
     ) -> None:
-        """Update device state in database"""
-        try:
-            supabase = self.db_service.get_supabase_client()
-
-            # Use the stored procedure we created
-            result = supabase.rpc(
-                "update_device_state",
-                {
-                    "p_user_id": user_id,
-                    "p_entity_id": entity_id,
-                    "p_state": state,
-                    "p_attributes": attributes,
-                },
-            ).execute()
-
-        except Exception as e:
-            logger.error(f"Error updating device state in database: {e}")
+        """Queue a device state for the next batched database write"""
+        self.state_writer.record(user_id, entity_id, state, attributes)
 
     async def send_to_user(self, user_id: str, message: dict) -> None:
-        """Send message to all WebSocket connections for a user"""
-        if user_id not in self.active_connections:
-            return
-
-        disconnected_websockets = []
-        for websocket in self.active_connections[user_id].copy():
-            try:
-                await websocket.send_text(json.dumps(message))
-            except WebSocketDisconnect:
-                disconnected_websockets.append(websocket)
-            except Exception as e:
-                logger.error(f"Error sending message to websocket: {e}")
-                disconnected_websockets.append(websocket)
+        """
+        Send a message to all WebSocket connections of a user.
 
-        # Remove disconnected websockets
-        for ws in disconnected_websockets:
-            self.active_connections[user_id].discard(ws)
+        The message reaches the user's sockets on every worker through the
+        device update bus, and is delivered in micro-batched frames.
+        """
+        await self.bus.publish(user_id, message)
 
     async def get_user_device_assignments(self, user_id: str) -> list[dict]:
         """Get all device assignments for a user"""
         try:
-            supabase = self.db_service.get_supabase_client()
+            supabase = await get_shared_async_supabase_client()
 
-            result = (
+            result = await (
                 supabase.table("device_assignments")
                 .select("*")
                 .eq("user_id", user_id)
@@ -262,9 +366,9 @@ class DeviceMonitoringService:
     async def get_location_devices(self, user_id: str, location_id: str) -> list[dict]:
         """Get devices assigned to a specific location"""
         try:
-            supabase = self.db_service.get_supabase_client()
+            supabase = await get_shared_async_supabase_client()
 
-            result = supabase.rpc(
+            result = await supabase.rpc(
                 "get_location_devices",
                 {"p_user_id": user_id, "p_location_id": location_id},
             ).execute()
@@ -275,11 +379,34 @@ class DeviceMonitoringService:
             logger.error(f"Error getting location devices: {e}")
             return []
 
+    async def _get_ha_client(self, user_id: str) -> HomeAssistantClient:
+        """
+        Get the user's Home Assistant client on any worker.
+
+        Only the leading worker monitors a user; the others use the user's
+        shared connection from the registry.
+        """
+        ha_client = self.ha_clients.get(user_id)
+        if ha_client is not None:
+            return ha_client
+        user_ha_service = await get_user_home_assistant_service()
+        return await user_ha_service.get_or_create_connection(user_id)
+
+    async def home_assistant_connected(self, user_id: str) -> bool:
+        """Whether this worker has a healthy Home Assistant connection for a user"""
+        if user_id in self.ha_clients:
+            return True
+        user_ha_service = await get_user_home_assistant_service()
+        health = await user_ha_service.get_connection_health(user_id)
+        return health["connection_healthy"]
+
     async def control_device(self, user_id: str, entity_id: str, action: dict) -> dict:
         """Control a device through Home Assistant"""
         try:
-            ha_client = self.ha_clients.get(user_id)
-            if not ha_client:
+            try:
+                ha_client = await self._get_ha_client(user_id)
+            except Exception as e:
+                logger.warning(f"Home Assistant unavailable for user {user_id}: {e}")
                 raise HTTPException(
                     status_code=503, detail="Home Assistant not connected"
                 )
@@ -370,8 +497,8 @@ class DeviceMonitoringService:
         try:
             # Get from database directly (no caching layer)
             # TODO: Consider using Supabase's built-in caching or Realtime subscriptions
-            supabase = self.db_service.get_supabase_client()
-            result = (
+            supabase = await get_shared_async_supabase_client()
+            result = await (
                 supabase.table("device_states")
                 .select("state")
                 .eq("user_id", user_id)
@@ -400,9 +527,9 @@ class DeviceMonitoringService:
     ) -> None:
         """Log device control action"""
         try:
-            supabase = self.db_service.get_supabase_client()
+            supabase = await get_shared_async_supabase_client()
 
-            result = supabase.rpc(
+            result = await supabase.rpc(
                 "log_device_control",
                 {
                     "p_user_id": user_id,
@@ -429,9 +556,9 @@ class DeviceMonitoringService:
     ) -> dict:
         """Create a new device assignment"""
         try:
-            supabase = self.db_service.get_supabase_client()
+            supabase = await get_shared_async_supabase_client()
 
-            result = (
+            result = await (
                 supabase.table("device_assignments")
                 .insert(
                     {
@@ -448,6 +575,15 @@ class DeviceMonitoringService:
 
             if result.data:
                 logger.info(f"Created device assignment: {entity_id} -> {location_id}")
+
+                # Extend monitoring to the new device
+                monitored = self._monitored_entities.get(user_id)
+                if monitored is not None:
+                    monitored.add(entity_id)
+                ha_client = self.ha_clients.get(user_id)
+                if ha_client and ha_client.watched_entities is not None:
+                    await ha_client.watch_entities([entity_id])
+
                 return result.data[0]
 
             raise Exception("Failed to create device assignment")
@@ -459,9 +595,9 @@ class DeviceMonitoringService:
     async def delete_device_assignment(self, user_id: str, assignment_id: str) -> bool:
         """Delete a device assignment"""
         try:
-            supabase = self.db_service.get_supabase_client()
+            supabase = await get_shared_async_supabase_client()
 
-            result = (
+            result = await (
                 supabase.table("device_assignments")
                 .delete()
                 .eq("id", assignment_id)
@@ -469,6 +605,25 @@ class DeviceMonitoringService:
                 .execute()
             )
 
+            # Stop monitoring entities that are no longer assigned anywhere
+            ha_client = self.ha_clients.get(user_id)
+            if ha_client and result.data:
+                assigned = {
+                    assignment["home_assistant_entity_id"]
+                    for assignment in await self.get_user_device_assignments(user_id)
+                }
+                unassigned = {
+                    row["home_assistant_entity_id"]
+                    for row in result.data
+                    if row.get("home_assistant_entity_id") not in assigned
+                }
+                self._monitored_entities.get(user_id, set()).difference_update(
+                    unassigned
+                )
+                # A client watching every entity keeps doing so for its users
+                if ha_client.watched_entities is not None:
+                    await ha_client.unwatch_entities(unassigned)
+
             return bool(result.data)
 
         except Exception as e:
@@ -480,45 +635,128 @@ class DeviceMonitoringService:
         user_id: str,
         location_ids: list[str] | None = None,
         device_types: list[DeviceType] | None = None,
+        deadline: float | None = None,
     ) -> dict:
-        """Emergency stop for devices"""
+        """
+        Emergency stop for devices.
+
+        Devices are grouped by domain and each group is turned off with one
+        service call for all of its entities. The groups run concurrently at
+        critical priority, so the rate limiter never holds them back, and
+        the stop gives up on groups still running after the deadline.
+        Results of each group are sent to the user's sockets as they arrive.
+
+        Args:
+            user_id: Owner of the devices
+            location_ids: Only devices at these locations
+            device_types: Only devices of these types
+            deadline: Seconds from the call before unfinished groups are
+                reported failed (defaults to EMERGENCY_STOP_DEADLINE_SECONDS)
+        """
+        if deadline is None:
+            deadline = get_settings().EMERGENCY_STOP_DEADLINE_SECONDS
+        # The deadline covers finding the devices and connecting as well
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + deadline
         try:
-            # Get affected devices
-            supabase = self.db_service.get_supabase_client()
-            query = (
-                supabase.table("device_assignments").select("*").eq("user_id", user_id)
-            )
-
-            if location_ids:
-                query = query.in_("location_id", location_ids)
+            try:
+                async with asyncio.timeout_at(expires_at):
+                    # Get affected devices
+                    supabase = await get_shared_async_supabase_client()
+                    query = (
+                        supabase.table("device_assignments")
+                        .select("*")
+                        .eq("user_id", user_id)
+                    )
 
-            if device_types:
-                query = query.in_("device_type", [dt.value for dt in device_types])
+                    if location_ids:
+                        query = query.in_("location_id", location_ids)
 
-            result = query.execute()
-            devices = result.data or []
+                    if device_types:
+                        query = query.in_(
+                            "device_type", [dt.value for dt in device_types]
+                        )
 
-            # Execute emergency stop on each device
-            stopped_devices = []
-            failed_devices = []
+                    result = await query.execute()
+                    devices = result.data or []
 
+                    ha_client = self.ha_clients.get(user_id)
+                    if ha_client is None and devices:
+                        ha_client = await self._get_ha_client(user_id)
+            except TimeoutError:
+                logger.error(
+                    f"Emergency stop for user {user_id} exceeded its deadline "
+                    "before any device was stopped"
+                )
+                return {
+                    "success": False,
+                    "error": "Deadline exceeded",
+                    "stopped_devices": [],
+                    "failed_devices": [],
+                    "total_devices": 0,
+                    "deadline_exceeded": True,
+                }
+
+            by_domain: dict[str, list[str]] = {}
             for device in devices:
                 entity_id = device["home_assistant_entity_id"]
+                by_domain.setdefault(entity_id.split(".")[0], []).append(entity_id)
+
+            stopped_devices: list[str] = []
+            failed_devices: list[dict] = []
+            finished: set[str] = set()
+            # Previous states come from the client's mirror, not a round trip
+            previous_states = {
+                entity_id: (ha_client.get_cached_entity(entity_id) or {}).get("state")
+                for entity_ids in by_domain.values()
+                for entity_id in entity_ids
+            }
+
+            async def stop_domain(domain: str, entity_ids: list[str]) -> None:
                 try:
-                    control_result = await self.control_device(
-                        user_id, entity_id, {"type": "turn_off"}
+                    await ha_client.call_service(
+                        domain,
+                        "turn_off",
+                        entity_id=entity_ids,
+                        priority=RequestPriority.CRITICAL,
                     )
-                    if control_result["success"]:
-                        stopped_devices.append(entity_id)
-                    else:
-                        failed_devices.append(
-                            {
-                                "entity_id": entity_id,
-                                "error": control_result.get("error", "Unknown error"),
-                            }
-                        )
+                    stopped, failed = entity_ids, []
                 except Exception as e:
-                    failed_devices.append({"entity_id": entity_id, "error": str(e)})
+                    stopped = []
+                    failed = [
+                        {"entity_id": entity_id, "error": str(e)}
+                        for entity_id in entity_ids
+                    ]
+                finished.add(domain)
+                stopped_devices.extend(stopped)
+                failed_devices.extend(failed)
+                await self._report_emergency_stop(user_id, domain, stopped, failed)
+
+            tasks = {
+                asyncio.create_task(stop_domain(domain, entity_ids)): (
+                    domain,
+                    entity_ids,
+                )
+                for domain, entity_ids in by_domain.items()
+            }
+            timed_out = False
+            if tasks:
+                _, pending = await asyncio.wait(
+                    tasks, timeout=max(0.0, expires_at - loop.time())
+                )
+                for task in pending:
+                    task.cancel()
+                unfinished = [
+                    tasks[task] for task in pending if tasks[task][0] not in finished
+                ]
+                for domain, entity_ids in unfinished:
+                    failed = [
+                        {"entity_id": entity_id, "error": "Deadline exceeded"}
+                        for entity_id in entity_ids
+                    ]
+                    failed_devices.extend(failed)
+                    await self._report_emergency_stop(user_id, domain, [], failed)
+                timed_out = bool(unfinished)
 
             # Send emergency stop notification
             await self.send_to_user(
@@ -529,16 +767,25 @@ class DeviceMonitoringService:
                         "stopped_devices": stopped_devices,
                         "failed_devices": failed_devices,
                         "total_devices": len(devices),
+                        "deadline_exceeded": timed_out,
                     },
                     "timestamp": datetime.now(timezone.utc).isoformat(),
                 },
             )
 
+            # Audit log written after the stop, off the critical path
+            self._run_in_background(
+                self._log_emergency_stop(
+                    user_id, previous_states, stopped_devices, failed_devices
+                )
+            )
+
             return {
                 "success": True,
                 "stopped_devices": stopped_devices,
                 "failed_devices": failed_devices,
                 "total_devices": len(devices),
+                "deadline_exceeded": timed_out,
             }
 
         except Exception as e:
@@ -550,3 +797,66 @@ class DeviceMonitoringService:
                 "failed_devices": [],
                 "total_devices": 0,
             }
+
+    async def _report_emergency_stop(
+        self, user_id: str, domain: str, stopped: list[str], failed: list[dict]
+    ) -> None:
+        """Send the outcome of one domain group of an emergency stop"""
+        await self.send_to_user(
+            user_id,
+            {
+                "type": "emergency_stop_progress",
+                "data": {
+                    "domain": domain,
+                    "stopped_devices": stopped,
+                    "failed_devices": failed,
+                },
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            },
+        )
+
+    async def _log_emergency_stop(
+        self,
+        user_id: str,
+        previous_states: dict[str, str | None],
+        stopped_devices: list[str],
+        failed_devices: list[dict],
+    ) -> None:
+        """Record the control history of every device of an emergency stop"""
+        outcomes = [(entity_id, True, None) for entity_id in stopped_devices]
+        outcomes += [(f["entity_id"], False, f["error"]) for f in failed_devices]
+        await asyncio.gather(
+            *(
+                self.log_device_control(
+                    user_id=user_id,
+                    entity_id=entity_id,
+                    action_type="turn_off",
+                    previous_state=previous_states.get(entity_id),
+                    new_state="off" if success else None,
+                    success=success,
+                    error_message=error,
+                )
+                for entity_id, success, error in outcomes
+            )
+        )
+
+
+# Global instance: WebSockets and monitoring leadership live per worker
+_device_monitoring_service: DeviceMonitoringService | None = None
+
+
+async def get_device_monitoring_service() -> DeviceMonitoringService:
+    """Get the global device monitoring service instance"""
+    global _device_monitoring_service
+    if _device_monitoring_service is None:
+        _device_monitoring_service = DeviceMonitoringService(DatabaseService())
+        await _device_monitoring_service.start()
+    return _device_monitoring_service
+
+
+async def shutdown_device_monitoring_service() -> None:
+    """Close device WebSockets and hand off monitoring on shutdown"""
+    global _device_monitoring_service
+    if _device_monitoring_service:
+        await _device_monitoring_service.stop()
+        _device_monitoring_service = None
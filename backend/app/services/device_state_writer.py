@@ -0,0 +1,169 @@
+"""
+Device State Writer
+
+Write-behind buffer for ``device_states``.
+
+Home Assistant reports state changes far more often than anyone reads the
+stored copy, and a chatty sensor can change several times a second. Rather
+than one ``update_device_state`` RPC per event, changes are buffered keyed
+by (user, entity) so only the latest state of each entity is kept, and the
+buffer is written with a single ``update_device_states`` call once it holds
+``flush_size`` entities or ``flush_interval`` seconds after the first change
+arrived. Closing the writer flushes whatever is still buffered.
+
+Batches go through DatabaseService's asyncpg pool when a direct database
+connection is configured, and through the PostgREST RPC otherwise.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from typing import Any
+
+from app.db.supabase_client import get_shared_async_supabase_client
+from app.services.database_service import get_database
+
+logger = logging.getLogger(__name__)
+
+# (user_id, entity_id)
+StateKey = tuple[str, str]
+
+
+class DeviceStateWriter:
+    """Coalesces device state changes and writes them in batches"""
+
+    def __init__(
+        self,
+        flush_size: int = 500,
+        flush_interval: float = 1.0,
+        database_factory: Callable[[], Awaitable[Any]] = get_database,
+        supabase_factory: Callable[[], Awaitable[Any]] = (
+            get_shared_async_supabase_client
+        ),
+    ) -> None:
+        """
+        Args:
+            flush_size: Buffered entities that trigger an immediate flush
+            flush_interval: Maximum seconds a change waits to be flushed
+            database_factory: Returns the DatabaseService (or None)
+            supabase_factory: Returns the async Supabase service client
+        """
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._get_database = database_factory
+        self._get_supabase = supabase_factory
+        self._pending: dict[StateKey, dict[str, Any]] = {}
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+        self._closing = False
+
+    @property
+    def buffered(self) -> int:
+        """Entities waiting for the next flush"""
+        return len(self._pending)
+
+    def record(
+        self, user_id: str, entity_id: str, state: str, attributes: dict
+    ) -> None:
+        """
+        Buffer the latest state of an entity for the next batch.
+
+        A newer change of the same entity replaces the buffered one.
+        """
+        self._pending[(user_id, entity_id)] = {
+            "user_id": user_id,
+            "entity_id": entity_id,
+            "state": state,
+            "attributes": attributes or {},
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if len(self._pending) >= self.flush_size:
+            self._start_flush()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._start_flush
+            )
+
+    def _start_flush(self) -> None:
+        """Detach the buffered states and write them in the background"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+        task = asyncio.create_task(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: dict[StateKey, dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        try:
+            await self._write(list(batch.values()))
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} device states: {e}")
+            if self._closing:
+                return
+            # Retry with the next batch, unless a newer state arrived since;
+            # update_device_states ignores states older than the stored row
+            for key, entry in batch.items():
+                self._pending.setdefault(key, entry)
+            if self._flush_timer is None:
+                self._flush_timer = asyncio.get_running_loop().call_later(
+                    self.flush_interval, self._start_flush
+                )
+            return
+
+        logger.debug(
+            f"Wrote {len(batch)} device states in "
+            f"{(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+
+    async def _write(self, states: list[dict[str, Any]]) -> None:
+        """Upsert states with one update_device_states call"""
+        database = await self._get_database()
+        if database is not None and database.is_available:
+            await database.execute(
+                "SELECT public.update_device_states($1::jsonb)", json.dumps(states)
+            )
+            return
+
+        client = await self._get_supabase()
+        await client.rpc("update_device_states", {"p_states": states}).execute()
+
+    async def close(self) -> None:
+        """Flush buffered states and wait for in-flight writes"""
+        self._closing = True
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+# Global writer instance (one buffer per worker)
+_device_state_writer: DeviceStateWriter | None = None
+
+
+def get_device_state_writer() -> DeviceStateWriter:
+    """Get device state writer instance"""
+    global _device_state_writer
+    if _device_state_writer is None:
+        from app.core.config import get_settings
+
+        settings = get_settings()
+        _device_state_writer = DeviceStateWriter(
+            flush_size=settings.DEVICE_STATE_FLUSH_SIZE,
+            flush_interval=settings.DEVICE_STATE_FLUSH_INTERVAL_SECONDS,
+        )
+    return _device_state_writer
+
+
+async def close_device_state_writer() -> None:
+    """Flush and release the device state writer, if it was created"""
+    global _device_state_writer
+    if _device_state_writer is not None:
+        await _device_state_writer.close()
+        _device_state_writer = None
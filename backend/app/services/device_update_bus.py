@@ -0,0 +1,139 @@
+"""
+Device Update Bus
+
+Broadcasts device updates between API workers.
+
+Browser sockets of one user may be spread over several uvicorn workers,
+while only one of them monitors the user's Home Assistant devices. Updates
+published on any worker are delivered to that worker's own sockets right
+away and sent to the other workers with Postgres NOTIFY; every worker
+LISTENs and hands received updates to its local sockets.
+
+Which worker monitors a user is decided with a Postgres advisory lock, so
+exactly one worker publishes per Home Assistant session and another takes
+over when it stops or dies. Without a direct database connection the bus
+runs in single-worker mode: updates are delivered locally only and this
+worker always leads.
+"""
+
+import json
+import logging
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.services.database_service import get_database
+
+logger = logging.getLogger(__name__)
+
+DEVICE_UPDATES_CHANNEL = "device_updates"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD_BYTES = 7900
+
+
+def _leader_lock_name(user_id: str) -> str:
+    return f"device-monitor:{user_id}"
+
+
+class DeviceUpdateBus:
+    """Cross-worker delivery of device updates and monitoring leadership"""
+
+    def __init__(
+        self,
+        deliver: Callable[[str, dict[str, Any]], None],
+        database_factory: Callable[[], Awaitable[Any]] = get_database,
+    ) -> None:
+        """
+        Args:
+            deliver: Hands a (user_id, message) to this worker's sockets
+            database_factory: Returns the DatabaseService (or None)
+        """
+        self.deliver = deliver
+        self.worker_id = uuid.uuid4().hex
+        self._get_database = database_factory
+        self._database: Any = None
+        self._started = False
+
+    @property
+    def distributed(self) -> bool:
+        """Whether updates are shared with other workers"""
+        return self._database is not None
+
+    async def start(self) -> None:
+        """Listen for updates published by other workers"""
+        if self._started:
+            return
+        self._started = True
+
+        database = await self._get_database()
+        if database is None or not database.is_available:
+            logger.info("Device update bus running in single-worker mode")
+            return
+        try:
+            await database.listen(DEVICE_UPDATES_CHANNEL, self._on_notification)
+        except Exception as e:
+            logger.error(f"Device update bus could not listen, staying local: {e}")
+            return
+        self._database = database
+
+    async def publish(self, user_id: str, message: dict[str, Any]) -> None:
+        """Deliver a message to the user's sockets on every worker"""
+        self.deliver(user_id, message)
+        if self._database is None:
+            return
+
+        payload = json.dumps(
+            {"origin": self.worker_id, "user_id": user_id, "message": message}
+        )
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD_BYTES:
+            logger.warning(
+                f"Device update for user {user_id} too large to broadcast, "
+                "delivered to this worker only"
+            )
+            return
+        try:
+            await self._database.notify(DEVICE_UPDATES_CHANNEL, payload)
+        except Exception as e:
+            logger.error(f"Failed to broadcast device update: {e}")
+
+    async def try_lead(self, user_id: str) -> bool:
+        """
+        Try to become the worker monitoring a user's devices.
+
+        Returns:
+            True if this worker now leads and should monitor and publish
+        """
+        if self._database is None:
+            return True
+        try:
+            return await self._database.try_advisory_lock(_leader_lock_name(user_id))
+        except Exception as e:
+            logger.error(f"Device monitor election failed for user {user_id}: {e}")
+            return False
+
+    def holds_lead(self, user_id: str) -> bool:
+        """Whether this worker still holds the lock for a user it leads"""
+        if self._database is None:
+            return True
+        # The lock is released when the session connection drops
+        return self._database.holds_advisory_lock(_leader_lock_name(user_id))
+
+    async def resign(self, user_id: str) -> None:
+        """Give up leadership of a user, letting another worker take over"""
+        if self._database is None:
+            return
+        try:
+            await self._database.advisory_unlock(_leader_lock_name(user_id))
+        except Exception as e:
+            logger.warning(f"Failed to release device monitor lock: {e}")
+
+    def _on_notification(self, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed device update notification")
+            return
+        # Updates published here were already delivered locally
+        if data.get("origin") == self.worker_id:
+            return
+        self.deliver(data["user_id"], data["message"])
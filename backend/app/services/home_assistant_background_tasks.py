@@ -1,14 +1,27 @@
 import asyncio
+import json
 import logging
-from datetime import datetime, timedelta
+import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
+from app.db.supabase_client import get_shared_async_supabase_client
+
+from .database_service import get_database
+from .home_assistant_client import HomeAssistantClient
+
 # Updated imports for Supabase-based background processing
 from .supabase_background_service import SupabaseBackgroundService
 from .user_home_assistant_service import UserHomeAssistantService
 
 logger = logging.getLogger(__name__)
 
+# Number of history states written to device_history per batch
+HISTORY_WRITE_BATCH_SIZE = 5000
+
+# Columns written per history state, in COPY order
+DEVICE_HISTORY_COLUMNS = ["user_id", "entity_id", "state", "attributes", "recorded_at"]
+
 # Initialize Supabase background service
 supabase_bg_service = SupabaseBackgroundService()
 
@@ -347,6 +360,9 @@ async def collect_device_history(
     """
     Background task to collect historical data for devices
 
+    History of all entities is fetched with one Home Assistant request,
+    parsed as it streams in, and written to device_history in batches.
+
     Args:
         user_id: User ID
         ha_config: Home Assistant configuration
@@ -354,56 +370,105 @@ async def collect_device_history(
         hours_back: How many hours of history to collect
 
     Returns:
-        Dict containing historical data
+        Dict containing the number of states collected per entity
     """
     logger.info(
         f"Collecting device history for user {user_id}, {len(entity_ids)} entities, {hours_back}h back"
     )
 
-    try:
-        ha_service = UserHomeAssistantService(user_id, ha_config)
+    client = HomeAssistantClient(
+        base_url=ha_config["url"],
+        access_token=ha_config.get("access_token") or ha_config.get("token"),
+        cloudflare_client_id=ha_config.get("cloudflare_client_id"),
+        cloudflare_client_secret=ha_config.get("cloudflare_client_secret"),
+    )
 
+    try:
         # Calculate time range
-        end_time = datetime.utcnow()
+        end_time = datetime.now(timezone.utc)
         start_time = end_time - timedelta(hours=hours_back)
 
-        # Collect history for each entity
-        history_data = {}
-        failed_entities = []
+        collected = dict.fromkeys(entity_ids, 0)
+        batch: list[dict[str, Any]] = []
 
-        for entity_id in entity_ids:
-            try:
-                history = await ha_service.get_entity_history(
-                    entity_id=entity_id, start_time=start_time, end_time=end_time
-                )
-                history_data[entity_id] = history
-            except Exception as e:
-                logger.warning(f"Failed to get history for {entity_id}: {e}")
-                failed_entities.append(entity_id)
+        async for entity_id, state in client.iter_history(
+            entity_ids, start_time, end_time
+        ):
+            batch.append(
+                {
+                    "user_id": user_id,
+                    "entity_id": entity_id,
+                    "state": state.get("state"),
+                    "attributes": state.get("attributes"),
+                    "recorded_at": state.get("last_updated")
+                    or state.get("last_changed"),
+                }
+            )
+            collected[entity_id] = collected.get(entity_id, 0) + 1
+            if len(batch) >= HISTORY_WRITE_BATCH_SIZE:
+                await _write_device_history(batch)
+                batch = []
 
+        if batch:
+            await _write_device_history(batch)
+
+        empty_entities = [
+            entity_id for entity_id, count in collected.items() if count == 0
+        ]
         result = {
             "user_id": user_id,
-            "collected_at": datetime.utcnow().isoformat(),
+            "collected_at": datetime.now(timezone.utc).isoformat(),
             "time_range": {
                 "start": start_time.isoformat(),
                 "end": end_time.isoformat(),
                 "hours": hours_back,
             },
             "total_entities": len(entity_ids),
-            "successful_collections": len(history_data),
-            "failed_collections": len(failed_entities),
-            "history_data": history_data,
-            "failed_entities": failed_entities,
+            "successful_collections": len(entity_ids) - len(empty_entities),
+            "failed_collections": len(empty_entities),
+            "states_collected": collected,
+            "failed_entities": empty_entities,
         }
 
         logger.info(
-            f"History collection completed for user {user_id}: {len(history_data)} successful, {len(failed_entities)} failed"
+            f"History collection completed for user {user_id}: "
+            f"{sum(collected.values())} states, {len(empty_entities)} entities without history"
         )
         return result
 
     except Exception as e:
         logger.error(f"History collection failed for user {user_id}: {e}")
         raise
+    finally:
+        await client.close()
+
+
+async def _write_device_history(rows: list[dict[str, Any]]) -> None:
+    """Write history rows with COPY, or a multi-row insert as a fallback"""
+    database = await get_database()
+    if database is not None and database.is_available:
+        await database.copy_records_to_table(
+            "device_history",
+            records=[
+                (
+                    uuid.UUID(row["user_id"]),
+                    row["entity_id"],
+                    row["state"],
+                    (
+                        json.dumps(row["attributes"])
+                        if row["attributes"] is not None
+                        else None
+                    ),
+                    datetime.fromisoformat(row["recorded_at"]),
+                )
+                for row in rows
+            ],
+            columns=DEVICE_HISTORY_COLUMNS,
+        )
+        return
+
+    client = await get_shared_async_supabase_client()
+    await client.table("device_history").insert(rows, returning="minimal").execute()
 
 
 # Scheduling functions - now use Supabase queues
@@ -9,14 +9,17 @@ and real-time updates with enhanced error handling and recovery.
 import asyncio
 import json
 import logging
-from collections.abc import Callable
-from datetime import datetime
+import re
+from collections.abc import AsyncIterator, Callable, Iterable
+from datetime import datetime, timezone
+from typing import Any
 
 import aiohttp
 import websockets
-from asyncio_throttle import Throttler
 from websockets.exceptions import ConnectionClosed, WebSocketException
 
+from app.core.config import get_settings
+
 from .error_handling import (
     CircuitBreakerConfig,
     ErrorType,
@@ -24,6 +27,12 @@ from .error_handling import (
     RetryConfig,
     global_error_handler,
 )
+from .home_assistant_rate_limiter import RequestPriority, get_rate_limiter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +49,14 @@ class ConnectionError(HomeAssistantClientError):
     """Raised when connection to Home Assistant fails"""
 
 
+class CommandError(HomeAssistantClientError):
+    """Raised when Home Assistant rejects a WebSocket command"""
+
+
+# Returned by _send_command_or_fallback when a call should go over REST
+_USE_REST = object()
+
+
 class HomeAssistantClient:
     """
     Home Assistant client with WebSocket and REST API support.
@@ -109,18 +126,31 @@ class HomeAssistantClient:
         self.message_id = 1
         self.subscribers: dict[str, list[Callable]] = {}
 
-        # Rate limiting
-        self.throttler = Throttler(rate_limit=10, period=1)  # 10 requests per second
+        # WebSocket commands awaiting their result, by message id
+        self._pending_commands: dict[int, asyncio.Future] = {}
+        self.command_timeout = get_settings().HA_WS_COMMAND_TIMEOUT_SECONDS
+
+        # Adaptive REST rate limit, shared by all clients of this host
+        self.rate_limiter = get_rate_limiter(self.base_url)
 
-        # Entity state cache
+        # Entity state mirror, seeded by the initial subscribe_entities event
+        # and kept current from its diffs while states_synced is set. Only
+        # watched entities are subscribed to; None watches every entity
         self.entity_cache: dict[str, dict] = {}
         self.cache_timestamps: dict[str, datetime] = {}
+        self.states_synced = False
+        self.watched_entities: set[str] | None = None
+        self.state_change_callbacks: list[Callable] = []
+        # Bumped on mirror changes callbacks do not see (snapshots, removals)
+        self.mirror_generation = 0
+        self._entity_subscriptions: dict[int, set[str] | None] = {}
+        self._pending_snapshots: set[int] = set()
 
         # Background tasks
         self.background_tasks: list[asyncio.Task] = []
         self.connection_task: asyncio.Task | None = None
 
-        # HTTP session
+        # Pooled HTTP session, shared by all REST calls and closed in close()
         self.session: aiohttp.ClientSession | None = None
 
         # Enhanced error handling setup
@@ -188,20 +218,11 @@ class HomeAssistantClient:
     async def initialize(self) -> None:
         """Initialize the client and establish connections"""
         try:
-            # Create HTTP session
-            connector = aiohttp.TCPConnector(limit=100)
-            timeout = aiohttp.ClientTimeout(total=30)
-            self.session = aiohttp.ClientSession(
-                headers=self.headers, connector=connector, timeout=timeout
-            )
-
             # Test authentication with enhanced error handling
             await self._test_authentication_with_retry()
 
             # Start WebSocket connection
-            self.connection_task = asyncio.create_task(
-                self._maintain_websocket_connection()
-            )
+            self.start_websocket()
 
             logger.info("Home Assistant client initialized successfully")
 
@@ -240,14 +261,53 @@ class HomeAssistantClient:
             self.session = None
 
         self.connected = False
+        self.states_synced = False
         logger.info("Home Assistant client closed")
 
+    def start_websocket(self) -> None:
+        """
+        Start maintaining the WebSocket connection in the background.
+
+        Once connected, entity reads are served from the state mirror instead
+        of REST. Calling this again while the connection task runs is a no-op.
+        """
+        if self.connection_task is None or self.connection_task.done():
+            self.connection_task = asyncio.create_task(
+                self._maintain_websocket_connection()
+            )
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the pooled HTTP session, creating it on first use.
+
+        Connections to Home Assistant are kept alive and reused across REST
+        calls, so DNS, TCP and TLS setup is paid once per connection rather
+        than once per request.
+        """
+        if self.session is None or self.session.closed:
+            settings = get_settings()
+            connector = aiohttp.TCPConnector(
+                limit=settings.HA_HTTP_POOL_LIMIT,
+                limit_per_host=settings.HA_HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=settings.HA_HTTP_KEEPALIVE_SECONDS,
+                ttl_dns_cache=settings.HA_HTTP_DNS_CACHE_SECONDS,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=settings.HA_HTTP_TIMEOUT_SECONDS,
+                connect=settings.HA_HTTP_CONNECT_TIMEOUT_SECONDS,
+            )
+            self.session = aiohttp.ClientSession(
+                headers=self.headers, connector=connector, timeout=timeout
+            )
+        return self.session
+
     async def _test_authentication_with_retry(self):
         """Test authentication with enhanced error handling"""
         service_name = f"ha_rest_{id(self)}"
 
         async def auth_operation():
-            async with self.session.get(f"{self.base_url}/api/") as response:
+            session = await self._get_session()
+            async with session.get(f"{self.base_url}/api/") as response:
                 if response.status == 401:
                     raise AuthenticationError("Invalid access token")
                 elif response.status != 200:
@@ -287,8 +347,9 @@ class HomeAssistantClient:
                         "url": self.websocket_url,
                     },
                 )
-                # If we get here, connection was successful and closed normally
-                break
+                # The connection was closed normally (e.g. Home Assistant
+                # restarted); reconnect so the state mirror is reseeded
+                await asyncio.sleep(self.retry_delay)
 
             except HomeAssistantError as e:
                 if e.error_type == ErrorType.AUTHENTICATION_ERROR:
@@ -365,15 +426,15 @@ class HomeAssistantClient:
             self.connected = True
             logger.info("WebSocket connected and authenticated successfully")
 
-            # Subscribe to state changes
+            # Subscribe to state changes; the first event seeds the mirror
             await self._subscribe_to_state_changes()
 
             # Handle incoming messages
             async for message in self.websocket:
                 try:
-                    data = json.loads(message)
+                    data = _loads(message)
                     await self._handle_websocket_message(data)
-                except json.JSONDecodeError:
+                except ValueError:
                     logger.warning(f"Received invalid JSON message: {message}")
                 except Exception as e:
                     logger.error(f"Error handling WebSocket message: {e}")
@@ -386,122 +447,431 @@ class HomeAssistantClient:
             logger.error(f"WebSocket connection error: {e}")
             self.connected = False
             raise
+        finally:
+            # Events may be missed while disconnected, so reads fall back to
+            # REST until the mirror is reseeded
+            self.connected = False
+            self.states_synced = False
+            self._fail_pending_commands(ConnectionError("WebSocket connection lost"))
 
     async def _subscribe_to_state_changes(self) -> None:
-        """Subscribe to entity state changes via WebSocket"""
-        subscribe_message = {
-            "id": self.message_id,
-            "type": "subscribe_events",
-            "event_type": "state_changed",
-        }
+        """Subscribe to state changes of the watched entities via WebSocket"""
+        self._entity_subscriptions.clear()
+        self._pending_snapshots.clear()
 
-        await self.websocket.send(json.dumps(subscribe_message))
+        if self.watched_entities is None or self.watched_entities:
+            await self._subscribe_entities(self.watched_entities)
+        else:
+            # Nothing to watch yet, so the (empty) mirror is complete
+            self.states_synced = True
+
+        logger.info(
+            "Subscribed to state changes of "
+            + (
+                "all entities"
+                if self.watched_entities is None
+                else f"{len(self.watched_entities)} entities"
+            )
+        )
+
+    async def _subscribe_entities(self, entity_ids: set[str] | None) -> None:
+        """
+        Send a subscribe_entities command.
+
+        Home Assistant answers with one event holding the current state of the
+        entities, then sends compressed diffs for those entities only.
+        """
+        subscription_id = self.message_id
         self.message_id += 1
+        message: dict[str, Any] = {"id": subscription_id, "type": "subscribe_entities"}
+        if entity_ids is not None:
+            message["entity_ids"] = sorted(entity_ids)
+
+        self._entity_subscriptions[subscription_id] = entity_ids
+        self._pending_snapshots.add(subscription_id)
+        self.states_synced = False
+        await self.websocket.send(json.dumps(message))
+
+    async def _unsubscribe_entities(self, subscription_ids: list[int]) -> None:
+        """Cancel subscribe_entities subscriptions"""
+        for subscription_id in subscription_ids:
+            self._entity_subscriptions.pop(subscription_id, None)
+            self._pending_snapshots.discard(subscription_id)
+            if self.is_connected():
+                await self.websocket.send(
+                    json.dumps(
+                        {
+                            "id": self.message_id,
+                            "type": "unsubscribe_events",
+                            "subscription": subscription_id,
+                        }
+                    )
+                )
+                self.message_id += 1
 
-        logger.info("Subscribed to state change events")
+        self.states_synced = self.is_connected() and not self._pending_snapshots
+
+    async def watch_entities(self, entity_ids: Iterable[str]) -> None:
+        """
+        Add entities to the watched set.
+
+        Only watched entities are mirrored and reported to state change
+        callbacks. While connected, newly watched entities get their own
+        subscription; existing subscriptions are left in place.
+
+        Args:
+            entity_ids: Entity IDs to watch
+        """
+        if self.watched_entities is None:
+            # Switch from every entity to an explicit set
+            self.watched_entities = set()
+            await self._unsubscribe_entities(list(self._entity_subscriptions))
+            self.entity_cache.clear()
+            self.cache_timestamps.clear()
+
+        added = set(entity_ids) - self.watched_entities
+        if not added:
+            return
+
+        self.watched_entities |= added
+        if self.is_connected():
+            await self._subscribe_entities(added)
+        logger.debug(f"Watching {len(added)} more entities")
+
+    async def unwatch_entities(self, entity_ids: Iterable[str]) -> None:
+        """
+        Remove entities from the watched set.
+
+        Subscriptions left without any watched entity are cancelled.
+
+        Args:
+            entity_ids: Entity IDs to stop watching
+        """
+        if self.watched_entities is None:
+            return
+
+        removed = set(entity_ids) & self.watched_entities
+        if not removed:
+            return
+
+        self.watched_entities -= removed
+        for entity_id in removed:
+            self.entity_cache.pop(entity_id, None)
+            self.cache_timestamps.pop(entity_id, None)
+
+        await self._unsubscribe_entities(
+            [
+                subscription_id
+                for subscription_id, subscribed in self._entity_subscriptions.items()
+                if subscribed is not None and not subscribed & self.watched_entities
+            ]
+        )
+        logger.debug(f"Stopped watching {len(removed)} entities")
+
+    def _is_watched(self, entity_id: str) -> bool:
+        return self.watched_entities is None or entity_id in self.watched_entities
 
     async def _handle_websocket_message(self, data: dict) -> None:
         """Handle incoming WebSocket messages"""
         message_type = data.get("type")
 
         if message_type == "event":
-            await self._handle_state_change_event(data)
+            subscription_id = data.get("id")
+            if subscription_id in self._entity_subscriptions:
+                await self._handle_entities_event(
+                    subscription_id, data.get("event", {})
+                )
+            else:
+                await self._handle_state_change_event(data)
         elif message_type == "result":
             await self._handle_command_result(data)
+        elif message_type == "pong":
+            future = self._pending_commands.get(data.get("id"))
+            if future is not None and not future.done():
+                future.set_result(None)
         else:
             logger.debug(f"Received unhandled message type: {message_type}")
 
+    async def _handle_entities_event(self, subscription_id: int, event: dict) -> None:
+        """Apply a subscribe_entities event (added, changed, removed) to the mirror"""
+        try:
+            # The first event of a subscription is its state snapshot
+            snapshot = subscription_id in self._pending_snapshots
+
+            for entity_id, compressed in event.get("a", {}).items():
+                if self._is_watched(entity_id):
+                    await self._apply_state(
+                        entity_id,
+                        _expand_state(entity_id, compressed),
+                        notify=not snapshot,
+                    )
+
+            for entity_id, diff in event.get("c", {}).items():
+                current = self.entity_cache.get(entity_id)
+                if current is not None and self._is_watched(entity_id):
+                    await self._apply_state(entity_id, _apply_state_diff(current, diff))
+
+            for entity_id in event.get("r", []):
+                await self._apply_state(entity_id, None)
+
+            if snapshot:
+                self._pending_snapshots.discard(subscription_id)
+                self.states_synced = not self._pending_snapshots
+                self.mirror_generation += 1
+                logger.info(
+                    f"Seeded entity state mirror with {len(event.get('a', {}))} "
+                    f"entities (subscription {subscription_id})"
+                )
+
+        except Exception as e:
+            logger.error(f"Error handling entities event: {e}")
+
+    async def _apply_state(
+        self, entity_id: str, new_state: dict | None, notify: bool = True
+    ) -> None:
+        """Store an entity's new state and notify subscribers"""
+        old_state = self.entity_cache.get(entity_id)
+
+        if not new_state:
+            # Entity was removed from Home Assistant
+            self.entity_cache.pop(entity_id, None)
+            self.cache_timestamps.pop(entity_id, None)
+            self.mirror_generation += 1
+            return
+
+        # Update cache
+        self.entity_cache[entity_id] = new_state
+        self.cache_timestamps[entity_id] = datetime.now()
+
+        if not notify:
+            return
+
+        # Notify subscribers
+        for callback in self.subscribers.get(entity_id, []):
+            try:
+                await callback(entity_id, new_state)
+            except Exception as e:
+                logger.error(f"Error in state change callback: {e}")
+
+        for callback in self.state_change_callbacks:
+            try:
+                result = callback(entity_id, old_state, new_state)
+                # Callbacks may hand work off to tasks; only coroutines are awaited
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Error in state change callback: {e}")
+
+        logger.debug(f"Updated state for {entity_id}: {new_state.get('state')}")
+
     async def _handle_state_change_event(self, data: dict) -> None:
-        """Handle state change events from WebSocket"""
+        """Handle state_changed events from WebSocket"""
         try:
             event_data = data.get("event", {})
             entity_id = event_data.get("data", {}).get("entity_id")
             new_state = event_data.get("data", {}).get("new_state")
 
-            if entity_id and new_state:
-                # Update cache
-                self.entity_cache[entity_id] = new_state
-                self.cache_timestamps[entity_id] = datetime.now()
-
-                # Notify subscribers
-                for callback in self.subscribers.get(entity_id, []):
-                    try:
-                        await callback(entity_id, new_state)
-                    except Exception as e:
-                        logger.error(f"Error in state change callback: {e}")
-
-                logger.debug(f"Updated state for {entity_id}: {new_state.get('state')}")
+            if entity_id and self._is_watched(entity_id):
+                await self._apply_state(entity_id, new_state)
 
         except Exception as e:
             logger.error(f"Error handling state change event: {e}")
 
+    async def send_command(
+        self, command_type: str, timeout: float | None = None, **payload: Any
+    ) -> Any:
+        """
+        Send a command over the WebSocket and wait for its result.
+
+        Commands share the socket and are matched to their results by message
+        id, so many can be in flight at once. They are not rate limited.
+
+        Args:
+            command_type: Command type (e.g. 'call_service', 'get_states')
+            timeout: Seconds to wait for the result (defaults to
+                HA_WS_COMMAND_TIMEOUT_SECONDS)
+            **payload: Command fields
+
+        Returns:
+            The command's result
+
+        Raises:
+            ConnectionError: If the WebSocket is not connected or is lost
+            CommandError: If Home Assistant rejects the command
+            asyncio.TimeoutError: If no result arrives in time
+        """
+        if not self.is_connected():
+            raise ConnectionError("WebSocket not connected")
+
+        message_id = self.message_id
+        self.message_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending_commands[message_id] = future
+        try:
+            await self.websocket.send(
+                json.dumps({"id": message_id, "type": command_type, **payload})
+            )
+            return await asyncio.wait_for(future, timeout or self.command_timeout)
+        finally:
+            self._pending_commands.pop(message_id, None)
+
+    async def _send_command_or_fallback(
+        self, command_type: str, retry_on_timeout: bool = True, **payload: Any
+    ) -> Any:
+        """
+        Send a WebSocket command, or return _USE_REST when REST should be used.
+
+        REST is used when the socket is unavailable and, for commands that
+        are safe to repeat, when the command times out.
+        """
+        if not self.is_connected():
+            return _USE_REST
+        try:
+            return await self.send_command(command_type, **payload)
+        except ConnectionError as e:
+            logger.warning(f"WebSocket {command_type} failed, using REST: {e}")
+            return _USE_REST
+        except asyncio.TimeoutError:
+            if not retry_on_timeout:
+                raise
+            logger.warning(f"WebSocket {command_type} timed out, using REST")
+            return _USE_REST
+
+    def _fail_pending_commands(self, error: Exception) -> None:
+        """Fail all commands awaiting a result"""
+        for future in self._pending_commands.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending_commands.clear()
+
     async def _handle_command_result(self, data: dict) -> None:
         """Handle command results from WebSocket"""
         success = data.get("success", False)
         message_id = data.get("id")
 
+        future = self._pending_commands.get(message_id)
+        if future is not None:
+            if future.done():
+                return
+            if success:
+                future.set_result(data.get("result"))
+            else:
+                error = data.get("error", {})
+                future.set_exception(
+                    CommandError(
+                        f"{error.get('code', 'unknown_error')}: "
+                        f"{error.get('message', 'Unknown error')}"
+                    )
+                )
+            return
+
         if success:
             logger.debug(f"Command {message_id} completed successfully")
         else:
             error = data.get("error", {})
+            if message_id in self._pending_snapshots:
+                # No snapshot will arrive, so reads keep falling back to REST
+                logger.warning("Entity subscription failed, using REST for states")
             logger.warning(
                 f"Command {message_id} failed: {error.get('message', 'Unknown error')}"
             )
 
+    async def ping(self) -> None:
+        """
+        Check that Home Assistant is reachable and accepts the token.
+
+        Sends a WebSocket ping when connected, otherwise requests /api/;
+        neither transfers any entity data.
+
+        Raises:
+            AuthenticationError: If the access token is rejected
+            ConnectionError: If Home Assistant cannot be reached
+        """
+        if self.is_connected():
+            try:
+                await self.send_command("ping")
+                return
+            except (ConnectionError, asyncio.TimeoutError) as e:
+                logger.warning(f"WebSocket ping failed, using REST: {e}")
+
+        await self._test_authentication_with_retry()
+
     # REST API Methods with enhanced error handling
 
-    async def get_entities(self, entity_type: str | None = None) -> list[dict]:
+    async def get_entities(
+        self,
+        entity_type: str | None = None,
+        priority: RequestPriority = RequestPriority.NORMAL,
+    ) -> list[dict]:
         """
         Get all entities or entities of a specific type with enhanced error handling.
 
+        Served from the WebSocket state mirror when it is synced, otherwise
+        fetched with a WebSocket get_states command or over REST.
+
         Args:
             entity_type: Optional entity type filter (e.g., 'light', 'switch', 'sensor')
+            priority: Rate limiter lane of the REST request
 
         Returns:
             List of entity dictionaries
         """
+        if self.states_synced and self.watched_entities is None:
+            if entity_type:
+                prefix = f"{entity_type}."
+                return [
+                    entity
+                    for entity_id, entity in self.entity_cache.items()
+                    if entity_id.startswith(prefix)
+                ]
+            return list(self.entity_cache.values())
+
+        entities = await self._send_command_or_fallback("get_states")
+        if entities is not _USE_REST:
+            now = datetime.now()
+            for entity in entities:
+                entity_id = entity.get("entity_id")
+                if entity_id:
+                    self.entity_cache[entity_id] = entity
+                    self.cache_timestamps[entity_id] = now
+            if entity_type:
+                prefix = f"{entity_type}."
+                entities = [
+                    entity
+                    for entity in entities
+                    if entity.get("entity_id", "").startswith(prefix)
+                ]
+            return entities
+
         service_name = f"ha_rest_{id(self)}"
 
         async def get_entities_operation():
-            # Create a temporary session if one doesn't exist
-            session_to_use = self.session
-            should_close_session = False
-
-            if session_to_use is None:
-                session_to_use = aiohttp.ClientSession(headers=self.headers)
-                should_close_session = True
-
-            try:
-                async with self.throttler:
-                    async with session_to_use.get(
-                        f"{self.base_url}/api/states"
-                    ) as response:
-                        response.raise_for_status()
-                        entities = await response.json()
-
-                        if entity_type:
-                            entities = [
-                                e
-                                for e in entities
-                                if e.get("entity_id", "").startswith(f"{entity_type}.")
-                            ]
-
-                        # Update cache
-                        for entity in entities:
-                            entity_id = entity.get("entity_id")
-                            if entity_id:
-                                self.entity_cache[entity_id] = entity
-                                self.cache_timestamps[entity_id] = datetime.now()
-
-                        logger.debug(
-                            f"Retrieved {len(entities)} entities"
-                            + (f" of type {entity_type}" if entity_type else "")
-                        )
-                        return entities
-
-            finally:
-                if should_close_session:
-                    await session_to_use.close()
+            session = await self._get_session()
+            async with self.rate_limiter.request(priority) as outcome:
+                async with session.get(f"{self.base_url}/api/states") as response:
+                    outcome.status = response.status
+                    response.raise_for_status()
+                    entities = await response.json()
+
+                    if entity_type:
+                        entities = [
+                            e
+                            for e in entities
+                            if e.get("entity_id", "").startswith(f"{entity_type}.")
+                        ]
+
+                    # Update cache
+                    for entity in entities:
+                        entity_id = entity.get("entity_id")
+                        if entity_id:
+                            self.entity_cache[entity_id] = entity
+                            self.cache_timestamps[entity_id] = datetime.now()
+
+                    logger.debug(
+                        f"Retrieved {len(entities)} entities"
+                        + (f" of type {entity_type}" if entity_type else "")
+                    )
+                    return entities
 
         return await global_error_handler.execute_with_retry(
             service_name,
@@ -513,17 +883,28 @@ class HomeAssistantClient:
             },
         )
 
-    async def get_entity(self, entity_id: str, use_cache: bool = True) -> dict | None:
+    async def get_entity(
+        self,
+        entity_id: str,
+        use_cache: bool = True,
+        priority: RequestPriority = RequestPriority.NORMAL,
+    ) -> dict | None:
         """
         Get a specific entity by ID with enhanced error handling.
 
         Args:
             entity_id: Entity ID to retrieve
-            use_cache: Whether to use cached data if available
+            use_cache: Whether to use the state mirror or cached data if available
+            priority: Rate limiter lane of the REST request
 
         Returns:
             Entity dictionary or None if not found
         """
+        # The synced state mirror holds every watched entity, so a miss means
+        # the entity does not exist
+        if use_cache and self.states_synced and self._is_watched(entity_id):
+            return self.entity_cache.get(entity_id)
+
         # Check cache first if requested
         if use_cache and entity_id in self.entity_cache:
             cache_time = self.cache_timestamps.get(entity_id)
@@ -537,36 +918,25 @@ class HomeAssistantClient:
         service_name = f"ha_rest_{id(self)}"
 
         async def get_entity_operation():
-            # Create a temporary session if one doesn't exist
-            session_to_use = self.session
-            should_close_session = False
-
-            if session_to_use is None:
-                session_to_use = aiohttp.ClientSession(headers=self.headers)
-                should_close_session = True
-
-            try:
-                async with self.throttler:
-                    async with session_to_use.get(
-                        f"{self.base_url}/api/states/{entity_id}"
-                    ) as response:
-                        if response.status == 404:
-                            logger.debug(f"Entity not found: {entity_id}")
-                            return None
-
-                        response.raise_for_status()
-                        entity = await response.json()
-
-                        # Update cache
-                        self.entity_cache[entity_id] = entity
-                        self.cache_timestamps[entity_id] = datetime.now()
-
-                        logger.debug(f"Retrieved entity: {entity_id}")
-                        return entity
-
-            finally:
-                if should_close_session:
-                    await session_to_use.close()
+            session = await self._get_session()
+            async with self.rate_limiter.request(priority) as outcome:
+                async with session.get(
+                    f"{self.base_url}/api/states/{entity_id}"
+                ) as response:
+                    outcome.status = response.status
+                    if response.status == 404:
+                        logger.debug(f"Entity not found: {entity_id}")
+                        return None
+
+                    response.raise_for_status()
+                    entity = await response.json()
+
+                    # Update cache
+                    self.entity_cache[entity_id] = entity
+                    self.cache_timestamps[entity_id] = datetime.now()
+
+                    logger.debug(f"Retrieved entity: {entity_id}")
+                    return entity
 
         try:
             return await global_error_handler.execute_with_retry(
@@ -589,8 +959,9 @@ class HomeAssistantClient:
         self,
         domain: str,
         service: str,
-        entity_id: str | None = None,
+        entity_id: str | list[str] | None = None,
         data: dict | None = None,
+        priority: RequestPriority = RequestPriority.NORMAL,
     ) -> dict:
         """
         Call a Home Assistant service with enhanced error handling.
@@ -598,45 +969,51 @@ class HomeAssistantClient:
         Args:
             domain: Service domain (e.g., 'light', 'switch')
             service: Service name (e.g., 'turn_on', 'turn_off')
-            entity_id: Optional entity ID to target
+            entity_id: Optional entity ID, or list of IDs, to target
             data: Optional service data
+            priority: Rate limiter lane of the REST request; CRITICAL
+                requests are never held back
 
         Returns:
             Service call result
         """
+        # Prepare service call data
+        service_data = dict(data or {})
+        if entity_id:
+            service_data["entity_id"] = entity_id
+
+        # A timed out call may still have run, so it is not repeated over REST
+        result = await self._send_command_or_fallback(
+            "call_service",
+            retry_on_timeout=False,
+            domain=domain,
+            service=service,
+            service_data=service_data,
+        )
+        if result is not _USE_REST:
+            logger.debug(
+                f"Called service {domain}.{service} for {entity_id or 'all entities'}"
+            )
+            return result
+
         service_name = f"ha_rest_{id(self)}"
 
         async def call_service_operation():
-            # Create a temporary session if one doesn't exist
-            session_to_use = self.session
-            should_close_session = False
-
-            if session_to_use is None:
-                session_to_use = aiohttp.ClientSession(headers=self.headers)
-                should_close_session = True
-
-            try:
-                # Prepare service call data
-                service_data = data or {}
-                if entity_id:
-                    service_data["entity_id"] = entity_id
-
-                async with self.throttler:
-                    async with session_to_use.post(
-                        f"{self.base_url}/api/services/{domain}/{service}",
-                        json=service_data,
-                    ) as response:
-                        response.raise_for_status()
-                        result = await response.json()
-
-                        logger.debug(
-                            f"Called service {domain}.{service} for {entity_id or 'all entities'}"
-                        )
-                        return result
-
-            finally:
-                if should_close_session:
-                    await session_to_use.close()
+            session = await self._get_session()
+
+            async with self.rate_limiter.request(priority) as outcome:
+                async with session.post(
+                    f"{self.base_url}/api/services/{domain}/{service}",
+                    json=service_data,
+                ) as response:
+                    outcome.status = response.status
+                    response.raise_for_status()
+                    result = await response.json()
+
+                    logger.debug(
+                        f"Called service {domain}.{service} for {entity_id or 'all entities'}"
+                    )
+                    return result
 
         return await global_error_handler.execute_with_retry(
             service_name,
@@ -651,38 +1028,39 @@ class HomeAssistantClient:
             },
         )
 
-    async def get_services(self) -> dict:
+    async def get_services(
+        self, priority: RequestPriority = RequestPriority.NORMAL
+    ) -> dict:
         """
         Get all available services with enhanced error handling.
 
+        Args:
+            priority: Rate limiter lane of the REST request
+
         Returns:
-            Dictionary of available services
+            Dictionary mapping each domain to its services
         """
+        services = await self._send_command_or_fallback("get_services")
+        if services is not _USE_REST:
+            return services
+
         service_name = f"ha_rest_{id(self)}"
 
         async def get_services_operation():
-            # Create a temporary session if one doesn't exist
-            session_to_use = self.session
-            should_close_session = False
-
-            if session_to_use is None:
-                session_to_use = aiohttp.ClientSession(headers=self.headers)
-                should_close_session = True
-
-            try:
-                async with self.throttler:
-                    async with session_to_use.get(
-                        f"{self.base_url}/api/services"
-                    ) as response:
-                        response.raise_for_status()
-                        services = await response.json()
-
-                        logger.debug(f"Retrieved {len(services)} service domains")
-                        return services
-
-            finally:
-                if should_close_session:
-                    await session_to_use.close()
+            session = await self._get_session()
+            async with self.rate_limiter.request(priority) as outcome:
+                async with session.get(f"{self.base_url}/api/services") as response:
+                    outcome.status = response.status
+                    response.raise_for_status()
+                    # REST lists {"domain", "services"} objects; return the
+                    # same domain mapping as the WebSocket command
+                    services = {
+                        item["domain"]: item["services"]
+                        for item in await response.json()
+                    }
+
+                    logger.debug(f"Retrieved {len(services)} service domains")
+                    return services
 
         return await global_error_handler.execute_with_retry(
             service_name,
@@ -693,38 +1071,34 @@ class HomeAssistantClient:
             },
         )
 
-    async def get_config(self) -> dict:
+    async def get_config(
+        self, priority: RequestPriority = RequestPriority.NORMAL
+    ) -> dict:
         """
         Get Home Assistant configuration with enhanced error handling.
 
+        Args:
+            priority: Rate limiter lane of the REST request
+
         Returns:
             Configuration dictionary
         """
+        config = await self._send_command_or_fallback("get_config")
+        if config is not _USE_REST:
+            return config
+
         service_name = f"ha_rest_{id(self)}"
 
         async def get_config_operation():
-            # Create a temporary session if one doesn't exist
-            session_to_use = self.session
-            should_close_session = False
-
-            if session_to_use is None:
-                session_to_use = aiohttp.ClientSession(headers=self.headers)
-                should_close_session = True
-
-            try:
-                async with self.throttler:
-                    async with session_to_use.get(
-                        f"{self.base_url}/api/config"
-                    ) as response:
-                        response.raise_for_status()
-                        config = await response.json()
-
-                        logger.debug("Retrieved Home Assistant configuration")
-                        return config
+            session = await self._get_session()
+            async with self.rate_limiter.request(priority) as outcome:
+                async with session.get(f"{self.base_url}/api/config") as response:
+                    outcome.status = response.status
+                    response.raise_for_status()
+                    config = await response.json()
 
-            finally:
-                if should_close_session:
-                    await session_to_use.close()
+                    logger.debug("Retrieved Home Assistant configuration")
+                    return config
 
         return await global_error_handler.execute_with_retry(
             service_name,
@@ -732,6 +1106,98 @@ class HomeAssistantClient:
             context={"operation": "get_config", "url": f"{self.base_url}/api/config"},
         )
 
+    async def get_history(
+        self,
+        entity_ids: list[str],
+        start_time: datetime,
+        end_time: datetime | None = None,
+        significant_changes_only: bool = True,
+    ) -> dict[str, list[dict]]:
+        """
+        Get state history of several entities with one recorder query.
+
+        Uses the WebSocket history/history_during_period command with minimal
+        responses: only the first state of each entity carries attributes.
+
+        Args:
+            entity_ids: Entity IDs to fetch history for
+            start_time: Start of the period
+            end_time: End of the period (defaults to now)
+            significant_changes_only: Skip attribute-only changes
+
+        Returns:
+            Compressed states per entity ID ('s' state, 'a' attributes,
+            'lu'/'lc' epoch timestamps)
+        """
+        payload: dict[str, Any] = {
+            "start_time": start_time.isoformat(),
+            "entity_ids": entity_ids,
+            "minimal_response": True,
+            "significant_changes_only": significant_changes_only,
+        }
+        if end_time:
+            payload["end_time"] = end_time.isoformat()
+
+        return await self.send_command("history/history_during_period", **payload)
+
+    async def iter_history(
+        self,
+        entity_ids: list[str],
+        start_time: datetime,
+        end_time: datetime | None = None,
+        significant_changes_only: bool = True,
+        chunk_size: int = 64 * 1024,
+        priority: RequestPriority = RequestPriority.BACKGROUND,
+    ) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Stream state history of several entities from one REST request.
+
+        Calls /api/history/period once for all entities with a minimal
+        response and parses the body incrementally, so memory use does not
+        grow with the length of the period.
+
+        Args:
+            entity_ids: Entity IDs to fetch history for
+            start_time: Start of the period (timezone-aware)
+            end_time: End of the period (defaults to now)
+            significant_changes_only: Skip attribute-only changes
+            chunk_size: Bytes read from the response at a time
+            priority: Rate limiter lane of the request
+
+        Yields:
+            (entity_id, state) pairs in order; only the first state of each
+            entity carries attributes
+        """
+        params = {
+            "filter_entity_id": ",".join(entity_ids),
+            "minimal_response": "",
+            "significant_changes_only": "1" if significant_changes_only else "0",
+        }
+        if end_time:
+            params["end_time"] = end_time.isoformat()
+
+        session = await self._get_session()
+        async with self.rate_limiter.request(priority) as outcome:
+            response = await session.get(
+                f"{self.base_url}/api/history/period/{start_time.isoformat()}",
+                params=params,
+                timeout=aiohttp.ClientTimeout(total=None, sock_read=60),
+            )
+            # Only the response headers are timed, not the streamed body
+            outcome.status = response.status
+
+        async with response:
+            response.raise_for_status()
+            parser = _HistoryStreamParser()
+            list_entity_ids: dict[int, str] = {}
+            async for chunk in response.content.iter_chunked(chunk_size):
+                for list_index, state in parser.feed(chunk):
+                    # Minimal responses only name the entity in its first state
+                    entity_id = list_entity_ids.setdefault(
+                        list_index, state.get("entity_id", "")
+                    )
+                    yield entity_id, state
+
     # Subscription and Event Methods
 
     def subscribe_to_entity(
@@ -769,6 +1235,22 @@ class HomeAssistantClient:
             except ValueError:
                 logger.warning(f"Callback not found for entity: {entity_id}")
 
+    async def subscribe_to_state_changes(
+        self,
+        entity_ids: Iterable[str],
+        callback: Callable[[str, dict | None, dict], Any],
+    ) -> None:
+        """
+        Watch entities and call back on their state changes.
+
+        Args:
+            entity_ids: Entity IDs to watch
+            callback: Called with (entity_id, old_state, new_state) for changes
+                of watched entities; returned coroutines are awaited
+        """
+        await self.watch_entities(entity_ids)
+        self.state_change_callbacks.append(callback)
+
     # Utility Methods
 
     def is_connected(self) -> bool:
@@ -788,6 +1270,8 @@ class HomeAssistantClient:
         """Clear the entity cache"""
         self.entity_cache.clear()
         self.cache_timestamps.clear()
+        # Reads fall back to REST until the mirror is reseeded on reconnect
+        self.states_synced = False
         logger.debug("Entity cache cleared")
 
     async def health_check(self) -> dict:
@@ -806,11 +1290,13 @@ class HomeAssistantClient:
                 "http_session": self.session is not None and not self.session.closed,
             },
             "cache_stats": {
+                "states_synced": self.states_synced,
                 "cached_entities": len(self.entity_cache),
                 "cache_size_bytes": sum(
                     len(str(entity)) for entity in self.entity_cache.values()
                 ),
             },
+            "rate_limit": self.rate_limiter.metrics(),
         }
 
         # Get error handler health for this client's services
@@ -843,3 +1329,126 @@ class HomeAssistantClient:
             health_status["overall_healthy"] = False
 
         return health_status
+
+
+def _loads(message: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(message)
+    return json.loads(message)
+
+
+def _timestamp_iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+def _expand_state(entity_id: str, compressed: dict) -> dict:
+    """Expand a compressed subscribe_entities state into the REST state format"""
+    last_changed = compressed.get("lc")
+    last_updated = compressed.get("lu", last_changed)
+    context = compressed.get("c")
+    return {
+        "entity_id": entity_id,
+        "state": compressed.get("s"),
+        "attributes": compressed.get("a", {}),
+        "last_changed": _timestamp_iso(last_changed) if last_changed else None,
+        "last_updated": _timestamp_iso(last_updated) if last_updated else None,
+        "context": context if isinstance(context, dict) else {"id": context},
+    }
+
+
+def _apply_state_diff(current: dict, diff: dict) -> dict:
+    """Apply a compressed subscribe_entities diff to a state, returning a new state"""
+    state = {**current, "attributes": dict(current.get("attributes") or {})}
+
+    additions = diff.get("+", {})
+    if "s" in additions:
+        state["state"] = additions["s"]
+    if "a" in additions:
+        state["attributes"].update(additions["a"])
+    if "lc" in additions:
+        state["last_changed"] = state["last_updated"] = _timestamp_iso(additions["lc"])
+    elif "lu" in additions:
+        state["last_updated"] = _timestamp_iso(additions["lu"])
+    if "c" in additions:
+        context = additions["c"]
+        state["context"] = context if isinstance(context, dict) else {"id": context}
+
+    for name in diff.get("-", {}).get("a", []):
+        state["attributes"].pop(name, None)
+
+    return state
+
+
+class _HistoryStreamParser:
+    """
+    Incremental parser for /api/history/period responses.
+
+    The body is a list with one list of state objects per entity. Chunks are
+    scanned for structural characters only, and each state object is decoded
+    as soon as it is complete, tagged with the index of its entity list.
+    """
+
+    _TOKENS = re.compile(rb'[\[\]{}"]')
+    _STRING_TOKENS = re.compile(rb'["\\]')
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._scan = 0
+        self._depth = 0
+        self._in_string = False
+        self._start: int | None = None
+        self._list_index = -1
+
+    def feed(self, chunk: bytes) -> list[tuple[int, dict]]:
+        """Consume a chunk and return the state objects it completed"""
+        buffer = self._buffer
+        buffer += chunk
+        states = []
+        pos = self._scan
+
+        while True:
+            if self._in_string:
+                match = self._STRING_TOKENS.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                if match.group() == b"\\":
+                    if match.end() >= len(buffer):
+                        # The escaped character is in the next chunk
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                self._in_string = False
+                pos = match.end()
+                continue
+
+            match = self._TOKENS.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            token = match.group()
+            pos = match.end()
+            if token == b'"':
+                self._in_string = True
+            elif token in (b"[", b"{"):
+                self._depth += 1
+                if self._depth == 2:
+                    self._list_index += 1
+                elif self._depth == 3:
+                    self._start = match.start()
+            else:
+                if self._depth == 3:
+                    states.append(
+                        (self._list_index, _loads(bytes(buffer[self._start : pos])))
+                    )
+                    self._start = None
+                self._depth -= 1
+
+        # Drop everything before the state object still being read
+        cut = pos if self._start is None else self._start
+        del buffer[:cut]
+        self._scan = pos - cut
+        if self._start is not None:
+            self._start = 0
+        return states
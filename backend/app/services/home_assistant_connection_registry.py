@@ -0,0 +1,236 @@
+"""
+Home Assistant Connection Registry
+
+Shares HomeAssistantClient instances between users of the same Home
+Assistant install. Connections are keyed by URL and a fingerprint of their
+credentials, so users with the same configuration hold references to one
+client (and one WebSocket) instead of opening their own.
+
+The registry is bounded: when the connection budget is reached the least
+recently used connection is closed, preferring ones no user holds, and a
+background reaper closes connections that have been idle too long.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.services.home_assistant_client import HomeAssistantClient
+
+logger = logging.getLogger(__name__)
+
+# (normalized URL, credentials fingerprint)
+ConnectionKey = tuple[str, str]
+
+DEFAULT_REAP_INTERVAL_SECONDS = 60.0
+
+
+def connection_key(config: dict[str, Any]) -> ConnectionKey:
+    """
+    Build the registry key of a Home Assistant configuration.
+
+    Credentials are hashed so the key can be logged and kept around without
+    holding the token itself.
+    """
+    credentials = "\0".join(
+        config.get(field) or ""
+        for field in (
+            "access_token",
+            "cloudflare_client_id",
+            "cloudflare_client_secret",
+        )
+    )
+    fingerprint = hashlib.sha256(credentials.encode()).hexdigest()[:16]
+    return config["url"].rstrip("/"), fingerprint
+
+
+class _RegistryEntry:
+    """A shared client with the users holding it"""
+
+    __slots__ = ("client", "holders", "created_at", "last_used")
+
+    def __init__(self, client: HomeAssistantClient) -> None:
+        self.client = client
+        self.holders: set[str] = set()
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class HomeAssistantConnectionRegistry:
+    """Reference counted, bounded pool of shared Home Assistant clients"""
+
+    def __init__(
+        self,
+        max_connections: int = 50,
+        idle_timeout: float = 3600.0,
+        on_evict: Callable[[ConnectionKey, set[str]], None] | None = None,
+    ) -> None:
+        """
+        Initialize the registry.
+
+        Args:
+            max_connections: Most clients kept open at once
+            idle_timeout: Seconds without use after which a client is closed
+            on_evict: Called with the key and holders of each closed client
+        """
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.on_evict = on_evict
+
+        # In LRU order, the most recently used entry last
+        self._entries: OrderedDict[ConnectionKey, _RegistryEntry] = OrderedDict()
+        self._reaper_task: asyncio.Task | None = None
+
+    def get(self, key: ConnectionKey) -> HomeAssistantClient | None:
+        """Get an open client and mark it as used"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._touch(key, entry)
+        return entry.client
+
+    def last_used(self, key: ConnectionKey) -> float | None:
+        """Monotonic time of the last use of a client"""
+        entry = self._entries.get(key)
+        return entry.last_used if entry else None
+
+    async def acquire(
+        self,
+        key: ConnectionKey,
+        holder: str,
+        connect: Callable[[], Awaitable[HomeAssistantClient]],
+    ) -> HomeAssistantClient:
+        """
+        Take a reference to the client of a key, connecting if there is none.
+
+        Args:
+            key: Registry key from connection_key()
+            holder: ID of the user taking the reference
+            connect: Creates and tests a new client
+
+        Returns:
+            The shared client
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            client = await connect()
+
+            # Another user may have connected while this one was connecting
+            entry = self._entries.get(key)
+            if entry is None:
+                await self._make_room()
+                entry = self._entries[key] = _RegistryEntry(client)
+                logger.info(f"Opened shared HA connection to {key[0]}")
+            else:
+                await client.close()
+
+        entry.holders.add(holder)
+        self._touch(key, entry)
+        return entry.client
+
+    def release(self, key: ConnectionKey, holder: str) -> None:
+        """
+        Drop a user's reference to a client.
+
+        The client stays open for reuse until it is evicted as idle.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.holders.discard(holder)
+
+    async def discard(self, key: ConnectionKey) -> None:
+        """Close a client for all of its holders"""
+        await self._evict(key)
+
+    async def reap(self) -> int:
+        """
+        Close clients that have been idle longer than the idle timeout.
+
+        Returns:
+            Number of clients closed
+        """
+        cutoff = time.monotonic() - self.idle_timeout
+        # Entries are in LRU order, so idle ones are at the front
+        idle = []
+        for key, entry in self._entries.items():
+            if entry.last_used > cutoff:
+                break
+            idle.append(key)
+
+        for key in idle:
+            await self._evict(key)
+        return len(idle)
+
+    def start_reaper(
+        self, interval_seconds: float = DEFAULT_REAP_INTERVAL_SECONDS
+    ) -> None:
+        """
+        Start a background task that periodically closes idle clients.
+
+        Args:
+            interval_seconds: Delay between reaper passes
+        """
+        if self._reaper_task is not None and not self._reaper_task.done():
+            return
+        self._reaper_task = asyncio.create_task(self._reaper_loop(interval_seconds))
+
+    async def close(self) -> None:
+        """Stop the reaper and close every client"""
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            try:
+                await self._reaper_task
+            except asyncio.CancelledError:
+                pass
+            self._reaper_task = None
+
+        for key in list(self._entries):
+            await self._evict(key)
+
+    def stats(self) -> dict[str, Any]:
+        """Connection counts of the registry"""
+        return {
+            "connections": len(self._entries),
+            "max_connections": self.max_connections,
+            "held": sum(1 for entry in self._entries.values() if entry.holders),
+            "holders": sum(len(entry.holders) for entry in self._entries.values()),
+        }
+
+    def _touch(self, key: ConnectionKey, entry: _RegistryEntry) -> None:
+        entry.last_used = time.monotonic()
+        self._entries.move_to_end(key)
+
+    async def _make_room(self) -> None:
+        """Evict least recently used clients until one more fits"""
+        while self._entries and len(self._entries) >= self.max_connections:
+            victim = next(
+                (key for key, entry in self._entries.items() if not entry.holders),
+                next(iter(self._entries)),
+            )
+            logger.info(f"HA connection budget reached, evicting {victim[0]}")
+            await self._evict(victim)
+
+    async def _evict(self, key: ConnectionKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        if self.on_evict:
+            self.on_evict(key, entry.holders)
+        try:
+            await entry.client.close()
+        except Exception as e:
+            logger.warning(f"Error closing HA connection to {key[0]}: {e}")
+
+    async def _reaper_loop(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                closed = await self.reap()
+                if closed:
+                    logger.info(f"Closed {closed} idle HA connections")
+            except Exception as e:
+                logger.error(f"HA connection reaper failed: {e}")
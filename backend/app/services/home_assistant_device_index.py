@@ -0,0 +1,145 @@
+"""
+Home Assistant Device Index
+
+Keeps the devices of one Home Assistant install indexed by domain and
+device class, so device lists are lookups rather than scans over every
+entity state. The index is loaded once from the client's state mirror
+(or a REST state dump while the WebSocket is down) and then updated
+incrementally from the client's state change callbacks.
+"""
+
+import logging
+import time
+from typing import Any
+
+from app.services.home_assistant_client import HomeAssistantClient
+
+logger = logging.getLogger(__name__)
+
+# Domains listed when no domain is requested: devices that can be controlled
+CONTROLLABLE_DOMAINS = ("light", "switch", "fan", "valve", "cover")
+
+# Seconds an index loaded over REST is used while the mirror is not synced
+REST_INDEX_TTL_SECONDS = 300.0
+
+
+def _device_from_state(entity_id: str, state: dict) -> dict[str, Any]:
+    attributes = state.get("attributes") or {}
+    return {
+        "entity_id": entity_id,
+        "name": attributes.get("friendly_name", entity_id),
+        "domain": entity_id.split(".")[0] if "." in entity_id else "",
+        "state": state.get("state"),
+        "attributes": attributes,
+        "last_changed": state.get("last_changed"),
+        "last_updated": state.get("last_updated"),
+    }
+
+
+class DeviceIndex:
+    """Devices of one Home Assistant client by domain and device class"""
+
+    def __init__(self, client: HomeAssistantClient) -> None:
+        self.client = client
+        self._devices: dict[str, dict] = {}
+        self._by_domain: dict[str, dict[str, dict]] = {}
+        self._by_class: dict[tuple[str, str | None], dict[str, dict]] = {}
+
+        # Mirror generation the index was loaded from; None when loaded
+        # over REST, in which case it expires after REST_INDEX_TTL_SECONDS
+        self._generation: int | None = None
+        self._loaded_at: float | None = None
+
+        client.state_change_callbacks.append(self._on_state_change)
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def is_current(self) -> bool:
+        """Check whether the index reflects the client's current states"""
+        if self._loaded_at is None:
+            return False
+        if self.client.states_synced and self.client.watched_entities is None:
+            return self._generation == self.client.mirror_generation
+        return (
+            self._generation is None
+            and time.monotonic() - self._loaded_at < REST_INDEX_TTL_SECONDS
+        )
+
+    def load(self, states: list[dict], generation: int | None = None) -> None:
+        """
+        Replace the index contents with a full set of states.
+
+        Args:
+            states: Entity states in the REST format
+            generation: Mirror generation the states were taken from, or
+                None for states fetched over REST
+        """
+        self._devices.clear()
+        self._by_domain.clear()
+        self._by_class.clear()
+        for state in states:
+            entity_id = state.get("entity_id")
+            if entity_id:
+                self._add(_device_from_state(entity_id, state))
+
+        self._generation = generation
+        self._loaded_at = time.monotonic()
+        logger.debug(f"Indexed {len(self._devices)} Home Assistant devices")
+
+    def devices(
+        self, domain: str | None = None, device_class: str | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        List indexed devices.
+
+        Args:
+            domain: Only devices of this domain (defaults to the
+                controllable domains)
+            device_class: Only devices with this device class
+
+        Returns:
+            Device dictionaries
+        """
+        domains = (domain,) if domain else CONTROLLABLE_DOMAINS
+        devices: list[dict[str, Any]] = []
+        for name in domains:
+            bucket = (
+                self._by_domain.get(name)
+                if device_class is None
+                else self._by_class.get((name, device_class))
+            )
+            if bucket:
+                devices.extend(bucket.values())
+        return devices
+
+    def detach(self) -> None:
+        """Stop following the client's state changes"""
+        try:
+            self.client.state_change_callbacks.remove(self._on_state_change)
+        except ValueError:
+            pass
+
+    def _on_state_change(
+        self, entity_id: str, old_state: dict | None, new_state: dict
+    ) -> None:
+        self._remove(entity_id)
+        self._add(_device_from_state(entity_id, new_state))
+
+    def _add(self, device: dict[str, Any]) -> None:
+        entity_id = device["entity_id"]
+        domain = device["domain"]
+        self._devices[entity_id] = device
+        self._by_domain.setdefault(domain, {})[entity_id] = device
+        device_class = device["attributes"].get("device_class")
+        self._by_class.setdefault((domain, device_class), {})[entity_id] = device
+
+    def _remove(self, entity_id: str) -> None:
+        device = self._devices.pop(entity_id, None)
+        if device is None:
+            return
+        domain = device["domain"]
+        self._by_domain[domain].pop(entity_id, None)
+        self._by_class[(domain, device["attributes"].get("device_class"))].pop(
+            entity_id, None
+        )
@@ -0,0 +1,220 @@
+"""
+Adaptive Home Assistant Rate Limiter
+
+Requests to a Home Assistant host are paced by a token bucket whose rate
+adapts to how the host responds (AIMD):
+
+- each fast, successful response raises the rate additively
+- a 429, a 5xx, a connection error or a slow response cuts it
+  multiplicatively, at most once per cooldown period
+
+Limiters are shared per host, so every client talking to the same Home
+Assistant instance backs off together. Waiting requests are served by
+priority: critical requests (emergency stops) never wait, and normal
+requests go ahead of background traffic such as discovery and history
+collection.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from urllib.parse import urlparse
+
+import aiohttp
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class RequestPriority(IntEnum):
+    """Priority lanes, lower values are served first"""
+
+    CRITICAL = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+class RequestOutcome:
+    """Response details recorded by a rate limited request"""
+
+    def __init__(self) -> None:
+        self.status: int | None = None
+
+
+class AdaptiveRateLimiter:
+    """AIMD token bucket with priority lanes for one Home Assistant host"""
+
+    def __init__(
+        self,
+        initial_rate: float = 10.0,
+        min_rate: float = 1.0,
+        max_rate: float = 50.0,
+        additive_increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_target: float = 1.0,
+        decrease_cooldown: float = 1.0,
+    ) -> None:
+        """
+        Initialize the rate limiter.
+
+        Args:
+            initial_rate: Starting rate in requests per second
+            min_rate: Lowest rate the limiter backs off to
+            max_rate: Highest rate the limiter grows to
+            additive_increase: Requests per second added per second of
+                healthy responses at the current rate
+            decrease_factor: Factor applied to the rate on overload signals
+            latency_target: Responses slower than this (seconds) count as an
+                overload signal
+            decrease_cooldown: Minimum seconds between two rate decreases
+        """
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.decrease_cooldown = decrease_cooldown
+
+        # Allow a burst of up to one second of requests
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: asyncio.Task | None = None
+        self._stats = {"requests": 0, "throttled": 0, "overloads": 0}
+
+    @asynccontextmanager
+    async def request(
+        self, priority: RequestPriority = RequestPriority.NORMAL
+    ) -> AsyncIterator[RequestOutcome]:
+        """
+        Wait for a request slot and record the response when done.
+
+        Set ``status`` on the yielded outcome to the response status; errors
+        raised inside the block are recorded as well.
+        """
+        await self.acquire(priority)
+        outcome = RequestOutcome()
+        started = time.monotonic()
+        try:
+            yield outcome
+        except aiohttp.ClientResponseError as e:
+            self.record(time.monotonic() - started, e.status)
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.record(time.monotonic() - started, None, failed=True)
+            raise
+        else:
+            self.record(time.monotonic() - started, outcome.status)
+
+    async def acquire(self, priority: RequestPriority = RequestPriority.NORMAL) -> None:
+        """Wait until a request may be sent"""
+        self._stats["requests"] += 1
+        self._refill()
+
+        # Critical requests go straight through, borrowing from later tokens
+        if priority == RequestPriority.CRITICAL or (
+            not self._waiters and self._tokens >= 1
+        ):
+            self._tokens -= 1
+            return
+
+        self._stats["throttled"] += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    def record(self, latency: float, status: int | None, failed: bool = False) -> None:
+        """Adapt the rate to a response"""
+        overloaded = (
+            failed
+            or status == 429
+            or (status is not None and status >= 500)
+            or latency > self.latency_target
+        )
+        if not overloaded:
+            self.rate = min(
+                self.max_rate, self.rate + self.additive_increase / self.rate
+            )
+            return
+
+        self._stats["overloads"] += 1
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        logger.warning(
+            f"Home Assistant overloaded (status {status}, {latency:.2f}s), "
+            f"rate reduced to {self.rate:.1f}/s"
+        )
+
+    def metrics(self) -> dict:
+        """Current rate, queue depth per lane and counters"""
+        queued = {priority.name.lower(): 0 for priority in RequestPriority}
+        for priority, _, _ in self._waiters:
+            queued[RequestPriority(priority).name.lower()] += 1
+        return {
+            "rate": round(self.rate, 2),
+            "queue_depth": len(self._waiters),
+            "queued": queued,
+            **self._stats,
+        }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            max(1.0, self.rate), self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def _dispatch(self) -> None:
+        """Release waiting requests by priority as tokens become available"""
+        while self._waiters:
+            self._refill()
+            while self._waiters and self._tokens >= 1:
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.done():
+                    self._tokens -= 1
+                    future.set_result(None)
+            if self._waiters:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+_limiters: dict[str, AdaptiveRateLimiter] = {}
+
+
+def get_rate_limiter(base_url: str) -> AdaptiveRateLimiter:
+    """Get the shared rate limiter of a Home Assistant host"""
+    host = urlparse(base_url).netloc
+    limiter = _limiters.get(host)
+    if limiter is None:
+        settings = get_settings()
+        limiter = _limiters[host] = AdaptiveRateLimiter(
+            initial_rate=settings.HA_RATE_LIMIT_INITIAL,
+            min_rate=settings.HA_RATE_LIMIT_MIN,
+            max_rate=settings.HA_RATE_LIMIT_MAX,
+            latency_target=settings.HA_RATE_LIMIT_LATENCY_TARGET_SECONDS,
+        )
+    return limiter
+
+
+def rate_limiter_summary() -> dict:
+    """Aggregate metrics over all hosts (host names are not exposed)"""
+    metrics = [limiter.metrics() for limiter in _limiters.values()]
+    return {
+        "hosts": len(metrics),
+        "queue_depth": sum(m["queue_depth"] for m in metrics),
+        "min_rate": min((m["rate"] for m in metrics), default=None),
+        "overloads": sum(m["overloads"] for m in metrics),
+    }
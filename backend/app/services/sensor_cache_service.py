@@ -12,20 +12,36 @@ Key Features:
 - Cache static data (species, plant varieties, grow recipes)
 - Intelligent cache invalidation
 - Fallback to database when cache misses
+- Single-flight fetches and stale-while-revalidate across TTL boundaries
+- Recent history and aggregates answered from an in-memory ring buffer
+- Long history windows and aggregates served from 1m/15m/1h database rollups
+- Server-side downsampling of history to a point budget for charts
 """
 
-import json
 import logging
-from dataclasses import asdict, dataclass
-from datetime import datetime
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 from typing import Any
 
-from app.core.cache import CacheManager
-from app.core.database import get_db
+from app.core.cache import CacheBackend, SingleFlight
+from app.db.supabase_client import get_shared_async_supabase_client
+from app.services.sensor_downsampling import DownsampleMode, downsample_indices
+from app.services.sensor_ring_buffer import NO_ID, SensorRingBuffer
 
 logger = logging.getLogger(__name__)
 
+# Readings older than this are not considered "latest"
+LATEST_READING_LOOKBACK_HOURS = 24
+# Rows per history page; matches the PostgREST max_rows limit
+HISTORY_PAGE_SIZE = 1000
+# History resolution backed by individual readings
+RAW_RESOLUTION = "raw"
+# Rollup resolutions maintained in the database, finest first (bucket seconds)
+ROLLUP_RESOLUTIONS = {"1m": 60, "15m": 900, "1h": 3600}
+
 
 class CacheKeyType(Enum):
     """Cache key types for different data categories"""
@@ -40,9 +56,17 @@ class CacheKeyType(Enum):
     USER_PREFERENCES = "user_preferences"
 
 
-@dataclass
+# Fields of the get_static_catalog() result per static cache key type
+STATIC_CATALOG_FIELDS = {
+    CacheKeyType.STATIC_SPECIES: "species",
+    CacheKeyType.STATIC_VARIETIES: "varieties",
+    CacheKeyType.STATIC_RECIPES: "recipes",
+}
+
+
+@dataclass(frozen=True, slots=True)
 class SensorReading:
-    """Sensor reading data structure"""
+    """Sensor reading data structure (immutable so cached instances can be shared)"""
 
     id: int | None
     device_assignment_id: str
@@ -53,10 +77,15 @@ class SensorReading:
     device_name: str | None = None
     location: str | None = None
 
+    @classmethod
+    def from_cached(cls, data: dict[str, Any]) -> "SensorReading":
+        """Rebuild a reading decoded from a remote cache backend"""
+        return cls(**{**data, "timestamp": datetime.fromisoformat(data["timestamp"])})
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SensorAggregate:
-    """Aggregated sensor data structure"""
+    """Aggregated sensor data structure (immutable so cached instances can be shared)"""
 
     device_assignment_id: str
     sensor_type: str
@@ -67,11 +96,28 @@ class SensorAggregate:
     period_start: datetime
     period_end: datetime
 
+    @classmethod
+    def from_cached(cls, data: dict[str, Any]) -> "SensorAggregate":
+        """Rebuild an aggregate decoded from a remote cache backend"""
+        return cls(
+            **{
+                **data,
+                "period_start": datetime.fromisoformat(data["period_start"]),
+                "period_end": datetime.fromisoformat(data["period_end"]),
+            }
+        )
+
 
 class SensorCacheService:
     """Service for caching sensor data and related information"""
 
-    def __init__(self, cache_manager: CacheManager) -> None:
+    def __init__(
+        self,
+        cache_manager: CacheBackend,
+        ring_buffer: SensorRingBuffer | None = None,
+        history_point_budget: int = 2000,
+        raw_interval_seconds: float = 10.0,
+    ) -> None:
         self.cache = cache_manager
         self.default_ttl = {
             CacheKeyType.SENSOR_LATEST: 300,  # 5 minutes
@@ -83,12 +129,130 @@ class SensorCacheService:
             CacheKeyType.STATIC_RECIPES: 86400,  # 24 hours
             CacheKeyType.USER_PREFERENCES: 3600,  # 1 hour
         }
+        # How long an expired value may still be served while it is refreshed
+        self.stale_ttl = {
+            CacheKeyType.SENSOR_LATEST: 60,  # 1 minute
+            CacheKeyType.SENSOR_HISTORY: 300,  # 5 minutes
+            CacheKeyType.SENSOR_AGGREGATES: 600,  # 10 minutes
+            CacheKeyType.DEVICE_STATUS: 60,  # 1 minute
+            CacheKeyType.STATIC_SPECIES: 3600,  # 1 hour
+            CacheKeyType.STATIC_VARIETIES: 3600,  # 1 hour
+            CacheKeyType.STATIC_RECIPES: 3600,  # 1 hour
+            CacheKeyType.USER_PREFERENCES: 600,  # 10 minutes
+        }
+        # Coalesces concurrent database fetches and refreshes per cache key
+        self._single_flight = SingleFlight()
+        # Recent readings per series; trusted for as long as cached history
+        self.ring_buffer = ring_buffer or SensorRingBuffer(
+            max_staleness_seconds=self.default_ttl[CacheKeyType.SENSOR_HISTORY]
+        )
+        # Points a history response should stay within, and the typical gap
+        # between raw readings used to estimate a raw window's size
+        self.history_point_budget = history_point_budget
+        self.raw_interval_seconds = raw_interval_seconds
 
     def _get_cache_key(self, key_type: CacheKeyType, *args) -> str:
         """Generate cache key for given type and arguments"""
         key_parts = [key_type.value] + [str(arg) for arg in args]
         return ":".join(key_parts)
 
+    async def _get_or_fetch(
+        self,
+        key_type: CacheKeyType,
+        cache_key: str,
+        fetch: Callable[[], Awaitable[list[Any] | None]],
+        encode: Callable[[list[Any]], Any],
+        decode: Callable[[Any], list[Any]],
+    ) -> list[Any]:
+        """
+        Read-through cache lookup with stampede protection.
+
+        Values are stored in the representation chosen by ``_codec``. Fresh
+        values are returned directly. Values past their TTL but inside
+        the stale window are returned immediately while a single background
+        refresh runs. On a miss, concurrent callers for the same key share
+        one database fetch.
+
+        Args:
+            key_type: Cache key type (selects TTL and stale window)
+            cache_key: Cache key
+            fetch: Coroutine function loading the data from the database,
+                returning None if the fetch failed
+            encode: Converts fetched data into its cached representation
+            decode: Converts the cached representation back into data
+
+        Returns:
+            Cached or freshly fetched data
+        """
+        envelope = await self.cache.get(cache_key)
+        if envelope:
+            try:
+                data = decode(envelope["value"])
+                if time.time() >= envelope["fresh_until"]:
+                    # Stale - serve it and refresh in the background
+                    self._single_flight.start(
+                        cache_key,
+                        lambda: self._fetch_and_store(
+                            key_type, cache_key, fetch, encode
+                        ),
+                    )
+                return data
+            except (TypeError, KeyError, ValueError) as e:
+                logger.warning(f"Failed to deserialize cached {key_type.value}: {e}")
+
+        # Cache miss - one caller fetches from the database, the rest await it
+        return await self._single_flight.do(
+            cache_key,
+            lambda: self._fetch_and_store(key_type, cache_key, fetch, encode),
+        )
+
+    async def _fetch_and_store(
+        self,
+        key_type: CacheKeyType,
+        cache_key: str,
+        fetch: Callable[[], Awaitable[list[Any] | None]],
+        encode: Callable[[list[Any]], Any],
+    ) -> list[Any]:
+        """Fetch data from the database and cache it with a stale window"""
+        data = await fetch()
+        if data is None:
+            # Failed fetch: answer empty without caching, so the next call
+            # retries (a stale value, if any, stays in place)
+            return []
+
+        if data:
+            ttl = self.default_ttl[key_type]
+            await self.cache.set(
+                cache_key,
+                {"value": encode(data), "fresh_until": time.time() + ttl},
+                ttl_seconds=ttl + self.stale_ttl[key_type],
+            )
+
+        return data
+
+    def _codec(
+        self, from_cached: Callable[[dict[str, Any]], Any] | None = None
+    ) -> tuple[Callable[[list[Any]], Any], Callable[[Any], list[Any]]]:
+        """
+        Choose how results are represented in the cache for this backend.
+
+        An in-process backend keeps the already built, immutable result
+        objects, so a hit costs no parsing or object construction. A remote
+        backend stores plain data that the backend's codec serializes, and
+        hits rebuild result objects with ``from_cached``.
+
+        Args:
+            from_cached: Rebuilds one result object from its decoded form
+
+        Returns:
+            (encode, decode) pair for use with ``_get_or_fetch``
+        """
+        if self.cache.is_local:
+            return tuple, list
+        if from_cached is None:
+            return list, list
+        return list, lambda rows: [from_cached(row) for row in rows]
+
     async def get_latest_sensor_readings(
         self,
         user_id: str,
@@ -113,38 +277,48 @@ class SensorCacheService:
             ",".join(sensor_types or []),
         )
 
-        # Try cache first
-        cached_data = await self.cache.get(cache_key)
-        if cached_data:
-            try:
-                readings_data = json.loads(cached_data)
-                return [SensorReading(**reading) for reading in readings_data]
-            except (json.JSONDecodeError, TypeError) as e:
-                logger.warning(f"Failed to deserialize cached sensor readings: {e}")
-
-        # Cache miss - fetch from database
-        readings = await self._fetch_latest_sensor_readings_from_db(
-            user_id, device_ids, sensor_types
+        return await self._get_or_fetch(
+            CacheKeyType.SENSOR_LATEST,
+            cache_key,
+            lambda: self._fetch_latest_sensor_readings_from_db(
+                user_id, device_ids, sensor_types
+            ),
+            *self._codec(SensorReading.from_cached),
         )
 
-        # Cache the results
-        if readings:
-            readings_data = [asdict(reading) for reading in readings]
-            # Convert datetime objects to ISO strings for JSON serialization
-            for reading_data in readings_data:
-                if isinstance(reading_data.get("timestamp"), datetime):
-                    reading_data["timestamp"] = reading_data["timestamp"].isoformat()
+    def select_history_resolution(
+        self, hours: int, max_points: int | None = None
+    ) -> str:
+        """
+        Pick the resolution used to answer a history window.
 
-            await self.cache.set(
-                cache_key,
-                json.dumps(readings_data, default=str),
-                ttl=self.default_ttl[CacheKeyType.SENSOR_LATEST],
-            )
+        Raw readings are used while the window's expected number of readings
+        fits the point budget. Otherwise the finest rollup that fits is used,
+        or the coarsest rollup if none does.
 
-        return readings
+        Args:
+            hours: Length of the history window
+            max_points: Point budget (defaults to ``history_point_budget``)
+
+        Returns:
+            ``"raw"`` or a key of ``ROLLUP_RESOLUTIONS``
+        """
+        budget = max_points or self.history_point_budget
+        window_seconds = hours * 3600
+        if window_seconds / self.raw_interval_seconds <= budget:
+            return RAW_RESOLUTION
+        for resolution, bucket_seconds in ROLLUP_RESOLUTIONS.items():
+            if window_seconds / bucket_seconds <= budget:
+                return resolution
+        return next(reversed(ROLLUP_RESOLUTIONS))
 
     async def get_sensor_history(
-        self, user_id: str, device_id: str, sensor_type: str, hours: int = 24
+        self,
+        user_id: str,
+        device_id: str,
+        sensor_type: str,
+        hours: int = 24,
+        resolution: str | None = None,
     ) -> list[SensorReading]:
         """
         Get sensor reading history for a specific device and sensor type
@@ -154,43 +328,168 @@ class SensorCacheService:
             device_id: Device assignment ID
             sensor_type: Type of sensor (temperature, humidity, etc.)
             hours: Number of hours of history to retrieve
+            resolution: ``"raw"`` or a rollup resolution; chosen with
+                ``select_history_resolution`` when omitted
 
         Returns:
-            List of sensor readings ordered by timestamp
+            List of sensor readings ordered by timestamp. For rollup
+            resolutions each reading is one bucket: its value is the bucket
+            average and its timestamp the bucket start.
         """
-        cache_key = self._get_cache_key(
-            CacheKeyType.SENSOR_HISTORY, user_id, device_id, sensor_type, hours
+        resolution = resolution or self.select_history_resolution(hours)
+        cache_key = self._history_cache_key(
+            user_id, device_id, sensor_type, hours, resolution
         )
+        if resolution != RAW_RESOLUTION:
+            return await self._get_or_fetch(
+                CacheKeyType.SENSOR_HISTORY,
+                cache_key,
+                lambda: self._fetch_rollup_history_from_db(
+                    user_id, device_id, sensor_type, hours, resolution
+                ),
+                *self._codec(SensorReading.from_cached),
+            )
 
-        # Try cache first
-        cached_data = await self.cache.get(cache_key)
-        if cached_data:
-            try:
-                readings_data = json.loads(cached_data)
-                return [SensorReading(**reading) for reading in readings_data]
-            except (json.JSONDecodeError, TypeError) as e:
-                logger.warning(f"Failed to deserialize cached sensor history: {e}")
+        since = datetime.now(timezone.utc) - timedelta(hours=hours)
+        window = self.ring_buffer.window(
+            user_id, device_id, sensor_type, since.timestamp()
+        )
+        if window is not None:
+            return _readings_from_columns(
+                device_id,
+                sensor_type,
+                window.timestamps,
+                window.values,
+                window.ids,
+                unit=window.unit,
+                device_name=window.device_name,
+                location=window.location,
+            )
 
-        # Cache miss - fetch from database
-        readings = await self._fetch_sensor_history_from_db(
-            user_id, device_id, sensor_type, hours
+        async def fetch_and_seed() -> list[SensorReading] | None:
+            readings = await self._fetch_sensor_history_from_db(
+                user_id, device_id, sensor_type, hours
+            )
+            if readings is None:
+                # Failed fetch: not seeded, and not cached by _get_or_fetch
+                return None
+            self._seed_ring_buffer(user_id, device_id, sensor_type, readings, since)
+            return readings
+
+        return await self._get_or_fetch(
+            CacheKeyType.SENSOR_HISTORY,
+            cache_key,
+            fetch_and_seed,
+            *self._codec(SensorReading.from_cached),
         )
 
-        # Cache the results
-        if readings:
-            readings_data = [asdict(reading) for reading in readings]
-            # Convert datetime objects to ISO strings for JSON serialization
-            for reading_data in readings_data:
-                if isinstance(reading_data.get("timestamp"), datetime):
-                    reading_data["timestamp"] = reading_data["timestamp"].isoformat()
+    def _history_cache_key(
+        self,
+        user_id: str,
+        device_id: str,
+        sensor_type: str,
+        hours: int,
+        resolution: str,
+    ) -> str:
+        """Cache key of one history series at a resolution"""
+        parts: list[Any] = [user_id, device_id, sensor_type, hours]
+        if resolution != RAW_RESOLUTION:
+            parts.append(resolution)
+        return self._get_cache_key(CacheKeyType.SENSOR_HISTORY, *parts)
+
+    async def get_sensor_history_batch(
+        self,
+        user_id: str,
+        series: list[tuple[str, str]],
+        hours: int = 24,
+        resolution: str | None = None,
+    ) -> dict[tuple[str, str], list[SensorReading]]:
+        """
+        Get history for many (device, sensor type) series at once.
+
+        Series are answered from the ring buffer and the cache first, using
+        the same keys as ``get_sensor_history``. All remaining series are
+        fetched with one database query and cached individually.
 
-            await self.cache.set(
-                cache_key,
-                json.dumps(readings_data, default=str),
-                ttl=self.default_ttl[CacheKeyType.SENSOR_HISTORY],
+        Args:
+            user_id: User ID
+            series: (device assignment ID, sensor type) pairs
+            hours: Number of hours of history to retrieve
+            resolution: ``"raw"`` or a rollup resolution; chosen with
+                ``select_history_resolution`` when omitted
+
+        Returns:
+            Readings per requested series (empty for series without data)
+        """
+        resolution = resolution or self.select_history_resolution(hours)
+        since = datetime.now(timezone.utc) - timedelta(hours=hours)
+        results: dict[tuple[str, str], list[SensorReading]] = {}
+
+        keys: dict[tuple[str, str], str] = {}
+        for device_id, sensor_type in dict.fromkeys(series):
+            window = None
+            if resolution == RAW_RESOLUTION:
+                window = self.ring_buffer.window(
+                    user_id, device_id, sensor_type, since.timestamp()
+                )
+            if window is not None:
+                results[(device_id, sensor_type)] = _readings_from_columns(
+                    device_id,
+                    sensor_type,
+                    window.timestamps,
+                    window.values,
+                    window.ids,
+                    unit=window.unit,
+                    device_name=window.device_name,
+                    location=window.location,
+                )
+            else:
+                keys[(device_id, sensor_type)] = self._history_cache_key(
+                    user_id, device_id, sensor_type, hours, resolution
+                )
+
+        encode, decode = self._codec(SensorReading.from_cached)
+        envelopes = await self.cache.get_many(list(keys.values()))
+        now = time.time()
+        missing = []
+        for pair, cache_key in keys.items():
+            envelope = envelopes.get(cache_key)
+            try:
+                if envelope and now < envelope["fresh_until"]:
+                    results[pair] = decode(envelope["value"])
+                    continue
+            except (TypeError, KeyError, ValueError) as e:
+                logger.warning(f"Failed to deserialize cached sensor history: {e}")
+            missing.append(pair)
+
+        if missing:
+            fetched = await self._fetch_history_series_from_db(
+                user_id, missing, resolution, since
+            )
+            if fetched is None:
+                # Failed fetch: answer empty without caching or seeding
+                for pair in missing:
+                    results[pair] = []
+                return {pair: results[pair] for pair in dict.fromkeys(series)}
+
+            ttl = self.default_ttl[CacheKeyType.SENSOR_HISTORY]
+            await self.cache.set_many(
+                {
+                    keys[pair]: {"value": encode(readings), "fresh_until": now + ttl}
+                    for pair, readings in fetched.items()
+                    if readings
+                },
+                ttl_seconds=ttl + self.stale_ttl[CacheKeyType.SENSOR_HISTORY],
             )
+            for device_id, sensor_type in missing:
+                readings = fetched.get((device_id, sensor_type), [])
+                if resolution == RAW_RESOLUTION:
+                    self._seed_ring_buffer(
+                        user_id, device_id, sensor_type, readings, since
+                    )
+                results[(device_id, sensor_type)] = readings
 
-        return readings
+        return {pair: results[pair] for pair in dict.fromkeys(series)}
 
     async def get_sensor_aggregates(
         self,
@@ -211,6 +510,12 @@ class SensorCacheService:
         Returns:
             List of sensor aggregates
         """
+        buffered = self._aggregates_from_ring_buffer(
+            user_id, device_ids, sensor_types, period_hours
+        )
+        if buffered is not None:
+            return buffered
+
         cache_key = self._get_cache_key(
             CacheKeyType.SENSOR_AGGREGATES,
             user_id,
@@ -219,35 +524,162 @@ class SensorCacheService:
             period_hours,
         )
 
-        # Try cache first
-        cached_data = await self.cache.get(cache_key)
-        if cached_data:
-            try:
-                aggregates_data = json.loads(cached_data)
-                return [SensorAggregate(**agg) for agg in aggregates_data]
-            except (json.JSONDecodeError, TypeError) as e:
-                logger.warning(f"Failed to deserialize cached sensor aggregates: {e}")
+        return await self._get_or_fetch(
+            CacheKeyType.SENSOR_AGGREGATES,
+            cache_key,
+            lambda: self._fetch_sensor_aggregates_from_db(
+                user_id, device_ids, sensor_types, period_hours
+            ),
+            *self._codec(SensorAggregate.from_cached),
+        )
 
-        # Cache miss - fetch from database
-        aggregates = await self._fetch_sensor_aggregates_from_db(
-            user_id, device_ids, sensor_types, period_hours
+    async def get_downsampled_sensor_history(
+        self,
+        user_id: str,
+        device_id: str,
+        sensor_type: str,
+        hours: int,
+        max_points: int,
+        mode: DownsampleMode = "lttb",
+    ) -> tuple[str, list[SensorReading]]:
+        """
+        Get sensor history reduced to at most ``max_points`` points.
+
+        The source resolution is chosen for the larger of ``max_points`` and
+        the service's point budget, so short windows are downsampled from raw
+        readings and long windows from rollups. Downsampled results are
+        cached under their own key.
+
+        Args:
+            user_id: User ID
+            device_id: Device assignment ID
+            sensor_type: Type of sensor (temperature, humidity, etc.)
+            hours: Number of hours of history to retrieve
+            max_points: Maximum number of points to return
+            mode: ``"lttb"`` (shape preserving) or ``"minmax"`` (extremes)
+
+        Returns:
+            The source resolution and the downsampled readings
+        """
+        resolution = self.select_history_resolution(
+            hours, max(max_points, self.history_point_budget)
+        )
+        cache_key = self._get_cache_key(
+            CacheKeyType.SENSOR_HISTORY,
+            user_id,
+            device_id,
+            sensor_type,
+            hours,
+            resolution,
+            f"{mode}{max_points}",
         )
 
-        # Cache the results
-        if aggregates:
-            aggregates_data = [asdict(agg) for agg in aggregates]
-            # Convert datetime objects to ISO strings for JSON serialization
-            for agg_data in aggregates_data:
-                for field in ["period_start", "period_end"]:
-                    if isinstance(agg_data.get(field), datetime):
-                        agg_data[field] = agg_data[field].isoformat()
+        async def fetch_and_downsample() -> list[SensorReading]:
+            readings = await self.get_sensor_history(
+                user_id, device_id, sensor_type, hours, resolution
+            )
+            if len(readings) <= max_points:
+                return readings
+            indices = downsample_indices(
+                [reading.timestamp.timestamp() for reading in readings],
+                [reading.value for reading in readings],
+                max_points,
+                mode,
+            )
+            return [readings[index] for index in indices]
 
-            await self.cache.set(
-                cache_key,
-                json.dumps(aggregates_data, default=str),
-                ttl=self.default_ttl[CacheKeyType.SENSOR_AGGREGATES],
+        readings = await self._get_or_fetch(
+            CacheKeyType.SENSOR_HISTORY,
+            cache_key,
+            fetch_and_downsample,
+            *self._codec(SensorReading.from_cached),
+        )
+        return resolution, readings
+
+    def record_readings(self, user_id: str, readings: list[SensorReading]) -> None:
+        """
+        Append newly ingested readings to the ring buffer.
+
+        Args:
+            user_id: Owner of the devices the readings belong to
+            readings: Readings in arrival order
+        """
+        for reading in readings:
+            self.ring_buffer.append(
+                user_id,
+                reading.device_assignment_id,
+                reading.reading_type,
+                reading.timestamp.timestamp(),
+                reading.value,
+                reading.id,
+                unit=reading.unit,
+                device_name=reading.device_name,
+                location=reading.location,
             )
 
+    def _seed_ring_buffer(
+        self,
+        user_id: str,
+        device_id: str,
+        sensor_type: str,
+        readings: list[SensorReading],
+        since: datetime,
+    ) -> None:
+        """Load a freshly fetched history window into the ring buffer"""
+        latest = max(readings, key=lambda r: r.timestamp) if readings else None
+        self.ring_buffer.seed(
+            user_id,
+            device_id,
+            sensor_type,
+            [(r.timestamp.timestamp(), r.value, r.id) for r in readings],
+            since.timestamp(),
+            unit=latest.unit if latest else None,
+            device_name=latest.device_name if latest else None,
+            location=latest.location if latest else None,
+        )
+
+    def _aggregates_from_ring_buffer(
+        self,
+        user_id: str,
+        device_ids: list[str] | None,
+        sensor_types: list[str] | None,
+        period_hours: int,
+    ) -> list[SensorAggregate] | None:
+        """
+        Answer an aggregates query from the ring buffer.
+
+        Only explicit device/sensor type selections can be answered, and only
+        if every requested series is buffered for the whole period.
+
+        Returns:
+            Aggregates, or None if the database must be consulted
+        """
+        if not device_ids or not sensor_types:
+            return None
+
+        period_end = datetime.now(timezone.utc)
+        period_start = period_end - timedelta(hours=period_hours)
+        aggregates = []
+        for device_id in device_ids:
+            for sensor_type in sensor_types:
+                stats = self.ring_buffer.stats(
+                    user_id, device_id, sensor_type, period_start.timestamp()
+                )
+                if stats is None:
+                    return None
+                if stats.count:
+                    aggregates.append(
+                        SensorAggregate(
+                            device_assignment_id=device_id,
+                            sensor_type=sensor_type,
+                            avg_value=stats.avg_value,
+                            min_value=stats.min_value,
+                            max_value=stats.max_value,
+                            count=stats.count,
+                            period_start=period_start,
+                            period_end=period_end,
+                        )
+                    )
         return aggregates
 
     async def get_static_species_data(self) -> list[dict[str, Any]]:
@@ -257,28 +689,12 @@ class SensorCacheService:
         Returns:
             List of species data
         """
-        cache_key = self._get_cache_key(CacheKeyType.STATIC_SPECIES)
-
-        # Try cache first
-        cached_data = await self.cache.get(cache_key)
-        if cached_data:
-            try:
-                return json.loads(cached_data)
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to deserialize cached species data: {e}")
-
-        # Cache miss - fetch from database
-        species_data = await self._fetch_species_from_db()
-
-        # Cache the results
-        if species_data:
-            await self.cache.set(
-                cache_key,
-                json.dumps(species_data, default=str),
-                ttl=self.default_ttl[CacheKeyType.STATIC_SPECIES],
-            )
-
-        return species_data
+        return await self._get_or_fetch(
+            CacheKeyType.STATIC_SPECIES,
+            self._get_cache_key(CacheKeyType.STATIC_SPECIES),
+            lambda: self._fetch_static_data_from_db(CacheKeyType.STATIC_SPECIES),
+            *self._codec(),
+        )
 
     async def get_static_plant_varieties_data(self) -> list[dict[str, Any]]:
         """
@@ -287,28 +703,12 @@ class SensorCacheService:
         Returns:
             List of plant varieties data
         """
-        cache_key = self._get_cache_key(CacheKeyType.STATIC_VARIETIES)
-
-        # Try cache first
-        cached_data = await self.cache.get(cache_key)
-        if cached_data:
-            try:
-                return json.loads(cached_data)
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to deserialize cached varieties data: {e}")
-
-        # Cache miss - fetch from database
-        varieties_data = await self._fetch_plant_varieties_from_db()
-
-        # Cache the results
-        if varieties_data:
-            await self.cache.set(
-                cache_key,
-                json.dumps(varieties_data, default=str),
-                ttl=self.default_ttl[CacheKeyType.STATIC_VARIETIES],
-            )
-
-        return varieties_data
+        return await self._get_or_fetch(
+            CacheKeyType.STATIC_VARIETIES,
+            self._get_cache_key(CacheKeyType.STATIC_VARIETIES),
+            lambda: self._fetch_static_data_from_db(CacheKeyType.STATIC_VARIETIES),
+            *self._codec(),
+        )
 
     async def get_static_grow_recipes_data(self) -> list[dict[str, Any]]:
         """
@@ -317,28 +717,12 @@ class SensorCacheService:
         Returns:
             List of grow recipes data
         """
-        cache_key = self._get_cache_key(CacheKeyType.STATIC_RECIPES)
-
-        # Try cache first
-        cached_data = await self.cache.get(cache_key)
-        if cached_data:
-            try:
-                return json.loads(cached_data)
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to deserialize cached recipes data: {e}")
-
-        # Cache miss - fetch from database
-        recipes_data = await self._fetch_grow_recipes_from_db()
-
-        # Cache the results
-        if recipes_data:
-            await self.cache.set(
-                cache_key,
-                json.dumps(recipes_data, default=str),
-                ttl=self.default_ttl[CacheKeyType.STATIC_RECIPES],
-            )
-
-        return recipes_data
+        return await self._get_or_fetch(
+            CacheKeyType.STATIC_RECIPES,
+            self._get_cache_key(CacheKeyType.STATIC_RECIPES),
+            lambda: self._fetch_static_data_from_db(CacheKeyType.STATIC_RECIPES),
+            *self._codec(),
+        )
 
     async def invalidate_sensor_cache(
         self,
@@ -371,6 +755,9 @@ class SensorCacheService:
         for pattern in patterns:
             await self.cache.delete_pattern(pattern)
 
+        if device_id:
+            self.ring_buffer.discard(device_id, sensor_type)
+
     async def invalidate_static_cache(self, data_type: str) -> None:
         """
         Invalidate static data cache
@@ -396,45 +783,150 @@ class SensorCacheService:
         user_id: str,
         device_ids: list[str] | None = None,
         sensor_types: list[str] | None = None,
-    ) -> list[SensorReading]:
-        """Fetch latest sensor readings from database"""
-        try:
-            # Get Supabase client
-            client = await get_db().__anext__()
-
-            # TODO: Implement proper Supabase query
-            # For now, return mock data to allow tests to pass
-            logger.info(
-                f"Fetching latest sensor readings for user {user_id}, devices {device_ids}, types {sensor_types}"
-            )
+    ) -> list[SensorReading] | None:
+        """
+        Fetch the latest reading per device and sensor type from database.
 
-            # Return empty list for now - this would be replaced with actual Supabase queries
-            return []
+        Returns None if the fetch failed.
+        """
+        try:
+            client = await get_shared_async_supabase_client()
+            result = await client.rpc(
+                "get_latest_sensor_readings",
+                {
+                    "p_user_id": user_id,
+                    "p_device_ids": device_ids or None,
+                    "p_reading_types": sensor_types or None,
+                    "p_lookback_hours": LATEST_READING_LOOKBACK_HOURS,
+                },
+            ).execute()
+            return [_reading_from_row(row) for row in result.data or []]
 
         except Exception as e:
             logger.error(f"Error fetching latest sensor readings from DB: {e}")
-            return []
+            return None
 
     async def _fetch_sensor_history_from_db(
         self, user_id: str, device_id: str, sensor_type: str, hours: int
-    ) -> list[SensorReading]:
-        """Fetch sensor history from database"""
+    ) -> list[SensorReading] | None:
+        """
+        Fetch sensor history from database.
+
+        The window is read in keyset-paginated pages so long windows are not
+        truncated by the PostgREST row limit. Returns None if the fetch
+        failed, so callers can tell an error from an empty window.
+        """
         try:
-            # Get Supabase client
-            client = await get_db().__anext__()
+            since = datetime.now(timezone.utc) - timedelta(hours=hours)
+            rows = await _rpc_pages(
+                "get_sensor_history",
+                {
+                    "p_user_id": user_id,
+                    "p_device_id": device_id,
+                    "p_reading_type": sensor_type,
+                    "p_since": since.isoformat(),
+                },
+                lambda last: {
+                    "p_after_timestamp": last["timestamp"],
+                    "p_after_id": last["id"],
+                },
+            )
+            return [_reading_from_row(row) for row in rows]
 
-            # TODO: Implement proper Supabase query
-            # For now, return mock data to allow tests to pass
-            logger.info(
-                f"Fetching sensor history for device {device_id}, sensor {sensor_type}, hours {hours}"
+        except Exception as e:
+            logger.error(f"Error fetching sensor history from DB: {e}")
+            return None
+
+    async def _fetch_rollup_history_from_db(
+        self,
+        user_id: str,
+        device_id: str,
+        sensor_type: str,
+        hours: int,
+        resolution: str,
+    ) -> list[SensorReading] | None:
+        """
+        Fetch rolled-up sensor history (one reading per bucket) from database.
+
+        Returns None if the fetch failed.
+        """
+        try:
+            since = datetime.now(timezone.utc) - timedelta(hours=hours)
+            rows = await _rpc_pages(
+                "get_sensor_rollup_history",
+                {
+                    "p_user_id": user_id,
+                    "p_device_id": device_id,
+                    "p_reading_type": sensor_type,
+                    "p_resolution": resolution,
+                    "p_since": since.isoformat(),
+                },
+                lambda last: {"p_after": last["bucket_start"]},
             )
+            return [
+                SensorReading(
+                    id=None,
+                    device_assignment_id=row["device_assignment_id"],
+                    reading_type=row["reading_type"],
+                    value=float(row["avg_value"]),
+                    unit=row.get("unit"),
+                    timestamp=_parse_timestamp(row["bucket_start"]),
+                    device_name=row.get("device_name"),
+                    location=row.get("location"),
+                )
+                for row in rows
+            ]
 
-            # Return empty list for now - this would be replaced with actual Supabase queries
-            return []
+        except Exception as e:
+            logger.error(f"Error fetching sensor rollup history from DB: {e}")
+            return None
+
+    async def _fetch_history_series_from_db(
+        self,
+        user_id: str,
+        series: list[tuple[str, str]],
+        resolution: str,
+        since: datetime,
+    ) -> dict[tuple[str, str], list[SensorReading]] | None:
+        """
+        Fetch several history series with one query.
+
+        Each series comes back as a single row of parallel timestamp/value
+        arrays, so the query is not limited by the PostgREST row limit.
+        Returns None if the fetch failed; series without data are simply
+        absent from a successful result.
+        """
+        try:
+            client = await get_shared_async_supabase_client()
+            result = await client.rpc(
+                "get_sensor_history_series",
+                {
+                    "p_user_id": user_id,
+                    "p_device_ids": [device_id for device_id, _ in series],
+                    "p_reading_types": [sensor_type for _, sensor_type in series],
+                    "p_resolution": resolution,
+                    "p_since": since.isoformat(),
+                },
+            ).execute()
+            return {
+                (row["device_assignment_id"], row["reading_type"]): (
+                    _readings_from_columns(
+                        row["device_assignment_id"],
+                        row["reading_type"],
+                        row["timestamps"],
+                        row["values"],
+                        row.get("ids") or [NO_ID] * len(row["timestamps"]),
+                        unit=row.get("unit"),
+                        device_name=row.get("device_name"),
+                        location=row.get("location"),
+                    )
+                )
+                for row in result.data or []
+            }
 
         except Exception as e:
-            logger.error(f"Error fetching sensor history from DB: {e}")
-            return []
+            logger.error(f"Error fetching sensor history series from DB: {e}")
+            return None
 
     async def _fetch_sensor_aggregates_from_db(
         self,
@@ -442,81 +934,188 @@ class SensorCacheService:
         device_ids: list[str] | None = None,
         sensor_types: list[str] | None = None,
         period_hours: int = 24,
-    ) -> list[SensorAggregate]:
-        """Fetch sensor aggregates from database"""
-        try:
-            # Get Supabase client
-            client = await get_db().__anext__()
-
-            # TODO: Implement proper Supabase query
-            # For now, return mock data to allow tests to pass
-            logger.info(
-                f"Fetching sensor aggregates for user {user_id}, devices {device_ids}, types {sensor_types}"
-            )
+    ) -> list[SensorAggregate] | None:
+        """
+        Fetch sensor aggregates from database.
 
-            # Return empty list for now - this would be replaced with actual Supabase queries
-            return []
+        Aggregates are combined from hourly rollups for whole hours and
+        minute rollups for the partial hours at either end of the period.
+        Returns None if the fetch failed.
+        """
+        try:
+            client = await get_shared_async_supabase_client()
+            result = await client.rpc(
+                "get_sensor_aggregates_from_rollups",
+                {
+                    "p_user_id": user_id,
+                    "p_device_ids": device_ids or None,
+                    "p_reading_types": sensor_types or None,
+                    "p_period_hours": period_hours,
+                },
+            ).execute()
+            return [
+                SensorAggregate(
+                    device_assignment_id=row["device_assignment_id"],
+                    sensor_type=row["reading_type"],
+                    avg_value=float(row["avg_value"]),
+                    min_value=float(row["min_value"]),
+                    max_value=float(row["max_value"]),
+                    count=int(row["count"]),
+                    period_start=_parse_timestamp(row["period_start"]),
+                    period_end=_parse_timestamp(row["period_end"]),
+                )
+                for row in result.data or []
+            ]
 
         except Exception as e:
             logger.error(f"Error fetching sensor aggregates from DB: {e}")
-            return []
-
-    async def _fetch_species_from_db(self) -> list[dict[str, Any]]:
-        """Fetch species data from database"""
-        try:
-            # Get Supabase client
-            client = await get_db().__anext__()
+            return None
 
-            # TODO: Implement proper Supabase query
-            # For now, return mock data to allow tests to pass
-            logger.info("Fetching species data from database")
+    async def _fetch_static_data_from_db(
+        self, key_type: CacheKeyType
+    ) -> list[dict[str, Any]]:
+        """
+        Fetch one static data set via the shared static catalog load.
 
-            # Return empty list for now - this would be replaced with actual Supabase queries
-            return []
+        Species, varieties and recipes are loaded together; concurrent misses
+        for any of them share a single database call.
+        """
+        catalog = await self._single_flight.do(
+            "static_catalog", self._load_static_catalog
+        )
+        return catalog.get(key_type, [])
 
-        except Exception as e:
-            logger.error(f"Error fetching species from DB: {e}")
-            return []
+    async def _load_static_catalog(self) -> dict[CacheKeyType, list[dict[str, Any]]]:
+        """
+        Fetch species, varieties and recipes in one call and cache all three.
 
-    async def _fetch_plant_varieties_from_db(self) -> list[dict[str, Any]]:
-        """Fetch plant varieties data from database"""
+        Returns:
+            Static data sets keyed by their cache key type
+        """
         try:
-            # Get Supabase client
-            client = await get_db().__anext__()
-
-            # TODO: Implement proper Supabase query
-            # For now, return mock data to allow tests to pass
-            logger.info("Fetching plant varieties data from database")
+            client = await get_shared_async_supabase_client()
+            result = await client.rpc("get_static_catalog").execute()
+            data = result.data or {}
+        except Exception as e:
+            logger.error(f"Error fetching static catalog from DB: {e}")
+            return {}
 
-            # Return empty list for now - this would be replaced with actual Supabase queries
-            return []
+        catalog = {
+            key_type: data.get(field) or []
+            for key_type, field in STATIC_CATALOG_FIELDS.items()
+        }
 
-        except Exception as e:
-            logger.error(f"Error fetching plant varieties from DB: {e}")
-            return []
+        # All static types share one TTL, so one multi-key write covers them
+        encode, _ = self._codec()
+        ttl = self.default_ttl[CacheKeyType.STATIC_SPECIES]
+        fresh_until = time.time() + ttl
+        await self.cache.set_many(
+            {
+                self._get_cache_key(key_type): {
+                    "value": encode(rows),
+                    "fresh_until": fresh_until,
+                }
+                for key_type, rows in catalog.items()
+                if rows
+            },
+            ttl_seconds=ttl + self.stale_ttl[CacheKeyType.STATIC_SPECIES],
+        )
+        return catalog
+
+
+async def _rpc_pages(
+    function: str,
+    params: dict[str, Any],
+    cursor: Callable[[dict[str, Any]], dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """
+    Call a keyset-paginated query function until a short page is returned.
+
+    Args:
+        function: Name of the SQL function
+        params: Arguments for the first page
+        cursor: Builds the keyset arguments for the page after a given row
+
+    Returns:
+        Rows of all pages in order
+    """
+    client = await get_shared_async_supabase_client()
+    params = {**params, "p_limit": HISTORY_PAGE_SIZE}
+    rows: list[dict[str, Any]] = []
+    while True:
+        result = await client.rpc(function, params).execute()
+        page = result.data or []
+        rows.extend(page)
+        if len(page) < HISTORY_PAGE_SIZE:
+            return rows
+        params = {**params, **cursor(page[-1])}
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """Parse a PostgREST timestamptz value"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _readings_from_columns(
+    device_id: str,
+    sensor_type: str,
+    timestamps: Iterable[float],
+    values: Iterable[float],
+    ids: Iterable[int],
+    unit: str | None = None,
+    device_name: str | None = None,
+    location: str | None = None,
+) -> list[SensorReading]:
+    """Build readings of one series from parallel epoch/value/id columns"""
+    return [
+        SensorReading(
+            id=None if reading_id == NO_ID else reading_id,
+            device_assignment_id=device_id,
+            reading_type=sensor_type,
+            value=value,
+            unit=unit,
+            timestamp=datetime.fromtimestamp(timestamp, tz=timezone.utc),
+            device_name=device_name,
+            location=location,
+        )
+        for timestamp, value, reading_id in zip(timestamps, values, ids, strict=True)
+    ]
 
-    async def _fetch_grow_recipes_from_db(self) -> list[dict[str, Any]]:
-        """Fetch grow recipes data from database"""
-        try:
-            # Get Supabase client
-            client = await get_db().__anext__()
 
-            # TODO: Implement proper Supabase query
-            # For now, return mock data to allow tests to pass
-            logger.info("Fetching grow recipes data from database")
+def _reading_from_row(row: dict[str, Any]) -> SensorReading:
+    """Build a SensorReading from a sensor query function row"""
+    return SensorReading(
+        id=row.get("id"),
+        device_assignment_id=row["device_assignment_id"],
+        reading_type=row["reading_type"],
+        value=float(row["value"]),
+        unit=row.get("unit"),
+        timestamp=_parse_timestamp(row["timestamp"]),
+        device_name=row.get("device_name"),
+        location=row.get("location"),
+    )
 
-            # Return empty list for now - this would be replaced with actual Supabase queries
-            return []
 
-        except Exception as e:
-            logger.error(f"Error fetching grow recipes from DB: {e}")
-            return []
+# Global sensor cache service instance (shared so in-flight fetches coalesce)
+_sensor_cache_service: SensorCacheService | None = None
 
 
 # Dependency injection helper
 def get_sensor_cache_service() -> SensorCacheService:
     """Get sensor cache service instance"""
-    from app.core.cache import get_cache_manager
-
-    cache_manager = get_cache_manager()
-    return SensorCacheService(cache_manager)
+    global _sensor_cache_service
+    if _sensor_cache_service is None:
+        from app.core.cache import get_cache_manager
+        from app.core.config import get_settings
+
+        settings = get_settings()
+        _sensor_cache_service = SensorCacheService(
+            get_cache_manager(),
+            SensorRingBuffer(
+                capacity=settings.SENSOR_BUFFER_CAPACITY,
+                max_series=settings.SENSOR_BUFFER_MAX_SERIES,
+            ),
+            history_point_budget=settings.SENSOR_HISTORY_POINT_BUDGET,
+            raw_interval_seconds=settings.SENSOR_RAW_INTERVAL_SECONDS,
+        )
+    return _sensor_cache_service
@@ -0,0 +1,129 @@
+"""
+Sensor Downsampling
+
+Reduces a time series to a fixed number of points for charting.
+
+Two modes are supported:
+
+- ``lttb``: Largest-Triangle-Three-Buckets, which keeps the points that
+  preserve the visual shape of the series
+- ``minmax``: the minimum and maximum of each bucket, which guarantees that
+  spikes and dips survive downsampling
+
+Both functions return indices into the input columns, so the caller can
+pick whichever fields it needs from the original rows. Work per point is a
+handful of float operations and bucket averages use C-level ``fsum`` over
+slices, so a week of raw readings is reduced in a few milliseconds.
+"""
+
+import math
+from collections.abc import Sequence
+from typing import Literal
+
+DownsampleMode = Literal["lttb", "minmax"]
+
+
+def lttb_indices(xs: Sequence[float], ys: Sequence[float], threshold: int) -> list[int]:
+    """
+    Select points with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are always kept. The points in between are
+    split into ``threshold - 2`` buckets, and from each bucket the point
+    forming the largest triangle with the previously selected point and the
+    average of the next bucket is kept.
+
+    Args:
+        xs: Ascending x values (e.g. epoch seconds)
+        ys: Y values
+        threshold: Number of points to keep
+
+    Returns:
+        Ascending indices of the selected points
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        # Average point of the next bucket (the last point for the final one)
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        count = next_end - next_start
+        avg_x = math.fsum(xs[next_start:next_end]) / count
+        avg_y = math.fsum(ys[next_start:next_end]) / count
+
+        ax = xs[a]
+        ay = ys[a]
+        dx = ax - avg_x
+        dy = avg_y - ay
+        best = start = int(i * every) + 1
+        best_area = -1.0
+        for j in range(start, int((i + 1) * every) + 1):
+            # Twice the triangle area; the constant factor does not matter
+            area = abs(dx * (ys[j] - ay) - (ax - xs[j]) * dy)
+            if area > best_area:
+                best_area = area
+                best = j
+
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return selected
+
+
+def min_max_indices(ys: Sequence[float], threshold: int) -> list[int]:
+    """
+    Select the minimum and maximum point of each bucket.
+
+    Args:
+        ys: Y values in x order
+        threshold: Maximum number of points to keep
+
+    Returns:
+        Ascending indices of the selected points
+    """
+    n = len(ys)
+    if threshold >= n or threshold < 2:
+        return list(range(n))
+
+    buckets = threshold // 2
+    every = n / buckets
+    selected: list[int] = []
+    for i in range(buckets):
+        start = int(i * every)
+        end = int((i + 1) * every)
+        window = ys[start:end]
+        low = start + window.index(min(window))
+        high = start + window.index(max(window))
+        if low == high:
+            selected.append(low)
+        else:
+            selected.extend(sorted((low, high)))
+    return selected
+
+
+def downsample_indices(
+    xs: Sequence[float],
+    ys: Sequence[float],
+    max_points: int,
+    mode: DownsampleMode = "lttb",
+) -> list[int]:
+    """
+    Select at most ``max_points`` points of a series.
+
+    Args:
+        xs: Ascending x values
+        ys: Y values
+        max_points: Maximum number of points to keep
+        mode: ``"lttb"`` or ``"minmax"``
+
+    Returns:
+        Ascending indices of the selected points
+    """
+    if mode == "minmax":
+        return min_max_indices(ys, max_points)
+    return lttb_indices(xs, ys, max_points)
@@ -0,0 +1,502 @@
+"""
+Sensor Ingestion Service
+
+High-throughput write path for ``sensor_readings``.
+
+Gateways post thousands of readings per request, either as NDJSON (one
+reading object per line) or as columnar JSON (one array per field).
+Readings from concurrent requests are collected in an in-memory buffer and
+written together (group commit): the buffer is flushed as soon as it holds
+``flush_size`` readings, or ``flush_interval`` seconds after the first
+reading arrived. Each request waits for the flush containing its readings
+and is acknowledged with that batch's id, so an acknowledgement means the
+readings are durably stored.
+
+Batches are written with ``COPY`` through DatabaseService's asyncpg pool.
+When no direct database connection is configured, they fall back to one
+multi-row PostgREST insert per batch.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any
+
+from app.db.supabase_client import get_shared_async_supabase_client
+from app.services.database_service import get_database
+from app.services.sensor_cache_service import SensorCacheService, SensorReading
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Columns written per reading, in COPY order
+SENSOR_READING_COLUMNS = [
+    "device_assignment_id",
+    "reading_type",
+    "value",
+    "unit",
+    "timestamp",
+]
+# How long a user's set of owned devices is trusted before re-checking
+OWNED_DEVICES_TTL_SECONDS = 60.0
+# Maximum number of row errors reported back per request
+MAX_REPORTED_ERRORS = 100
+
+
+class IngestionError(Exception):
+    """Raised when a payload cannot be accepted"""
+
+
+class TooManyReadingsError(IngestionError):
+    """Raised when a payload holds more readings than a request may carry"""
+
+
+class IngestionBufferFullError(IngestionError):
+    """Raised when the write buffer is full and the caller should retry later"""
+
+
+@dataclass(frozen=True, slots=True)
+class RowError:
+    """A reading rejected during validation"""
+
+    index: int
+    error: str
+
+
+@dataclass(frozen=True, slots=True)
+class BatchAck:
+    """Acknowledgement for readings durably written as part of one batch"""
+
+    batch_id: str
+    accepted: int
+    written_at: datetime
+
+
+@dataclass(slots=True)
+class _PendingBatch:
+    """Readings buffered for the next flush"""
+
+    batch_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    readings: list[tuple[str, SensorReading]] = field(default_factory=list)
+    done: asyncio.Future = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+
+def _loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _parse_timestamp(value: Any, now: datetime) -> datetime:
+    """Parse an ISO 8601 string or epoch seconds; missing means ``now``"""
+    if value is None:
+        return now
+    if isinstance(value, int | float) and not isinstance(value, bool):
+        try:
+            return datetime.fromtimestamp(value, tz=timezone.utc)
+        except (OverflowError, OSError) as e:
+            raise ValueError("timestamp is out of range") from e
+    if isinstance(value, str):
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    raise ValueError("timestamp must be an ISO 8601 string or epoch seconds")
+
+
+def _build_reading(
+    device_id: Any,
+    reading_type: Any,
+    value: Any,
+    unit: Any,
+    timestamp: Any,
+    now: datetime,
+) -> SensorReading:
+    if not isinstance(device_id, str):
+        raise ValueError("device_assignment_id is required")
+    if not isinstance(reading_type, str) or not reading_type:
+        raise ValueError("reading_type is required")
+    if isinstance(value, bool) or not isinstance(value, int | float):
+        raise ValueError("value must be a number")
+    if not math.isfinite(value):
+        raise ValueError("value must be finite")
+    if unit is not None and not isinstance(unit, str):
+        raise ValueError("unit must be a string")
+
+    return SensorReading(
+        id=None,
+        device_assignment_id=str(uuid.UUID(device_id)),
+        reading_type=reading_type,
+        value=float(value),
+        unit=unit,
+        timestamp=_parse_timestamp(timestamp, now),
+    )
+
+
+def _too_many_readings(max_readings: int) -> TooManyReadingsError:
+    return TooManyReadingsError(
+        f"Too many readings, send at most {max_readings} per request"
+    )
+
+
+def parse_ndjson(
+    body: bytes, max_readings: int | None = None
+) -> tuple[list[tuple[int, SensorReading]], list[RowError]]:
+    """
+    Parse newline-delimited reading objects.
+
+    Each non-empty line is an object with ``device_assignment_id``,
+    ``reading_type``, ``value`` and optional ``unit`` and ``timestamp``.
+
+    Args:
+        body: Request body
+        max_readings: Stop at the first line past this many readings
+
+    Returns:
+        (index, reading) pairs for valid lines and errors for invalid ones
+
+    Raises:
+        TooManyReadingsError: If the body holds more than max_readings lines
+    """
+    now = datetime.now(timezone.utc)
+    readings: list[tuple[int, SensorReading]] = []
+    errors: list[RowError] = []
+    index = 0
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        if max_readings is not None and index >= max_readings:
+            raise _too_many_readings(max_readings)
+        try:
+            row = _loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("each line must be a JSON object")
+            readings.append(
+                (
+                    index,
+                    _build_reading(
+                        row.get("device_assignment_id"),
+                        row.get("reading_type"),
+                        row.get("value"),
+                        row.get("unit"),
+                        row.get("timestamp"),
+                        now,
+                    ),
+                )
+            )
+        except ValueError as e:
+            errors.append(RowError(index=index, error=str(e)))
+        index += 1
+    return readings, errors
+
+
+def parse_columnar(
+    body: bytes, max_readings: int | None = None
+) -> tuple[list[tuple[int, SensorReading]], list[RowError]]:
+    """
+    Parse a columnar JSON reading payload.
+
+    ``value`` is an array with one entry per reading. ``device_assignment_id``,
+    ``reading_type``, ``unit`` and ``timestamp`` are either arrays of the same
+    length or a single value applied to every reading.
+
+    Args:
+        body: Request body
+        max_readings: Reject payloads with more readings before building any
+
+    Returns:
+        (index, reading) pairs for valid rows and errors for invalid ones
+
+    Raises:
+        TooManyReadingsError: If ``value`` has more than max_readings entries
+        IngestionError: If the payload shape is invalid
+        ValueError: If the body is not valid JSON
+    """
+    payload = _loads(body)
+    if not isinstance(payload, dict) or not isinstance(payload.get("value"), list):
+        raise IngestionError("Columnar payload must contain a 'value' array")
+
+    count = len(payload["value"])
+    if max_readings is not None and count > max_readings:
+        raise _too_many_readings(max_readings)
+    columns = {}
+    for name in SENSOR_READING_COLUMNS:
+        column = payload.get(name)
+        if isinstance(column, list):
+            if len(column) != count:
+                raise IngestionError(f"Column '{name}' must have {count} entries")
+            columns[name] = column
+        else:
+            columns[name] = [column] * count
+
+    now = datetime.now(timezone.utc)
+    readings: list[tuple[int, SensorReading]] = []
+    errors: list[RowError] = []
+    for index, row in enumerate(zip(*columns.values(), strict=True)):
+        try:
+            readings.append((index, _build_reading(*row, now)))
+        except ValueError as e:
+            errors.append(RowError(index=index, error=str(e)))
+    return readings, errors
+
+
+class SensorIngestionService:
+    """Buffers incoming readings and writes them to the database in batches"""
+
+    def __init__(
+        self,
+        flush_size: int = 5_000,
+        flush_interval: float = 0.25,
+        max_buffered: int = 50_000,
+        sensor_cache: SensorCacheService | None = None,
+        database_factory: Callable[[], Awaitable[Any]] = get_database,
+        supabase_factory: Callable[[], Awaitable[Any]] = (
+            get_shared_async_supabase_client
+        ),
+    ) -> None:
+        """
+        Args:
+            flush_size: Buffered readings that trigger an immediate flush
+            flush_interval: Maximum seconds a reading waits to be flushed
+            max_buffered: Readings buffered or being written before rejecting
+            sensor_cache: Receives written readings for its ring buffer
+            database_factory: Returns the DatabaseService (or None)
+            supabase_factory: Returns the async Supabase service client
+        """
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.sensor_cache = sensor_cache
+        self._get_database = database_factory
+        self._get_supabase = supabase_factory
+        self._pending: _PendingBatch | None = None
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+        self._in_flight = 0
+        self._owned_devices: dict[str, tuple[float, frozenset[str]]] = {}
+
+    @property
+    def buffered(self) -> int:
+        """Readings buffered or currently being written"""
+        pending = len(self._pending.readings) if self._pending else 0
+        return pending + self._in_flight
+
+    async def ingest(
+        self, user_id: str, readings: list[tuple[int, SensorReading]]
+    ) -> tuple[BatchAck | None, list[RowError]]:
+        """
+        Validate ownership and write readings as part of the next batch.
+
+        Args:
+            user_id: Authenticated user submitting the readings
+            readings: (request index, reading) pairs that passed parsing
+
+        Returns:
+            The batch acknowledgement (None if nothing was accepted) and the
+            readings rejected because the device does not belong to the user
+
+        Raises:
+            IngestionBufferFullError: If the buffer cannot take the readings
+        """
+        device_ids = {reading.device_assignment_id for _, reading in readings}
+        owned = await self._get_owned_devices(user_id, device_ids)
+
+        accepted = []
+        errors = []
+        for index, reading in readings:
+            if reading.device_assignment_id in owned:
+                accepted.append(reading)
+            else:
+                errors.append(RowError(index=index, error="unknown device"))
+
+        if not accepted:
+            return None, errors
+        return await self.submit(user_id, accepted), errors
+
+    async def submit(self, user_id: str, readings: list[SensorReading]) -> BatchAck:
+        """
+        Add readings to the buffer and wait until their batch is written.
+
+        Raises:
+            IngestionBufferFullError: If the buffer cannot take the readings
+        """
+        if self.buffered + len(readings) > self.max_buffered:
+            raise IngestionBufferFullError("Ingestion buffer is full, retry later")
+
+        if self._pending is None:
+            self._pending = _PendingBatch()
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._start_flush
+            )
+        batch = self._pending
+        batch.readings.extend((user_id, reading) for reading in readings)
+        if len(batch.readings) >= self.flush_size:
+            self._start_flush()
+
+        await asyncio.shield(batch.done)
+        return BatchAck(
+            batch_id=batch.batch_id,
+            accepted=len(readings),
+            written_at=batch.done.result(),
+        )
+
+    def _start_flush(self) -> None:
+        """Detach the pending batch and write it in the background"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        batch, self._pending = self._pending, None
+        if batch is None:
+            return
+
+        self._in_flight += len(batch.readings)
+        task = asyncio.create_task(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: _PendingBatch) -> None:
+        started = time.perf_counter()
+        try:
+            await self._write([reading for _, reading in batch.readings])
+        except Exception as e:
+            logger.error(f"Failed to write sensor batch {batch.batch_id}: {e}")
+            batch.done.set_exception(IngestionError("Failed to write readings"))
+            # Callers may all have been cancelled; avoid "never retrieved" noise
+            batch.done.exception()
+            return
+        finally:
+            self._in_flight -= len(batch.readings)
+
+        batch.done.set_result(datetime.now(timezone.utc))
+        logger.debug(
+            f"Wrote sensor batch {batch.batch_id} ({len(batch.readings)} readings) "
+            f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+        self._record(batch)
+
+    async def _write(self, readings: list[SensorReading]) -> None:
+        """Write readings with COPY, or a multi-row insert as a fallback"""
+        database = await self._get_database()
+        if database is not None and database.is_available:
+            await database.copy_records_to_table(
+                "sensor_readings",
+                records=[
+                    (
+                        uuid.UUID(r.device_assignment_id),
+                        r.reading_type,
+                        Decimal(repr(r.value)),
+                        r.unit,
+                        r.timestamp,
+                    )
+                    for r in readings
+                ],
+                columns=SENSOR_READING_COLUMNS,
+            )
+            return
+
+        client = await self._get_supabase()
+        await (
+            client.table("sensor_readings")
+            .insert(
+                [
+                    {
+                        "device_assignment_id": r.device_assignment_id,
+                        "reading_type": r.reading_type,
+                        "value": r.value,
+                        "unit": r.unit,
+                        "timestamp": r.timestamp.isoformat(),
+                    }
+                    for r in readings
+                ],
+                returning="minimal",
+            )
+            .execute()
+        )
+
+    def _record(self, batch: _PendingBatch) -> None:
+        """Append written readings to the sensor cache's ring buffer"""
+        if self.sensor_cache is None:
+            return
+        by_user: dict[str, list[SensorReading]] = {}
+        for user_id, reading in batch.readings:
+            by_user.setdefault(user_id, []).append(reading)
+        for user_id, readings in by_user.items():
+            readings.sort(key=lambda r: r.timestamp)
+            self.sensor_cache.record_readings(user_id, readings)
+
+    async def _get_owned_devices(
+        self, user_id: str, device_ids: set[str]
+    ) -> frozenset[str]:
+        """
+        Get the user's device assignment ids, re-checking unknown devices.
+
+        The owned set is cached briefly per user so a gateway posting every
+        second does not cost an ownership query per request.
+        """
+        cached = self._owned_devices.get(user_id)
+        if (
+            cached is not None
+            and time.monotonic() < cached[0]
+            and device_ids <= cached[1]
+        ):
+            return cached[1]
+
+        client = await self._get_supabase()
+        result = await (
+            client.table("device_assignments")
+            .select("id")
+            .eq("user_id", user_id)
+            .execute()
+        )
+        owned = frozenset(row["id"] for row in result.data or [])
+        self._owned_devices[user_id] = (
+            time.monotonic() + OWNED_DEVICES_TTL_SECONDS,
+            owned,
+        )
+        return owned
+
+    async def close(self) -> None:
+        """Flush buffered readings and wait for in-flight writes"""
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+# Global ingestion service instance (one buffer per worker)
+_sensor_ingestion_service: SensorIngestionService | None = None
+
+
+def get_sensor_ingestion_service() -> SensorIngestionService:
+    """Get sensor ingestion service instance"""
+    global _sensor_ingestion_service
+    if _sensor_ingestion_service is None:
+        from app.core.config import get_settings
+        from app.services.sensor_cache_service import get_sensor_cache_service
+
+        settings = get_settings()
+        _sensor_ingestion_service = SensorIngestionService(
+            flush_size=settings.SENSOR_INGEST_FLUSH_SIZE,
+            flush_interval=settings.SENSOR_INGEST_FLUSH_INTERVAL_SECONDS,
+            max_buffered=settings.SENSOR_INGEST_MAX_BUFFERED,
+            sensor_cache=get_sensor_cache_service(),
+        )
+    return _sensor_ingestion_service
+
+
+async def close_sensor_ingestion_service() -> None:
+    """Flush and release the ingestion service, if it was created"""
+    global _sensor_ingestion_service
+    if _sensor_ingestion_service is not None:
+        await _sensor_ingestion_service.close()
+        _sensor_ingestion_service = None
@@ -0,0 +1,339 @@
+"""
+Sensor Ring Buffer
+
+Compact, columnar in-memory storage for recent sensor readings.
+
+Each (device_assignment_id, reading_type) series is held in fixed-size
+circular ``array`` columns of timestamps, values and row ids, so the last
+N readings of a series always occupy the same amount of memory. History
+windows are answered by binary search and slicing, and aggregates are
+computed with C-level ``min``/``max``/``fsum`` over the sliced columns.
+
+A series is only used to answer queries while it is known to be complete
+for the requested window: it must have been seeded from the database
+recently (bounded staleness, like the response cache) and must not have
+overwritten readings inside the window. Readings ingested by this worker
+are appended as they arrive.
+"""
+
+import bisect
+import logging
+import math
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Sentinel stored in the id column for readings without a database id
+NO_ID = -1
+
+
+@dataclass(frozen=True, slots=True)
+class SeriesWindow:
+    """Columnar slice of one series, in chronological order"""
+
+    timestamps: array
+    values: array
+    ids: array
+    unit: str | None
+    device_name: str | None
+    location: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class SeriesStats:
+    """Summary statistics over one series window"""
+
+    count: int
+    min_value: float
+    max_value: float
+    avg_value: float
+
+
+class SensorSeries:
+    """Fixed-capacity circular buffer for one device/reading type series"""
+
+    __slots__ = (
+        "user_id",
+        "unit",
+        "device_name",
+        "location",
+        "seeded_at",
+        "complete_since",
+        "_capacity",
+        "_timestamps",
+        "_values",
+        "_ids",
+        "_start",
+        "_count",
+    )
+
+    def __init__(self, capacity: int, user_id: str) -> None:
+        self.user_id = user_id
+        self.unit: str | None = None
+        self.device_name: str | None = None
+        self.location: str | None = None
+        # Monotonic time of the last database seed (None = never seeded)
+        self.seeded_at: float | None = None
+        # Earliest timestamp from which the buffer holds every reading
+        self.complete_since = math.inf
+        self._capacity = capacity
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._ids = array("q", bytes(8 * capacity))
+        self._start = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def newest_timestamp(self) -> float | None:
+        if not self._count:
+            return None
+        return self._timestamps[(self._start + self._count - 1) % self._capacity]
+
+    def append(self, timestamp: float, value: float, reading_id: int | None) -> bool:
+        """
+        Append a reading, overwriting the oldest one when full.
+
+        Readings older than the newest buffered reading are ignored so the
+        columns stay sorted by time.
+
+        Returns:
+            True if the reading was stored
+        """
+        newest = self.newest_timestamp
+        if newest is not None and timestamp < newest:
+            return False
+
+        if self._count == self._capacity:
+            # Overwrite the oldest reading; the window before it is now lost
+            overwritten = self._timestamps[self._start]
+            self.complete_since = max(
+                self.complete_since, math.nextafter(overwritten, math.inf)
+            )
+            index = self._start
+            self._start = (self._start + 1) % self._capacity
+        else:
+            index = (self._start + self._count) % self._capacity
+            self._count += 1
+
+        self._timestamps[index] = timestamp
+        self._values[index] = value
+        self._ids[index] = NO_ID if reading_id is None else reading_id
+        return True
+
+    def seed(
+        self, rows: Iterable[tuple[float, float, int | None]], since: float
+    ) -> None:
+        """
+        Replace the buffer contents with readings loaded from the database.
+
+        Args:
+            rows: Every (timestamp, value, id) of the series since ``since``
+            since: Start of the window the rows were loaded for
+        """
+        self._start = 0
+        self._count = 0
+        self.complete_since = since
+        for timestamp, value, reading_id in sorted(rows, key=lambda row: row[0]):
+            self.append(timestamp, value, reading_id)
+        self.seeded_at = time.monotonic()
+
+    def update_metadata(
+        self,
+        unit: str | None = None,
+        device_name: str | None = None,
+        location: str | None = None,
+    ) -> None:
+        if unit is not None:
+            self.unit = unit
+        if device_name is not None:
+            self.device_name = device_name
+        if location is not None:
+            self.location = location
+
+    def covers(self, since: float, max_staleness: float) -> bool:
+        """Check whether every reading since ``since`` is buffered and fresh"""
+        return (
+            self.seeded_at is not None
+            and time.monotonic() - self.seeded_at <= max_staleness
+            and since >= self.complete_since
+        )
+
+    def window(self, since: float) -> tuple[array, array, array]:
+        """
+        Get the timestamp, value and id columns for readings since ``since``.
+
+        Returns:
+            Chronologically ordered (timestamps, values, ids) arrays
+        """
+        end = self._start + self._count
+        if end <= self._capacity:
+            segments = [(self._start, end)]
+        else:
+            segments = [(self._start, self._capacity), (0, end - self._capacity)]
+
+        timestamps, values, ids = array("d"), array("d"), array("q")
+        for lo, hi in segments:
+            first = bisect.bisect_left(self._timestamps, since, lo, hi)
+            timestamps.extend(self._timestamps[first:hi])
+            values.extend(self._values[first:hi])
+            ids.extend(self._ids[first:hi])
+        return timestamps, values, ids
+
+
+class SensorRingBuffer:
+    """
+    Registry of per-series ring buffers.
+
+    The number of series is bounded; the least recently used series is
+    dropped when the limit is reached, so total memory is fixed at roughly
+    ``max_series * capacity * 24`` bytes.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 4320,
+        max_series: int = 256,
+        max_staleness_seconds: float = 900,
+    ) -> None:
+        self.capacity = capacity
+        self.max_series = max_series
+        self.max_staleness_seconds = max_staleness_seconds
+        self._series: OrderedDict[tuple[str, str], SensorSeries] = OrderedDict()
+
+    def _get_series(self, device_id: str, reading_type: str) -> SensorSeries | None:
+        series = self._series.get((device_id, reading_type))
+        if series is not None:
+            self._series.move_to_end((device_id, reading_type))
+        return series
+
+    def _create_series(
+        self, user_id: str, device_id: str, reading_type: str
+    ) -> SensorSeries:
+        series = SensorSeries(self.capacity, user_id)
+        self._series[(device_id, reading_type)] = series
+        while len(self._series) > self.max_series:
+            self._series.popitem(last=False)
+        return series
+
+    def discard(self, device_id: str, reading_type: str | None = None) -> None:
+        """Drop buffered series for a device (optionally one reading type)"""
+        for key in list(self._series):
+            if key[0] == device_id and reading_type in (None, key[1]):
+                del self._series[key]
+
+    def append(
+        self,
+        user_id: str,
+        device_id: str,
+        reading_type: str,
+        timestamp: float,
+        value: float,
+        reading_id: int | None = None,
+        **metadata: str | None,
+    ) -> None:
+        """
+        Append a newly ingested reading to its series.
+
+        Readings for series that have never been seeded are ignored, since
+        the buffer could not answer queries for them anyway.
+
+        Args:
+            metadata: Optional unit, device_name and location
+        """
+        series = self._get_series(device_id, reading_type)
+        if series is None or series.user_id != user_id:
+            return
+        if series.append(timestamp, value, reading_id):
+            series.update_metadata(**metadata)
+
+    def seed(
+        self,
+        user_id: str,
+        device_id: str,
+        reading_type: str,
+        rows: Iterable[tuple[float, float, int | None]],
+        since: float,
+        **metadata: str | None,
+    ) -> None:
+        """
+        Load a series from a database fetch covering everything since ``since``.
+
+        Args:
+            rows: (timestamp, value, id) tuples with epoch-second timestamps
+            since: Epoch seconds at which the fetched window starts
+            metadata: Optional unit, device_name and location
+        """
+        series = self._get_series(device_id, reading_type)
+        if series is None or series.user_id != user_id:
+            series = self._create_series(user_id, device_id, reading_type)
+        series.seed(rows, since)
+        series.update_metadata(**metadata)
+
+    def _covered_series(
+        self, user_id: str, device_id: str, reading_type: str, since: float
+    ) -> SensorSeries | None:
+        series = self._get_series(device_id, reading_type)
+        if (
+            series is None
+            or series.user_id != user_id
+            or not series.covers(since, self.max_staleness_seconds)
+        ):
+            return None
+        return series
+
+    def window(
+        self, user_id: str, device_id: str, reading_type: str, since: float
+    ) -> SeriesWindow | None:
+        """
+        Get buffered readings since ``since`` (epoch seconds).
+
+        Returns:
+            The columnar window, or None if the buffer cannot answer for it
+        """
+        series = self._covered_series(user_id, device_id, reading_type, since)
+        if series is None:
+            return None
+
+        timestamps, values, ids = series.window(since)
+        return SeriesWindow(
+            timestamps=timestamps,
+            values=values,
+            ids=ids,
+            unit=series.unit,
+            device_name=series.device_name,
+            location=series.location,
+        )
+
+    def stats(
+        self, user_id: str, device_id: str, reading_type: str, since: float
+    ) -> SeriesStats | None:
+        """
+        Compute min/max/avg over buffered readings since ``since``.
+
+        Returns:
+            The statistics (count 0 for an empty window), or None if the
+            buffer cannot answer for this window
+        """
+        series = self._covered_series(user_id, device_id, reading_type, since)
+        if series is None:
+            return None
+
+        _, values, _ = series.window(since)
+        if not values:
+            return SeriesStats(
+                count=0, min_value=math.nan, max_value=math.nan, avg_value=math.nan
+            )
+
+        return SeriesStats(
+            count=len(values),
+            min_value=min(values),
+            max_value=max(values),
+            avg_value=math.fsum(values) / len(values),
+        )
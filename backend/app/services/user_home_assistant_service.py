@@ -7,11 +7,11 @@ user-isolated integration with the vertical farm system.
 
 import asyncio
 import logging
-from datetime import datetime
 from typing import TYPE_CHECKING, Any
 
 from fastapi import HTTPException, status
 
+from app.core.cache import SingleFlight, get_cache_manager
 from app.core.config import get_settings
 from app.core.security import (
     AuthenticationError,
@@ -19,15 +19,27 @@ from app.core.security import (
     is_token_expired,
     validate_websocket_token,
 )
-from app.db.supabase_client import get_async_supabase_client
+from app.db.supabase_client import get_shared_async_supabase_client
+from app.services.database_service import get_database
 from app.services.error_handling import global_error_handler
 from app.services.home_assistant_client import HomeAssistantClient
+from app.services.home_assistant_connection_registry import (
+    ConnectionKey,
+    HomeAssistantConnectionRegistry,
+    connection_key,
+)
+from app.services.home_assistant_device_index import DeviceIndex
+from app.services.home_assistant_rate_limiter import RequestPriority
 
 if TYPE_CHECKING:
     from supabase import AClient as SupabaseAsyncClient
 
 logger = logging.getLogger(__name__)
 
+# Cache key prefix and NOTIFY channel of user Home Assistant configurations
+CONFIG_CACHE_PREFIX = "ha_config:"
+CONFIG_INVALIDATION_CHANNEL = "ha_config_invalidated"
+
 
 class UserHomeAssistantService:
     """
@@ -36,11 +48,24 @@ class UserHomeAssistantService:
     """
 
     def __init__(self) -> None:
-        self._connections: dict[str, HomeAssistantClient] = {}
-        self._connection_health: dict[str, dict[str, Any]] = {}
         self.settings = get_settings()
+
+        # Clients are shared between users with the same HA configuration;
+        # each user holds a reference to the registry entry of their key
+        self.registry = HomeAssistantConnectionRegistry(
+            max_connections=self.settings.HA_MAX_CONNECTIONS,
+            idle_timeout=self.settings.HA_CONNECTION_IDLE_SECONDS,
+            on_evict=self._forget_connection_holders,
+        )
+        self._connection_keys: dict[str, ConnectionKey] = {}
+        self._connection_attempts: dict[str, asyncio.Task] = {}
+        self._config_loads = SingleFlight()
+        self._listener_tasks: set[asyncio.Task] = set()
+        self._connection_health: dict[str, dict[str, Any]] = {}
         self.user_device_subscriptions: dict[str, set[str]] = {}
-        self.user_device_cache: dict[str, dict[str, dict]] = {}
+        # Device indexes of the shared clients, by connection key
+        self._device_indexes: dict[ConnectionKey, DeviceIndex] = {}
+        self._index_loads = SingleFlight()
 
         # Register recovery callbacks with the global error handler
         global_error_handler.register_recovery_callback(
@@ -54,7 +79,7 @@ class UserHomeAssistantService:
 
             # Check all existing connections and try to recover them
             failed_connections = []
-            for user_id, connection in self._connections.items():
+            for user_id in self._connection_keys:
                 health = self._connection_health.get(user_id, {})
                 if health.get("status") != "healthy":
                     failed_connections.append(user_id)
@@ -69,16 +94,6 @@ class UserHomeAssistantService:
                         f"Failed to recover connection for user {user_id}: {e}"
                     )
 
-            # Clear old device caches
-            current_time = datetime.now()
-            for user_id in list(self.user_device_cache.keys()):
-                cache = self.user_device_cache[user_id]
-                if cache.get("timestamp"):
-                    cache_age = (current_time - cache["timestamp"]).total_seconds()
-                    if cache_age > 300:  # 5 minutes
-                        del self.user_device_cache[user_id]
-                        logger.debug(f"Cleared stale device cache for user {user_id}")
-
         except Exception as e:
             logger.error(f"Error during connection recovery: {e}")
             raise
@@ -93,8 +108,30 @@ class UserHomeAssistantService:
         Returns:
             User configuration dict or None if not found
         """
+        config = await get_cache_manager().get(f"{CONFIG_CACHE_PREFIX}{user_id}")
+        if config is not None:
+            return config
+
+        # Concurrent misses for a user share one query
+        return await self._config_loads.do(
+            user_id, lambda: self._load_user_config(user_id)
+        )
+
+    async def _load_user_config(self, user_id: str) -> dict[str, Any] | None:
+        """Query the user's configuration and cache it"""
+        config = await self._query_user_config(user_id)
+        if config is not None:
+            await get_cache_manager().set(
+                f"{CONFIG_CACHE_PREFIX}{user_id}",
+                config,
+                ttl_seconds=self.settings.HA_CONFIG_CACHE_TTL_SECONDS,
+            )
+        return config
+
+    async def _query_user_config(self, user_id: str) -> dict[str, Any] | None:
+        """Query the user's configuration from Supabase"""
         try:
-            db: SupabaseAsyncClient = await get_async_supabase_client()
+            db: SupabaseAsyncClient = await get_shared_async_supabase_client()
 
             # Supabase RLS will automatically filter to user's data
             response = (
@@ -134,7 +171,7 @@ class UserHomeAssistantService:
             Saved configuration
         """
         try:
-            db: SupabaseAsyncClient = await get_async_supabase_client()
+            db: SupabaseAsyncClient = await get_shared_async_supabase_client()
 
             # Prepare config data - Supabase handles encryption at rest
             config_data = {
@@ -171,6 +208,7 @@ class UserHomeAssistantService:
                 logger.info(f"Created new HA config for user {user_id}")
 
             if response.data:
+                await self.invalidate_user_config(user_id)
                 return response.data[0]
             else:
                 raise HTTPException(
@@ -185,6 +223,51 @@ class UserHomeAssistantService:
                 detail=f"Failed to save Home Assistant configuration: {str(e)}",
             )
 
+    async def invalidate_user_config(
+        self, user_id: str, broadcast: bool = True
+    ) -> None:
+        """
+        Forget a user's cached configuration after it changed.
+
+        The user's connection reference is dropped too, so the next request
+        connects with the new configuration.
+
+        Args:
+            user_id: User ID
+            broadcast: Also notify the other workers through Postgres
+        """
+        await get_cache_manager().delete(f"{CONFIG_CACHE_PREFIX}{user_id}")
+        await self._drop_connection(user_id)
+
+        if broadcast:
+            database = await get_database()
+            if database is not None and database.is_available:
+                try:
+                    await database.notify(CONFIG_INVALIDATION_CHANNEL, user_id)
+                except Exception as e:
+                    logger.warning(f"Failed to broadcast HA config change: {e}")
+
+    async def start_config_listener(self) -> None:
+        """
+        Invalidate cached configurations changed by other workers.
+
+        Needs a direct Postgres connection (DATABASE_URL); without one,
+        other workers' caches expire after HA_CONFIG_CACHE_TTL_SECONDS.
+        """
+        database = await get_database()
+        if database is None or not database.is_available:
+            logger.info("No database connection, HA config changes not broadcast")
+            return
+
+        def on_notification(user_id: str) -> None:
+            task = asyncio.create_task(
+                self.invalidate_user_config(user_id, broadcast=False)
+            )
+            self._listener_tasks.add(task)
+            task.add_done_callback(self._listener_tasks.discard)
+
+        await database.listen(CONFIG_INVALIDATION_CHANNEL, on_notification)
+
     async def get_or_create_connection(
         self, user_id: str, session_token: str | None = None
     ) -> HomeAssistantClient:
@@ -203,34 +286,46 @@ class UserHomeAssistantService:
             try:
                 if is_token_expired(session_token):
                     logger.warning(f"Session token expired for user {user_id}")
-                    # Clean up any existing connections for this user
-                    if user_id in self._connections:
-                        await self._connections[user_id].close()
-                        del self._connections[user_id]
-                        del self._connection_health[user_id]
+                    # Drop this user's reference to their connection
+                    await self._drop_connection(user_id)
 
                     raise SessionExpiredError("Session expired, please refresh token")
             except Exception as e:
                 logger.error(f"Token validation error for user {user_id}: {e}")
                 raise AuthenticationError(f"Token validation failed: {str(e)}")
 
+        self.registry.start_reaper(self.settings.HA_CONNECTION_REAP_INTERVAL_SECONDS)
+
         # Check if we have an existing healthy connection
-        if user_id in self._connections:
-            connection = self._connections[user_id]
+        key = self._connection_keys.get(user_id)
+        if key is not None:
+            connection = self.registry.get(key)
             health = self._connection_health.get(user_id, {})
 
             # Check connection health
             if health.get("status") == "healthy" and connection:
                 logger.debug(f"Reusing existing HA connection for user {user_id}")
+                health["last_used"] = self.registry.last_used(key)
                 return connection
             else:
                 # Remove unhealthy connection
                 logger.info(f"Removing unhealthy HA connection for user {user_id}")
-                await connection.close()
-                del self._connections[user_id]
-                del self._connection_health[user_id]
+                await self._drop_connection(user_id, close=True)
+
+        # Concurrent callers share one connection attempt per user
+        attempt = self._connection_attempts.get(user_id)
+        if attempt is None:
+            attempt = asyncio.create_task(self._connect_user(user_id))
+            self._connection_attempts[user_id] = attempt
+            attempt.add_done_callback(
+                lambda _: self._connection_attempts.pop(user_id, None)
+            )
 
-        # Create new connection
+        # Shielded so one caller going away does not cancel it for the others
+        return await asyncio.shield(attempt)
+
+    async def _connect_user(self, user_id: str) -> HomeAssistantClient:
+        """Load the user's configuration and acquire its connection"""
         config = await self.get_user_config(user_id)
         if not config:
             raise HTTPException(
@@ -244,7 +339,7 @@ class UserHomeAssistantService:
                 detail="Home Assistant integration is disabled for this user",
             )
 
-        try:
+        async def connect() -> HomeAssistantClient:
             # Create new client with config
             client = HomeAssistantClient(
                 base_url=config["url"],  # Fixed: use "url" to match database schema
@@ -253,18 +348,33 @@ class UserHomeAssistantService:
                 cloudflare_client_secret=config.get("cloudflare_client_secret"),
             )
 
-            # Test connection
-            await client.get_entities()
+            try:
+                # Test connection with a lightweight /api/ request
+                await client.ping()
+            except Exception:
+                await client.close()
+                raise
+
+            # Keep a live entity state mirror over the WebSocket; REST is
+            # used until it is seeded or when the socket is unavailable
+            client.start_websocket()
+            return client
+
+        try:
+            # Reuse the connection of another user with the same configuration
+            key = connection_key(config)
+            client = await self.registry.acquire(key, user_id, connect)
 
             # Store connection and mark as healthy
-            self._connections[user_id] = client
+            self._connection_keys[user_id] = key
             self._connection_health[user_id] = {
                 "status": "healthy",
                 "last_check": asyncio.get_event_loop().time(),
+                "last_used": self.registry.last_used(key),
                 "user_id": user_id,
             }
 
-            logger.info(f"Created new HA connection for user {user_id}")
+            logger.info(f"Acquired HA connection for user {user_id}")
             return client
 
         except Exception as e:
@@ -313,7 +423,7 @@ class UserHomeAssistantService:
         """
         health_info = {
             "user_id": user_id,
-            "connection_exists": user_id in self._connections,
+            "connection_exists": user_id in self._connection_keys,
             "connection_healthy": False,
             "last_activity": None,
             "config_exists": False,
@@ -327,12 +437,12 @@ class UserHomeAssistantService:
             pass  # Config check failed
 
         # Check connection health
-        if user_id in self._connections:
+        if user_id in self._connection_keys:
             connection_health = self._connection_health.get(user_id, {})
             health_info.update(
                 {
                     "connection_healthy": connection_health.get("status") == "healthy",
-                    "last_activity": connection_health.get("last_check"),
+                    "last_activity": connection_health.get("last_used"),
                 }
             )
 
@@ -348,43 +458,72 @@ class UserHomeAssistantService:
         Returns:
             New HomeAssistantClient instance
         """
-        # Remove existing connection
-        if user_id in self._connections:
-            await self._connections[user_id].close()
-            del self._connections[user_id]
-            del self._connection_health[user_id]
+        # Close the existing connection, for every user sharing it
+        await self._drop_connection(user_id, close=True)
 
         # Create new connection
         return await self.get_or_create_connection(user_id)
 
     async def cleanup_expired_connections(self) -> None:
         """
-        Clean up expired or unhealthy connections.
-        This method can be called periodically to maintain connection health.
+        Clean up connections that have not been used within the idle timeout.
+        The registry's reaper task also does this periodically.
         """
-        current_time = asyncio.get_event_loop().time()
-        expired_users = []
+        closed = await self.registry.reap()
+        if closed:
+            logger.info(f"Cleaned up {closed} idle HA connections")
 
-        for user_id, health in self._connection_health.items():
-            # Consider connections stale after 1 hour of inactivity
-            if current_time - health.get("last_check", 0) > 3600:
-                expired_users.append(user_id)
+    async def close(self) -> None:
+        """Close every Home Assistant connection"""
+        await self.registry.close()
+        self._connection_keys.clear()
+        self._connection_health.clear()
+
+    async def _drop_connection(self, user_id: str, close: bool = False) -> None:
+        """
+        Drop a user's reference to their connection.
 
-        for user_id in expired_users:
-            logger.info(f"Cleaning up expired HA connection for user {user_id}")
-            if user_id in self._connections:
-                await self._connections[user_id].close()
-                del self._connections[user_id]
-                del self._connection_health[user_id]
+        Args:
+            user_id: User ID
+            close: Close the connection for every user sharing it
+        """
+        key = self._connection_keys.pop(user_id, None)
+        self._connection_health.pop(user_id, None)
+        if key is None:
+            return
+        if close:
+            await self.registry.discard(key)
+        else:
+            self.registry.release(key, user_id)
+
+    def _forget_connection_holders(self, key: ConnectionKey, holders: set[str]) -> None:
+        """Forget the users and device index of a connection the registry closed"""
+        index = self._device_indexes.pop(key, None)
+        if index is not None:
+            index.detach()
+        for user_id in holders:
+            if self._connection_keys.get(user_id) == key:
+                del self._connection_keys[user_id]
+                self._connection_health.pop(user_id, None)
 
     async def get_user_devices(
-        self, user_id: str, session_token: str | None = None
+        self,
+        user_id: str,
+        domain: str | None = None,
+        device_class: str | None = None,
+        session_token: str | None = None,
     ) -> list[dict[str, Any]]:
         """
-        Get all devices/entities for a user with session validation and enhanced error handling.
+        Get devices/entities for a user with session validation and enhanced error handling.
+
+        Devices are looked up in an index of the user's Home Assistant that
+        is kept current from state change events.
 
         Args:
             user_id: User ID
+            domain: Only devices of this domain (defaults to controllable
+                domains: lights, switches, fans, valves and covers)
+            device_class: Only devices with this device class
             session_token: Optional session token for validation
 
         Returns:
@@ -392,61 +531,55 @@ class UserHomeAssistantService:
         """
         return await global_error_handler.execute_with_retry(
             "user_home_assistant",
-            lambda: self._get_user_devices_impl(user_id, session_token),
+            lambda: self._get_user_devices_impl(
+                user_id, domain, device_class, session_token
+            ),
             context={"user_id": user_id, "operation": "get_devices"},
         )
 
     async def _get_user_devices_impl(
-        self, user_id: str, session_token: str | None = None
+        self,
+        user_id: str,
+        domain: str | None = None,
+        device_class: str | None = None,
+        session_token: str | None = None,
     ) -> list[dict[str, Any]]:
         """Implementation of get_user_devices with error handling"""
-        # Check cache first
-        cache_key = f"{user_id}_devices"
-        if cache_key in self.user_device_cache:
-            cache_data = self.user_device_cache[cache_key]
-            cache_age = (datetime.now() - cache_data["timestamp"]).total_seconds()
+        index = await self._get_device_index(user_id, session_token)
+        devices = index.devices(domain, device_class)
 
-            # Use cache if less than 5 minutes old
-            if cache_age < 300:
-                logger.debug(f"Using cached devices for user {user_id}")
-                return cache_data["devices"]
+        logger.debug(f"Retrieved {len(devices)} devices for user {user_id}")
+        return devices
 
+    async def _get_device_index(
+        self, user_id: str, session_token: str | None = None
+    ) -> DeviceIndex:
+        """Get the device index of the user's connection, loading it if stale"""
         client = await self.get_or_create_connection(user_id, session_token)
+        key = self._connection_keys[user_id]
 
-        # Get all entities and filter for relevant device types
-        states = await client.get_entities()
-
-        # Filter for devices that can be controlled (switches, lights, etc.)
-        relevant_domains = ["light", "switch", "fan", "valve", "cover"]
-        devices = []
+        index = self._device_indexes.get(key)
+        if index is None or index.client is not client:
+            if index is not None:
+                index.detach()
+            index = self._device_indexes[key] = DeviceIndex(client)
 
-        for state in states:
-            entity_id = state.get("entity_id", "")
-            domain = entity_id.split(".")[0] if "." in entity_id else ""
+        if not index.is_current():
+            await self._index_loads.do(
+                "|".join(key), lambda: self._load_device_index(index)
+            )
+        return index
 
-            if domain in relevant_domains:
-                devices.append(
-                    {
-                        "entity_id": entity_id,
-                        "name": state.get("attributes", {}).get(
-                            "friendly_name", entity_id
-                        ),
-                        "domain": domain,
-                        "state": state.get("state"),
-                        "attributes": state.get("attributes", {}),
-                        "last_changed": state.get("last_changed"),
-                        "last_updated": state.get("last_updated"),
-                    }
-                )
+    async def _load_device_index(self, index: DeviceIndex) -> None:
+        """Load an index from the state mirror, or over REST while it is not synced"""
+        client = index.client
+        if client.states_synced and client.watched_entities is None:
+            index.load(list(client.entity_cache.values()), client.mirror_generation)
+            return
 
-        # Update cache
-        self.user_device_cache[cache_key] = {
-            "devices": devices,
-            "timestamp": datetime.now(),
-        }
-
-        logger.info(f"Retrieved {len(devices)} devices for user {user_id}")
-        return devices
+        # Discovery yields to device control when the host is rate limited
+        states = await client.get_entities(priority=RequestPriority.BACKGROUND)
+        index.load(states)
 
     async def get_user_device(
         self, user_id: str, entity_id: str, session_token: str | None = None
@@ -559,7 +692,7 @@ class UserHomeAssistantService:
         cache_key = f"{user_id}:default"
 
         # Check if user has a client
-        if cache_key not in self._connections:
+        if user_id not in self._connection_keys:
             config = await self.get_user_config(user_id)
             if not config:
                 return {
@@ -624,7 +757,9 @@ class UserHomeAssistantService:
                 "connected": final_rest_api_status,  # Add connected field for frontend compatibility
                 "rest_api": final_rest_api_status,
                 "websocket": websocket_healthy,
-                "cached_entities": len(self.user_device_cache.get(cache_key, {})),
+                "cached_entities": len(
+                    self._device_indexes.get(self._connection_keys.get(user_id), ())
+                ),
                 "subscribed_devices": len(
                     self.user_device_subscriptions.get(cache_key, set())
                 ),
@@ -673,6 +808,6 @@ async def shutdown_user_home_assistant_service() -> None:
     """Cleanup the user Home Assistant service on shutdown"""
     global _user_ha_service
     if _user_ha_service:
-        await _user_ha_service.cleanup_expired_connections()
+        await _user_ha_service.close()
         _user_ha_service = None
     logger.info("User Home Assistant service shut down")
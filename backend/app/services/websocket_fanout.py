@@ -0,0 +1,180 @@
+"""
+WebSocket Fan-out
+
+Delivers device updates to a user's browser sockets without letting one
+slow socket hold up the others.
+
+Messages published for a user are collected for ``batch_interval`` seconds
+and then encoded once into a single frame: the message itself, or a JSON
+array when several were collected. State updates of the same entity within
+a window are merged, keeping the latest. The frame is handed to every
+socket of the user through its own bounded outbound queue, which a
+per-socket task drains; when a socket falls behind, its oldest frames are
+dropped.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+from collections import deque
+from collections.abc import Hashable
+from typing import Any
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+
+class _Outbound:
+    """Frames waiting to be sent to one socket"""
+
+    __slots__ = ("websocket", "frames", "ready", "task", "dropped", "closed")
+
+    def __init__(self, websocket: WebSocket, queue_size: int) -> None:
+        self.websocket = websocket
+        self.frames: deque[str] = deque(maxlen=queue_size)
+        self.ready = asyncio.Event()
+        self.task: asyncio.Task | None = None
+        self.dropped = 0
+        self.closed = False
+
+    def push(self, frame: str) -> None:
+        if self.closed:
+            return
+        if len(self.frames) == self.frames.maxlen:
+            self.dropped += 1
+        self.frames.append(frame)
+        self.ready.set()
+
+
+class WebSocketFanout:
+    """Micro-batched, per-socket queued delivery of messages to users"""
+
+    def __init__(self, batch_interval: float = 0.075, queue_size: int = 256) -> None:
+        """
+        Args:
+            batch_interval: Seconds messages are collected into one frame
+            queue_size: Frames queued per socket before dropping the oldest
+        """
+        self.batch_interval = batch_interval
+        self.queue_size = queue_size
+        # user_id -> socket -> outbound queue
+        self.connections: dict[str, dict[WebSocket, _Outbound]] = {}
+        self._pending: dict[str, dict[Hashable, dict]] = {}
+        self._flush_timers: dict[str, asyncio.TimerHandle] = {}
+        self._sequence = itertools.count()
+
+    def add(self, user_id: str, websocket: WebSocket) -> None:
+        """Register an accepted socket of a user"""
+        outbound = _Outbound(websocket, self.queue_size)
+        outbound.task = asyncio.create_task(self._send_loop(outbound))
+        self.connections.setdefault(user_id, {})[websocket] = outbound
+
+    def remove(self, user_id: str, websocket: WebSocket) -> bool:
+        """
+        Unregister a socket and stop its sender.
+
+        Returns:
+            True if this was the user's last socket
+        """
+        sockets = self.connections.get(user_id)
+        if sockets is None:
+            return False
+        outbound = sockets.pop(websocket, None)
+        if outbound is not None:
+            self._stop(outbound)
+        if sockets:
+            return False
+
+        del self.connections[user_id]
+        self._pending.pop(user_id, None)
+        timer = self._flush_timers.pop(user_id, None)
+        if timer is not None:
+            timer.cancel()
+        return True
+
+    def publish(self, user_id: str, message: dict[str, Any]) -> None:
+        """Queue a message for the user's next frame"""
+        if user_id not in self.connections:
+            return
+
+        pending = self._pending.setdefault(user_id, {})
+        key = self._merge_key(message)
+        # Re-insert so a merged update keeps its latest position
+        pending.pop(key, None)
+        pending[key] = message
+
+        if user_id not in self._flush_timers:
+            self._flush_timers[user_id] = asyncio.get_running_loop().call_later(
+                self.batch_interval, self._flush, user_id
+            )
+
+    def stats(self) -> dict[str, int]:
+        """Socket and queue counts"""
+        outbounds = [
+            o for sockets in self.connections.values() for o in sockets.values()
+        ]
+        return {
+            "users": len(self.connections),
+            "sockets": len(outbounds),
+            "queued_frames": sum(len(o.frames) for o in outbounds),
+            "dropped_frames": sum(o.dropped for o in outbounds),
+        }
+
+    async def close(self) -> None:
+        """Stop every sender and discard queued frames"""
+        for timer in self._flush_timers.values():
+            timer.cancel()
+        self._flush_timers.clear()
+        self._pending.clear()
+
+        tasks = []
+        for sockets in self.connections.values():
+            for outbound in sockets.values():
+                self._stop(outbound)
+                if outbound.task is not None:
+                    tasks.append(outbound.task)
+        self.connections.clear()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _merge_key(self, message: dict[str, Any]) -> Hashable:
+        """State updates of one entity share a key; other messages never merge"""
+        if message.get("type") == "device_state_update":
+            entity_id = (message.get("data") or {}).get("entity_id")
+            if entity_id:
+                return ("device_state_update", entity_id)
+        return next(self._sequence)
+
+    def _flush(self, user_id: str) -> None:
+        self._flush_timers.pop(user_id, None)
+        messages = list(self._pending.pop(user_id, {}).values())
+        sockets = self.connections.get(user_id)
+        if not messages or not sockets:
+            return
+
+        frame = json.dumps(messages[0] if len(messages) == 1 else messages)
+        for outbound in sockets.values():
+            outbound.push(frame)
+
+    async def _send_loop(self, outbound: _Outbound) -> None:
+        while True:
+            await outbound.ready.wait()
+            outbound.ready.clear()
+            while outbound.frames:
+                try:
+                    await outbound.websocket.send_text(outbound.frames.popleft())
+                except Exception as e:
+                    # The socket's receive loop unregisters it; stop sending
+                    logger.debug(f"WebSocket send failed, closing sender: {e}")
+                    outbound.closed = True
+                    outbound.frames.clear()
+                    return
+
+    @staticmethod
+    def _stop(outbound: _Outbound) -> None:
+        outbound.closed = True
+        outbound.frames.clear()
+        if outbound.task is not None:
+            outbound.task.cancel()
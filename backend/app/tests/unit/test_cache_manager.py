@@ -0,0 +1,118 @@
+"""
+Unit tests for the bounded in-process CacheManager.
+Covers LRU eviction, byte budgets and heap-driven expiry.
+"""
+
+from dataclasses import dataclass
+from unittest.mock import patch
+
+import pytest
+
+from app.core.cache import CacheManager, estimate_size
+
+
+class TestCacheManager:
+    """Unit tests for CacheManager."""
+
+    @pytest.mark.asyncio
+    async def test_set_and_get(self) -> None:
+        """Test basic set/get round trip."""
+        cache = CacheManager()
+
+        await cache.set("key", {"value": 1})
+
+        assert await cache.get("key") == {"value": 1}
+        assert await cache.exists("key")
+        assert await cache.get("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_by_entry_count(self) -> None:
+        """Test least recently used entries are evicted first."""
+        cache = CacheManager(max_entries=3, shard_count=1)
+
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.set("c", 3)
+        await cache.get("a")  # "b" is now least recently used
+        await cache.set("d", 4)
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == 1
+        assert await cache.size() == 3
+        assert (await cache.stats())["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_eviction_by_byte_budget(self) -> None:
+        """Test the byte budget is enforced."""
+        cache = CacheManager(max_bytes=100, shard_count=1)
+
+        await cache.set("a", "x" * 40)
+        await cache.set("b", "x" * 40)
+        await cache.set("c", "x" * 40)
+
+        assert await cache.get("a") is None
+        assert (await cache.stats())["memory_usage_estimate"] == 80
+
+    def test_estimate_size_counts_nested_objects(self) -> None:
+        """Test result objects inside an envelope are charged for their contents."""
+
+        @dataclass(frozen=True, slots=True)
+        class Row:
+            name: str
+            value: float
+
+        rows = tuple(Row("x" * 100, float(i)) for i in range(1000))
+        envelope = {"value": rows, "fresh_until": 0.0}
+
+        assert estimate_size(envelope) > 1000 * 100
+        assert estimate_size(envelope) > 10 * estimate_size({"value": (), "x": 0.0})
+
+    @pytest.mark.asyncio
+    async def test_oversized_value_not_cached(self) -> None:
+        """Test values larger than the budget are skipped."""
+        cache = CacheManager(max_bytes=10, shard_count=1)
+
+        await cache.set("big", "x" * 50)
+
+        assert await cache.get("big") is None
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_not_returned(self) -> None:
+        """Test expired entries are treated as misses."""
+        cache = CacheManager()
+
+        with patch("app.core.cache.time.time", return_value=1000.0):
+            await cache.set("key", "value", ttl_seconds=10)
+        with patch("app.core.cache.time.time", return_value=1011.0):
+            assert await cache.get("key") is None
+
+    @pytest.mark.asyncio
+    async def test_cleanup_expired_uses_heap(self) -> None:
+        """Test cleanup removes only due entries and ignores stale heap items."""
+        cache = CacheManager(shard_count=1)
+
+        with patch("app.core.cache.time.time", return_value=1000.0):
+            await cache.set("short", 1, ttl_seconds=5)
+            await cache.set("long", 2, ttl_seconds=100)
+            await cache.set("forever", 3)
+            # Re-setting replaces the expiry; the old heap item becomes stale
+            await cache.set("refreshed", 4, ttl_seconds=5)
+            await cache.set("refreshed", 4, ttl_seconds=100)
+
+        with patch("app.core.cache.time.time", return_value=1010.0):
+            removed = await cache.cleanup_expired()
+            assert removed == 1
+            assert sorted(await cache.keys()) == ["forever", "long", "refreshed"]
+
+    @pytest.mark.asyncio
+    async def test_delete_pattern(self) -> None:
+        """Test glob-style pattern deletion."""
+        cache = CacheManager()
+        await cache.set("sensor_latest:user-1:a", 1)
+        await cache.set("sensor_latest:user-1:b", 2)
+        await cache.set("sensor_latest:user-2:a", 3)
+
+        deleted = await cache.delete_pattern("sensor_latest:user-1:*")
+
+        assert deleted == 2
+        assert await cache.keys() == ["sensor_latest:user-2:a"]
@@ -0,0 +1,101 @@
+"""
+Unit tests for DatabaseService's dedicated session connection.
+Covers restoring LISTEN registrations and advisory lock state on reconnect.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import database_service
+from app.services.database_service import DatabaseService, close_database_service
+
+
+class FakeConnection:
+    """Stands in for an asyncpg connection that can be dropped."""
+
+    def __init__(self) -> None:
+        self.listeners: dict[str, object] = {}
+        self.termination_listeners: list = []
+        self.closed = False
+
+    async def add_listener(self, channel, callback) -> None:
+        self.listeners[channel] = callback
+
+    def add_termination_listener(self, callback) -> None:
+        self.termination_listeners.append(callback)
+
+    def remove_termination_listener(self, callback) -> None:
+        self.termination_listeners.remove(callback)
+
+    async def fetchval(self, query, *args) -> bool:
+        return True
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def close(self) -> None:
+        self.closed = True
+
+    def drop(self) -> None:
+        self.closed = True
+        for callback in self.termination_listeners:
+            callback(self)
+
+    def notify(self, channel: str, payload: str) -> None:
+        self.listeners[channel](self, 1, channel, payload)
+
+
+class TestDatabaseSessionConnection:
+    """Unit tests for the LISTEN and advisory lock connection."""
+
+    @pytest.mark.asyncio
+    async def test_listeners_restored_after_connection_drops(self) -> None:
+        """Test a dropped session connection is reopened with its listeners."""
+        connections = []
+
+        async def connect(url):
+            connections.append(FakeConnection())
+            return connections[-1]
+
+        service = DatabaseService()
+        service._pool = MagicMock(close=AsyncMock())
+        received = []
+
+        with patch("app.services.database_service.asyncpg.connect", connect):
+            await service.listen("ha_config_invalidated", received.append)
+            assert await service.try_advisory_lock("device-monitor:user-1")
+            assert service.holds_advisory_lock("device-monitor:user-1")
+
+            connections[0].drop()
+            assert not service.holds_advisory_lock("device-monitor:user-1")
+            for _ in range(5):
+                await asyncio.sleep(0)
+
+        assert len(connections) == 2
+        connections[1].notify("ha_config_invalidated", "user-1")
+        assert received == ["user-1"]
+
+        await service.disconnect()
+        assert connections[1].closed
+
+    @pytest.mark.asyncio
+    async def test_close_releases_session_connection(self, monkeypatch) -> None:
+        """Test shutdown closes the session connection and forgets the service."""
+        connection = FakeConnection()
+        service = DatabaseService()
+        service._pool = MagicMock(close=AsyncMock())
+        monkeypatch.setattr(database_service, "_database_service", service)
+
+        with patch(
+            "app.services.database_service.asyncpg.connect",
+            AsyncMock(return_value=connection),
+        ):
+            assert await service.try_advisory_lock("device-monitor:user-1")
+
+        await close_database_service()
+
+        assert connection.closed
+        assert not service.holds_advisory_lock("device-monitor:user-1")
+        assert database_service._database_service is None
@@ -0,0 +1,243 @@
+"""
+Unit tests for DeviceMonitoringService.
+Covers monitoring on the shared client and the concurrent, deadline-bound
+emergency stop.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services import device_monitoring_service
+from app.services.device_monitoring_service import DeviceMonitoringService
+from app.services.home_assistant_client import HomeAssistantClient
+from app.services.home_assistant_rate_limiter import RequestPriority
+
+USER_ID = "user-1"
+
+
+class FakeHomeAssistant:
+    """Records service calls; calls for a hanging domain never return."""
+
+    def __init__(self, hanging_domains: set[str]) -> None:
+        self.hanging_domains = hanging_domains
+        self.calls: list[tuple] = []
+
+    def get_cached_entity(self, entity_id: str) -> dict:
+        return {"entity_id": entity_id, "state": "on"}
+
+    async def call_service(self, domain, service, entity_id=None, priority=None):
+        self.calls.append((domain, service, entity_id, priority))
+        if domain in self.hanging_domains:
+            await asyncio.Event().wait()
+        return {}
+
+
+def make_service(monkeypatch, entity_ids: list[str]) -> DeviceMonitoringService:
+    query = MagicMock()
+    query.select.return_value = query
+    query.eq.return_value = query
+    query.execute = AsyncMock(
+        return_value=MagicMock(
+            data=[{"home_assistant_entity_id": entity_id} for entity_id in entity_ids]
+        )
+    )
+    supabase = MagicMock()
+    supabase.table.return_value = query
+    monkeypatch.setattr(
+        device_monitoring_service,
+        "get_shared_async_supabase_client",
+        AsyncMock(return_value=supabase),
+    )
+
+    bus = MagicMock()
+    bus.publish = AsyncMock()
+    bus.resign = AsyncMock()
+    service = DeviceMonitoringService(
+        MagicMock(), state_writer=MagicMock(), fanout=MagicMock(), bus=bus
+    )
+    service.log_device_control = AsyncMock()
+    return service
+
+
+class TestUserMonitoring:
+    """Unit tests for monitoring a user's devices on the shared client."""
+
+    @pytest.mark.asyncio
+    async def test_monitoring_keeps_shared_entity_mirror(self, monkeypatch) -> None:
+        """Test monitoring filters changes without narrowing the client's mirror."""
+        service = make_service(monkeypatch, ["light.top"])
+        service.handle_device_state_change = AsyncMock()
+
+        ha_client = HomeAssistantClient("http://ha.local:8123", "token")
+        ha_client.entity_cache = {
+            "light.top": {"state": "on"},
+            "sensor.humidity": {"state": "55"},
+        }
+        ha_client.states_synced = True
+        user_ha_service = MagicMock()
+        user_ha_service.get_user_config = AsyncMock(return_value={"url": "x"})
+        user_ha_service.get_or_create_connection = AsyncMock(return_value=ha_client)
+        monkeypatch.setattr(
+            device_monitoring_service,
+            "get_user_home_assistant_service",
+            AsyncMock(return_value=user_ha_service),
+        )
+
+        assert await service.start_user_monitoring(USER_ID)
+
+        assert ha_client.watched_entities is None
+        assert ha_client.states_synced
+        assert set(ha_client.entity_cache) == {"light.top", "sensor.humidity"}
+
+        for callback in ha_client.state_change_callbacks:
+            callback("sensor.humidity", None, {"state": "60"})
+            callback("light.top", None, {"state": "off"})
+        await asyncio.sleep(0)
+        service.handle_device_state_change.assert_awaited_once_with(
+            USER_ID, "light.top", None, {"state": "off"}
+        )
+
+        await service.stop_user_monitoring(USER_ID)
+        assert ha_client.state_change_callbacks == []
+
+    @pytest.mark.asyncio
+    async def test_lost_leadership_stops_monitoring(self, monkeypatch) -> None:
+        """Test a worker whose leadership lock was lost stops monitoring."""
+        service = make_service(monkeypatch, ["light.top"])
+        service.bus.holds_lead = MagicMock(return_value=False)
+        service.ha_clients[USER_ID] = FakeHomeAssistant(hanging_domains=set())
+        service.ha_clients[USER_ID].state_change_callbacks = []
+
+        await service._check_user_connection(USER_ID)
+
+        assert USER_ID not in service.ha_clients
+        service.bus.holds_lead.assert_called_once_with(USER_ID)
+        service.bus.resign.assert_awaited_once_with(USER_ID)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_takeover_releases_lock(self, monkeypatch) -> None:
+        """Test cancelling the election while starting monitoring resigns."""
+        service = make_service(monkeypatch, ["light.top"])
+        service.bus.try_lead = AsyncMock(return_value=True)
+        starting = asyncio.Event()
+
+        async def start_user_monitoring(user_id: str) -> bool:
+            starting.set()
+            await asyncio.Event().wait()
+            return True
+
+        service.start_user_monitoring = start_user_monitoring
+        election = asyncio.create_task(service._lead_user_monitoring(USER_ID))
+        await starting.wait()
+        election.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await election
+        service.bus.resign.assert_awaited_once_with(USER_ID)
+
+
+class TestDeviceControl:
+    """Unit tests for DeviceMonitoringService.control_device."""
+
+    @pytest.mark.asyncio
+    async def test_non_leader_worker_controls_device(self, monkeypatch) -> None:
+        """Test a worker not monitoring the user controls through the registry."""
+        service = make_service(monkeypatch, [])
+        ha_client = MagicMock()
+        ha_client.turn_off = AsyncMock(return_value=True)
+        ha_client.get_state = AsyncMock(return_value={"state": "off"})
+        user_ha_service = MagicMock()
+        user_ha_service.get_or_create_connection = AsyncMock(return_value=ha_client)
+        monkeypatch.setattr(
+            device_monitoring_service,
+            "get_user_home_assistant_service",
+            AsyncMock(return_value=user_ha_service),
+        )
+
+        result = await service.control_device(
+            USER_ID, "light.top", {"type": "turn_off"}
+        )
+
+        assert USER_ID not in service.ha_clients
+        assert result["success"] is True
+        assert result["new_state"] == "off"
+        ha_client.turn_off.assert_awaited_once_with("light.top")
+        user_ha_service.get_or_create_connection.assert_awaited_once_with(USER_ID)
+
+
+class TestEmergencyStop:
+    """Unit tests for DeviceMonitoringService.emergency_stop."""
+
+    @pytest.mark.asyncio
+    async def test_one_critical_call_per_domain(self, monkeypatch) -> None:
+        """Test devices are turned off with one critical call per domain."""
+        service = make_service(
+            monkeypatch, ["light.top", "light.bottom", "switch.pump", "fan.exhaust"]
+        )
+        ha_client = FakeHomeAssistant(hanging_domains=set())
+        service.ha_clients[USER_ID] = ha_client
+
+        result = await service.emergency_stop(USER_ID, deadline=1.0)
+
+        assert sorted(call[0] for call in ha_client.calls) == ["fan", "light", "switch"]
+        assert all(call[3] is RequestPriority.CRITICAL for call in ha_client.calls)
+        light_call = next(call for call in ha_client.calls if call[0] == "light")
+        assert light_call[2] == ["light.top", "light.bottom"]
+        assert sorted(result["stopped_devices"]) == [
+            "fan.exhaust",
+            "light.bottom",
+            "light.top",
+            "switch.pump",
+        ]
+        assert result["deadline_exceeded"] is False
+
+    @pytest.mark.asyncio
+    async def test_deadline_reports_unfinished_groups(self, monkeypatch) -> None:
+        """Test a hanging domain is reported failed once the deadline passes."""
+        service = make_service(monkeypatch, ["light.top", "fan.exhaust"])
+        service.ha_clients[USER_ID] = FakeHomeAssistant(hanging_domains={"fan"})
+
+        result = await asyncio.wait_for(
+            service.emergency_stop(USER_ID, deadline=0.05), timeout=1.0
+        )
+
+        assert result["stopped_devices"] == ["light.top"]
+        assert result["failed_devices"] == [
+            {"entity_id": "fan.exhaust", "error": "Deadline exceeded"}
+        ]
+        assert result["deadline_exceeded"] is True
+
+        # Progress for each group, then the summary, reached the user
+        message_types = [
+            call.args[1]["type"] for call in service.bus.publish.await_args_list
+        ]
+        assert message_types == [
+            "emergency_stop_progress",
+            "emergency_stop_progress",
+            "emergency_stop_complete",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_deadline_covers_connecting(self, monkeypatch) -> None:
+        """Test a hanging connection attempt still ends at the deadline."""
+        service = make_service(monkeypatch, ["light.top"])
+
+        async def get_or_create_connection(user_id: str) -> None:
+            await asyncio.Event().wait()
+
+        user_ha_service = MagicMock()
+        user_ha_service.get_or_create_connection = get_or_create_connection
+        monkeypatch.setattr(
+            device_monitoring_service,
+            "get_user_home_assistant_service",
+            AsyncMock(return_value=user_ha_service),
+        )
+
+        result = await asyncio.wait_for(
+            service.emergency_stop(USER_ID, deadline=0.05), timeout=1.0
+        )
+
+        assert result["success"] is False
+        assert result["deadline_exceeded"] is True
@@ -0,0 +1,105 @@
+"""
+Unit tests for DeviceStateWriter.
+Covers coalescing per entity, batch triggers and flushing on close.
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.device_state_writer import DeviceStateWriter
+
+USER_ID = "5b1c9f3e-8d4a-4a77-9a55-0c6a7f1d2e01"
+
+
+def make_database() -> MagicMock:
+    database = MagicMock(is_available=True)
+    database.execute = AsyncMock()
+    return database
+
+
+def make_writer(database: MagicMock, **kwargs) -> DeviceStateWriter:
+    return DeviceStateWriter(
+        database_factory=AsyncMock(return_value=database),
+        supabase_factory=AsyncMock(),
+        **kwargs,
+    )
+
+
+def written_states(database: MagicMock, call: int = 0) -> list[dict]:
+    return json.loads(database.execute.call_args_list[call].args[1])
+
+
+class TestDeviceStateWriter:
+    """Unit tests for DeviceStateWriter batching."""
+
+    @pytest.mark.asyncio
+    async def test_latest_state_per_entity_written_once(self) -> None:
+        """Test repeated changes of an entity collapse into its latest state."""
+        database = make_database()
+        writer = make_writer(database, flush_interval=0.01)
+
+        for state in ("on", "off", "on"):
+            writer.record(USER_ID, "light.grow", state, {"brightness": 1})
+        writer.record(USER_ID, "fan.exhaust", "off", {})
+        assert writer.buffered == 2
+
+        await asyncio.sleep(0.05)
+
+        assert database.execute.await_count == 1
+        assert "update_device_states" in database.execute.call_args.args[0]
+        states = {s["entity_id"]: s["state"] for s in written_states(database)}
+        assert states == {"light.grow": "on", "fan.exhaust": "off"}
+
+    @pytest.mark.asyncio
+    async def test_flush_size_triggers_immediate_write(self) -> None:
+        """Test reaching the flush size writes without waiting for the timer."""
+        database = make_database()
+        writer = make_writer(database, flush_size=2, flush_interval=60)
+
+        writer.record(USER_ID, "light.a", "on", {})
+        writer.record(USER_ID, "light.b", "on", {})
+        await asyncio.sleep(0)
+
+        assert database.execute.await_count == 1
+        assert writer.buffered == 0
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_retried_without_overwriting_newer_state(
+        self,
+    ) -> None:
+        """Test a failed batch is requeued behind states that arrived since."""
+        database = make_database()
+        database.execute.side_effect = [RuntimeError("down"), None]
+        writer = make_writer(database, flush_size=2, flush_interval=60)
+
+        writer.record(USER_ID, "light.a", "on", {})
+        writer.record(USER_ID, "light.b", "on", {})
+        writer.record(USER_ID, "light.a", "off", {})
+        await asyncio.sleep(0)
+
+        await writer.close()
+        states = {s["entity_id"]: s["state"] for s in written_states(database, 1)}
+        assert states == {"light.a": "off", "light.b": "on"}
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_and_falls_back_to_rpc(self) -> None:
+        """Test close writes buffered states through PostgREST without asyncpg."""
+        client = MagicMock()
+        client.rpc.return_value.execute = AsyncMock()
+        writer = DeviceStateWriter(
+            flush_interval=60,
+            database_factory=AsyncMock(return_value=None),
+            supabase_factory=AsyncMock(return_value=client),
+        )
+
+        writer.record(USER_ID, "switch.pump", "on", None)
+        await writer.close()
+
+        name, params = client.rpc.call_args.args
+        assert name == "update_device_states"
+        assert params["p_states"][0]["entity_id"] == "switch.pump"
+        assert params["p_states"][0]["attributes"] == {}
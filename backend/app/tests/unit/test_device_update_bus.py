@@ -0,0 +1,104 @@
+"""
+Unit tests for DeviceUpdateBus.
+Covers cross-worker delivery and monitoring leadership.
+"""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.device_update_bus import DeviceUpdateBus
+
+USER_ID = "user-1"
+
+
+class FakePostgres:
+    """In-memory NOTIFY and advisory locks shared by several workers."""
+
+    def __init__(self) -> None:
+        self.listeners: dict[str, list] = {}
+        self.locks: dict[str, object] = {}
+
+    def session(self) -> "FakeDatabase":
+        return FakeDatabase(self)
+
+
+class FakeDatabase:
+    """One worker's DatabaseService against a FakePostgres."""
+
+    is_available = True
+
+    def __init__(self, server: FakePostgres) -> None:
+        self.server = server
+
+    async def listen(self, channel: str, callback) -> None:
+        self.server.listeners.setdefault(channel, []).append(callback)
+
+    async def notify(self, channel: str, payload: str) -> None:
+        for callback in self.server.listeners.get(channel, []):
+            callback(payload)
+
+    async def try_advisory_lock(self, name: str) -> bool:
+        holder = self.server.locks.setdefault(name, self)
+        return holder is self
+
+    async def advisory_unlock(self, name: str) -> None:
+        if self.server.locks.get(name) is self:
+            del self.server.locks[name]
+
+
+async def start_worker(server: FakePostgres) -> tuple[DeviceUpdateBus, list]:
+    delivered = []
+    bus = DeviceUpdateBus(
+        lambda user_id, message: delivered.append((user_id, message)),
+        database_factory=AsyncMock(return_value=server.session()),
+    )
+    await bus.start()
+    return bus, delivered
+
+
+class TestDeviceUpdateBus:
+    """Unit tests for DeviceUpdateBus."""
+
+    @pytest.mark.asyncio
+    async def test_publish_reaches_every_worker_once(self) -> None:
+        """Test an update is delivered locally and on other workers, once each."""
+        server = FakePostgres()
+        first, first_delivered = await start_worker(server)
+        second, second_delivered = await start_worker(server)
+        message = {"type": "device_state_update", "data": {"entity_id": "fan.a"}}
+
+        await first.publish(USER_ID, message)
+
+        assert first.distributed
+        assert first_delivered == [(USER_ID, message)]
+        assert second_delivered == [(USER_ID, message)]
+
+    @pytest.mark.asyncio
+    async def test_one_worker_leads_until_it_resigns(self) -> None:
+        """Test leadership is exclusive and passes on after resigning."""
+        server = FakePostgres()
+        first, _ = await start_worker(server)
+        second, _ = await start_worker(server)
+
+        assert await first.try_lead(USER_ID) is True
+        assert await second.try_lead(USER_ID) is False
+
+        await first.resign(USER_ID)
+        assert await second.try_lead(USER_ID) is True
+
+    @pytest.mark.asyncio
+    async def test_single_worker_mode_without_database(self) -> None:
+        """Test the bus delivers locally and always leads without a database."""
+        delivered = []
+        bus = DeviceUpdateBus(
+            lambda user_id, message: delivered.append(user_id),
+            database_factory=AsyncMock(return_value=None),
+        )
+        await bus.start()
+
+        await bus.publish(USER_ID, {"type": "connection_status"})
+
+        assert not bus.distributed
+        assert delivered == [USER_ID]
+        assert await bus.try_lead(USER_ID) is True
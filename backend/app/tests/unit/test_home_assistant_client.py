@@ -0,0 +1,445 @@
+"""
+Unit tests for HomeAssistantClient.
+Runs against a small in-process aiohttp server standing in for Home Assistant.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.services.home_assistant_client import (
+    CommandError,
+    ConnectionError,
+    HomeAssistantClient,
+)
+from app.services.user_home_assistant_service import UserHomeAssistantService
+
+STATES = [
+    {"entity_id": "light.grow_1", "state": "on", "attributes": {}},
+    {"entity_id": "switch.pump", "state": "off", "attributes": {}},
+]
+
+# Results of the fake server's WebSocket commands
+COMMAND_RESULTS = {
+    "get_states": STATES,
+    "get_config": {"version": "2025.1.0"},
+    "get_services": {"light": {"turn_on": {}}},
+    "call_service": {"context": {"id": "ctx"}},
+}
+
+# /api/history/period body; attribute strings contain JSON structure characters
+HISTORY = [
+    [
+        {
+            "entity_id": "sensor.temp",
+            "state": "21.5",
+            "attributes": {"note": 'a "quoted" ]}[{ \\ value'},
+            "last_changed": "2025-01-01T00:00:00+00:00",
+        },
+        {"state": "21.7", "last_changed": "2025-01-01T00:05:00+00:00"},
+    ],
+    [{"entity_id": "switch.pump", "state": "off", "attributes": {}}],
+]
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    """Wait until condition() is true."""
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def ha_server():
+    """Start a fake Home Assistant REST and WebSocket API."""
+    peers: set = set()
+    rest_calls: list[str] = []
+    sockets: list[web.WebSocketResponse] = []
+    commands: list[dict] = []
+
+    async def track(request: web.Request) -> None:
+        peers.add(request.transport.get_extra_info("peername"))
+        rest_calls.append(request.path)
+
+    async def websocket(request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_json({"type": "auth_required"})
+        await ws.receive_json()
+        await ws.send_json({"type": "auth_ok"})
+        sockets.append(ws)
+        async for message in ws:
+            command = message.json()
+            commands.append(command)
+            if command["type"] == "ping":
+                await ws.send_json({"id": command["id"], "type": "pong"})
+                continue
+            if command["type"] == "unknown":
+                await ws.send_json(
+                    {
+                        "id": command["id"],
+                        "type": "result",
+                        "success": False,
+                        "error": {"code": "unknown_command", "message": "Unknown"},
+                    }
+                )
+                continue
+            await ws.send_json(
+                {
+                    "id": command["id"],
+                    "type": "result",
+                    "success": True,
+                    "result": COMMAND_RESULTS.get(command["type"]),
+                }
+            )
+            if command["type"] == "subscribe_entities":
+                wanted = command.get("entity_ids")
+                await ws.send_json(
+                    {
+                        "id": command["id"],
+                        "type": "event",
+                        "event": {
+                            "a": {
+                                state["entity_id"]: {
+                                    "s": state["state"],
+                                    "a": state["attributes"],
+                                    "c": "ctx",
+                                    "lc": 1735689600.0,
+                                }
+                                for state in STATES
+                                if wanted is None or state["entity_id"] in wanted
+                            }
+                        },
+                    }
+                )
+        return ws
+
+    async def states(request: web.Request) -> web.Response:
+        await track(request)
+        return web.json_response(STATES)
+
+    async def history(request: web.Request) -> web.StreamResponse:
+        await track(request)
+        response = web.StreamResponse()
+        await response.prepare(request)
+        body = json.dumps(HISTORY).encode()
+        for start in range(0, len(body), 7):
+            await response.write(body[start : start + 7])
+        await response.write_eof()
+        return response
+
+    async def config(request: web.Request) -> web.Response:
+        await track(request)
+        return web.json_response({"version": "2025.1.0"})
+
+    async def services(request: web.Request) -> web.Response:
+        await track(request)
+        return web.json_response(
+            [
+                {"domain": domain, "services": domain_services}
+                for domain, domain_services in COMMAND_RESULTS["get_services"].items()
+            ]
+        )
+
+    async def api(request: web.Request) -> web.Response:
+        await track(request)
+        return web.json_response({"message": "API running."})
+
+    app = web.Application()
+    app.router.add_get("/api/", api)
+    app.router.add_get("/api/states", states)
+    app.router.add_get("/api/config", config)
+    app.router.add_get("/api/services", services)
+    app.router.add_get("/api/websocket", websocket)
+    app.router.add_get("/api/history/period/{start}", history)
+    server = TestServer(app)
+    await server.start_server()
+    server.peers = peers
+    server.rest_calls = rest_calls
+    server.sockets = sockets
+    server.commands = commands
+    yield server
+    await server.close()
+
+
+class TestHomeAssistantClient:
+    """Unit tests for HomeAssistantClient REST and WebSocket behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_rest_calls_share_one_pooled_connection(self, ha_server) -> None:
+        """Test REST calls reuse one kept-alive session and connection."""
+        client = HomeAssistantClient(str(ha_server.make_url("")), "token")
+
+        entities = await client.get_entities("light")
+        session = client.session
+        await client.get_config()
+        await client.get_entities()
+
+        assert [entity["entity_id"] for entity in entities] == ["light.grow_1"]
+        assert client.session is session
+        assert len(ha_server.peers) == 1
+
+        await client.close()
+        assert session.closed
+        assert client.session is None
+
+    @pytest.mark.asyncio
+    async def test_rest_services_match_websocket_shape(self, ha_server) -> None:
+        """Test the REST services fallback returns the domain mapping."""
+        client = HomeAssistantClient(str(ha_server.make_url("")), "token")
+
+        services = await client.get_services()
+
+        assert services == COMMAND_RESULTS["get_services"]
+        assert ha_server.rest_calls == ["/api/services"]
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_entity_reads_served_from_state_mirror(self, ha_server) -> None:
+        """Test entity reads use the WebSocket mirror once it is seeded."""
+        client = HomeAssistantClient(str(ha_server.make_url("")), "token")
+        client.start_websocket()
+        await wait_for(lambda: client.states_synced)
+
+        lights = await client.get_entities("light")
+        pump = await client.get_entity("switch.pump")
+        missing = await client.get_entity("switch.missing")
+
+        assert [entity["entity_id"] for entity in lights] == ["light.grow_1"]
+        assert pump["state"] == "off"
+        assert missing is None
+        assert ha_server.rest_calls == []
+
+        await ha_server.sockets[0].send_json(
+            {
+                "id": ha_server.commands[0]["id"],
+                "type": "event",
+                "event": {"c": {"switch.pump": {"+": {"s": "on", "lc": 1735689700.0}}}},
+            }
+        )
+        await wait_for(lambda: client.entity_cache["switch.pump"]["state"] == "on")
+        pump = await client.get_entity("switch.pump")
+        assert pump["last_changed"] == "2025-01-01T00:01:40+00:00"
+        assert pump["last_updated"] == pump["last_changed"]
+
+        await client.close()
+        assert not client.states_synced
+
+    @pytest.mark.asyncio
+    async def test_watched_entities_subscribed_incrementally(self, ha_server) -> None:
+        """Test only watched entities are subscribed to and reported."""
+        changes = []
+        client = HomeAssistantClient(str(ha_server.make_url("")), "token")
+        await client.subscribe_to_state_changes(
+            ["switch.pump"],
+            lambda entity_id, old, new: changes.append((old["state"], new["state"])),
+        )
+        client.start_websocket()
+        await wait_for(lambda: client.states_synced)
+
+        assert ha_server.commands[0]["entity_ids"] == ["switch.pump"]
+        assert list(client.entity_cache) == ["switch.pump"]
+
+        await client.watch_entities(["switch.pump", "light.grow_1"])
+        await wait_for(lambda: "light.grow_1" in client.entity_cache)
+        assert ha_server.commands[1]["entity_ids"] == ["light.grow_1"]
+        assert client.states_synced
+
+        first, second = (command["id"] for command in ha_server.commands)
+        await ha_server.sockets[0].send_json(
+            {
+                "id": first,
+                "type": "event",
+                "event": {"c": {"switch.pump": {"+": {"s": "on"}}}},
+            }
+        )
+        await wait_for(lambda: changes)
+        assert changes == [("off", "on")]
+
+        await client.unwatch_entities(["light.grow_1"])
+        await wait_for(lambda: len(ha_server.commands) == 3)
+        assert ha_server.commands[2] == {
+            "id": ha_server.commands[2]["id"],
+            "type": "unsubscribe_events",
+            "subscription": second,
+        }
+        assert "light.grow_1" not in client.entity_cache
+
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_commands_multiplexed_over_websocket(self, ha_server) -> None:
+        """Test commands go over the socket and are matched to their results."""
+        client = HomeAssistantClient(str(ha_server.make_url("")), "token")
+        await client.watch_entities(["switch.pump"])
+        client.start_websocket()
+        await wait_for(lambda: client.states_synced)
+
+        config, services, entities, called = await asyncio.gather(
+            client.get_config(),
+            client.get_services(),
+            client.get_entities("light"),
+            client.call_service("light", "turn_on", "light.grow_1", {"brightness": 9}),
+        )
+
+        assert config == {"version": "2025.1.0"}
+        assert services == {"light": {"turn_on": {}}}
+        assert [entity["entity_id"] for entity in entities] == ["light.grow_1"]
+        assert called == {"context": {"id": "ctx"}}
+        assert ha_server.commands[-1]["service_data"] == {
+            "brightness": 9,
+            "entity_id": "light.grow_1",
+        }
+        assert ha_server.rest_calls == []
+        assert client._pending_commands == {}
+
+        with pytest.raises(CommandError, match="unknown_command"):
+            await client.send_command("unknown")
+
+        await client.close()
+        with pytest.raises(ConnectionError):
+            await client.send_command("get_config")
+
+    @pytest.mark.asyncio
+    async def test_history_streamed_from_one_request(self, ha_server) -> None:
+        """Test history of all entities is parsed incrementally from one request."""
+        client = HomeAssistantClient(str(ha_server.make_url("")), "token")
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+        states = [
+            item
+            async for item in client.iter_history(
+                ["sensor.temp", "switch.pump"], start, chunk_size=5
+            )
+        ]
+
+        assert [(entity_id, state["state"]) for entity_id, state in states] == [
+            ("sensor.temp", "21.5"),
+            ("sensor.temp", "21.7"),
+            ("switch.pump", "off"),
+        ]
+        assert states[0][1]["attributes"] == HISTORY[0][0]["attributes"]
+        assert ha_server.rest_calls == ["/api/history/period/2025-01-01T00:00:00+00:00"]
+
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_ping_is_lightweight(self, ha_server) -> None:
+        """Test ping uses /api/ without a socket and a WebSocket ping with one."""
+        client = HomeAssistantClient(str(ha_server.make_url("")), "token")
+
+        await client.ping()
+        assert ha_server.rest_calls == ["/api/"]
+
+        client.start_websocket()
+        await wait_for(lambda: client.states_synced)
+        await client.ping()
+
+        assert ha_server.commands[-1]["type"] == "ping"
+        assert ha_server.rest_calls == ["/api/"]
+
+        await client.close()
+
+
+class TestUserHomeAssistantConnections:
+    """Unit tests for per-user connection handling of UserHomeAssistantService."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_attempt(self, ha_server) -> None:
+        """Test concurrent requests for a user load config and connect once."""
+        service = UserHomeAssistantService()
+        config_loads = []
+
+        async def get_user_config(user_id: str) -> dict:
+            config_loads.append(user_id)
+            await asyncio.sleep(0.01)
+            return {"url": str(ha_server.make_url("")), "access_token": "token"}
+
+        service.get_user_config = get_user_config
+
+        clients = await asyncio.gather(
+            *(service.get_or_create_connection("alice") for _ in range(5))
+        )
+
+        assert len({id(client) for client in clients}) == 1
+        assert config_loads == ["alice"]
+        assert ha_server.rest_calls == ["/api/"]
+        assert service._connection_attempts == {}
+
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_config_cached_until_invalidated(self, ha_server) -> None:
+        """Test configs are queried once and reloaded after invalidation."""
+        service = UserHomeAssistantService()
+        queries = []
+
+        async def query_user_config(user_id: str) -> dict:
+            queries.append(user_id)
+            return {"url": str(ha_server.make_url("")), "access_token": "token"}
+
+        service._query_user_config = query_user_config
+
+        await asyncio.gather(*(service.get_user_config("bob") for _ in range(3)))
+        client = await service.get_or_create_connection("bob")
+        assert queries == ["bob"]
+
+        await service.invalidate_user_config("bob", broadcast=False)
+        assert "bob" not in service._connection_keys
+
+        assert await service.get_or_create_connection("bob") is client
+        assert queries == ["bob", "bob"]
+
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_device_index_follows_state_changes(self, ha_server) -> None:
+        """Test device lookups use an index updated from state change events."""
+        service = UserHomeAssistantService()
+
+        async def get_user_config(user_id: str) -> dict:
+            return {"url": str(ha_server.make_url("")), "access_token": "token"}
+
+        service.get_user_config = get_user_config
+        client = await service.get_or_create_connection("alice")
+        await wait_for(lambda: client.states_synced)
+
+        devices = await service.get_user_devices("alice")
+        assert [device["entity_id"] for device in devices] == [
+            "light.grow_1",
+            "switch.pump",
+        ]
+        assert ha_server.rest_calls == ["/api/"]
+
+        subscription = ha_server.commands[0]["id"]
+        await ha_server.sockets[0].send_json(
+            {
+                "id": subscription,
+                "type": "event",
+                "event": {
+                    "a": {
+                        "sensor.temp": {
+                            "s": "21.5",
+                            "a": {"device_class": "temperature"},
+                            "lc": 1735689600.0,
+                        }
+                    },
+                    "c": {"switch.pump": {"+": {"s": "on"}}},
+                },
+            }
+        )
+        await wait_for(lambda: client.entity_cache["switch.pump"]["state"] == "on")
+
+        switches = await service.get_user_devices("alice", "switch")
+        sensors = await service.get_user_devices("alice", "sensor", "temperature")
+        assert [device["state"] for device in switches] == ["on"]
+        assert [device["entity_id"] for device in sensors] == ["sensor.temp"]
+        assert await service.get_user_devices("alice", "sensor", "humidity") == []
+        assert ha_server.rest_calls == ["/api/"]
+
+        await service.close()
+        assert client.state_change_callbacks == []
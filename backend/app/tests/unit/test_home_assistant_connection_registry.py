@@ -0,0 +1,109 @@
+"""
+Unit tests for the shared Home Assistant connection registry.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.home_assistant_connection_registry import (
+    HomeAssistantConnectionRegistry,
+    connection_key,
+)
+
+
+class FakeClient:
+    """Stands in for a HomeAssistantClient, recording when it is closed."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def connector(name: str, opened: list):
+    """Build a connect callback that records the clients it opens."""
+
+    async def connect() -> FakeClient:
+        client = FakeClient(name)
+        opened.append(client)
+        return client
+
+    return connect
+
+
+class TestHomeAssistantConnectionRegistry:
+    """Unit tests for HomeAssistantConnectionRegistry sharing and eviction."""
+
+    @pytest.mark.asyncio
+    async def test_users_with_same_config_share_client(self) -> None:
+        """Test one client is opened per URL and credentials fingerprint."""
+        registry = HomeAssistantConnectionRegistry()
+        config = {"url": "http://ha.local:8123/", "access_token": "secret"}
+        key = connection_key(config)
+        opened = []
+
+        first = await registry.acquire(key, "alice", connector("a", opened))
+        second = await registry.acquire(key, "bob", connector("b", opened))
+        other = await registry.acquire(
+            connection_key({**config, "access_token": "other"}),
+            "carol",
+            connector("c", opened),
+        )
+
+        assert first is second
+        assert other is not first
+        assert key == ("http://ha.local:8123", key[1])
+        assert "secret" not in key[1]
+        assert registry.stats()["holders"] == 3
+
+        await registry.close()
+        assert all(client.closed for client in opened)
+        assert registry.stats()["connections"] == 0
+
+    @pytest.mark.asyncio
+    async def test_budget_evicts_least_recently_used(self) -> None:
+        """Test the LRU unheld client is closed when the budget is full."""
+        evicted = []
+        registry = HomeAssistantConnectionRegistry(
+            max_connections=2,
+            on_evict=lambda key, holders: evicted.append((key, set(holders))),
+        )
+        opened = []
+
+        await registry.acquire(("a", "1"), "alice", connector("a", opened))
+        await registry.acquire(("b", "1"), "bob", connector("b", opened))
+        registry.release(("a", "1"), "alice")
+        await registry.acquire(("c", "1"), "carol", connector("c", opened))
+        assert [client.name for client in opened if client.closed] == ["a"]
+        assert evicted == [(("a", "1"), set())]
+
+        # With every client held, the least recently used one is closed
+        registry.get(("b", "1"))
+        await registry.acquire(("d", "1"), "dave", connector("d", opened))
+        assert [client.name for client in opened if client.closed] == ["a", "c"]
+        assert evicted[1:] == [(("c", "1"), {"carol"})]
+        assert registry.get(("c", "1")) is None
+
+        await registry.close()
+
+    @pytest.mark.asyncio
+    async def test_reaper_closes_idle_clients(self) -> None:
+        """Test clients unused for the idle timeout are closed by the reaper."""
+        registry = HomeAssistantConnectionRegistry(idle_timeout=0.05)
+        opened = []
+
+        await registry.acquire(("idle", "1"), "alice", connector("idle", opened))
+        await registry.acquire(("busy", "1"), "bob", connector("busy", opened))
+        registry.start_reaper(0.02)
+
+        for _ in range(6):
+            await asyncio.sleep(0.02)
+            registry.get(("busy", "1"))
+
+        assert [client.name for client in opened if client.closed] == ["idle"]
+        assert registry.get(("busy", "1")) is opened[1]
+
+        await registry.close()
@@ -0,0 +1,86 @@
+"""
+Unit tests for the adaptive Home Assistant rate limiter.
+"""
+
+import asyncio
+
+import aiohttp
+import pytest
+
+from app.services.home_assistant_rate_limiter import (
+    AdaptiveRateLimiter,
+    RequestPriority,
+    get_rate_limiter,
+)
+
+
+class TestAdaptiveRateLimiter:
+    """Unit tests for AdaptiveRateLimiter pacing and adaptation."""
+
+    @pytest.mark.asyncio
+    async def test_rate_adapts_to_responses(self) -> None:
+        """Test healthy responses raise the rate and overloads cut it."""
+        limiter = AdaptiveRateLimiter(initial_rate=10, decrease_cooldown=0)
+
+        async with limiter.request() as outcome:
+            outcome.status = 200
+        assert limiter.rate == pytest.approx(10.1)
+
+        limiter.record(0.01, 429)
+        assert limiter.rate == pytest.approx(5.05)
+        limiter.record(0.01, 503)
+        limiter.record(5.0, 200)
+        assert limiter.rate == pytest.approx(1.2625)
+
+        with pytest.raises(aiohttp.ClientConnectionError):
+            async with limiter.request():
+                raise aiohttp.ClientConnectionError()
+        assert limiter.rate == limiter.min_rate
+        assert limiter.metrics()["overloads"] == 4
+
+    @pytest.mark.asyncio
+    async def test_decreases_limited_by_cooldown(self) -> None:
+        """Test a burst of overload signals halves the rate only once."""
+        limiter = AdaptiveRateLimiter(initial_rate=10, decrease_cooldown=60)
+
+        for _ in range(5):
+            limiter.record(0.01, 500)
+
+        assert limiter.rate == 5
+
+    @pytest.mark.asyncio
+    async def test_waiters_served_by_priority(self) -> None:
+        """Test queued requests are released by lane and critical never waits."""
+        limiter = AdaptiveRateLimiter(initial_rate=50)
+        order = []
+
+        async def request(name: str, priority: RequestPriority) -> None:
+            await limiter.acquire(priority)
+            order.append(name)
+
+        await limiter.acquire()
+        tasks = [
+            asyncio.create_task(request("discovery", RequestPriority.BACKGROUND)),
+            asyncio.create_task(request("read", RequestPriority.NORMAL)),
+        ]
+        await asyncio.sleep(0)
+        assert limiter.metrics()["queued"] == {
+            "critical": 0,
+            "normal": 1,
+            "background": 1,
+        }
+
+        await request("stop", RequestPriority.CRITICAL)
+        await asyncio.gather(*tasks)
+
+        assert order == ["stop", "read", "discovery"]
+        assert limiter.metrics()["queue_depth"] == 0
+
+    @pytest.mark.asyncio
+    async def test_limiter_shared_per_host(self) -> None:
+        """Test clients of the same host share one limiter."""
+        first = get_rate_limiter("http://ha.local:8123")
+        second = get_rate_limiter("http://ha.local:8123/")
+
+        assert first is second
+        assert get_rate_limiter("http://other.local:8123") is not first
@@ -0,0 +1,65 @@
+"""
+Unit tests for the Redis-protocol cache backend.
+Runs against fakeredis as a local stand-in for a Redis server.
+"""
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from app.core.redis_cache import RedisCacheManager  # noqa: E402
+
+
+class TestRedisCacheManager:
+    """Unit tests for RedisCacheManager."""
+
+    @pytest.fixture
+    def redis_cache(self):
+        """Create a Redis cache backend over a fake server."""
+        return RedisCacheManager(
+            key_prefix="test:", client=fakeredis.aioredis.FakeRedis()
+        )
+
+    @pytest.mark.asyncio
+    async def test_set_and_get(self, redis_cache) -> None:
+        """Test values round-trip through the server."""
+        await redis_cache.set("key", {"value": 1}, ttl_seconds=60)
+
+        assert await redis_cache.get("key") == {"value": 1}
+        assert await redis_cache.exists("key")
+        assert await redis_cache.get("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_pipelined_multi_get_and_set(self, redis_cache) -> None:
+        """Test set_many/get_many skip missing keys."""
+        await redis_cache.set_many({"a": 1, "b": [2, 3]}, ttl_seconds=60)
+
+        found = await redis_cache.get_many(["a", "b", "c"])
+
+        assert found == {"a": 1, "b": [2, 3]}
+
+    @pytest.mark.asyncio
+    async def test_delete_pattern_is_prefix_scoped(self, redis_cache) -> None:
+        """Test pattern deletes only touch this backend's namespace."""
+        await redis_cache.set("sensor_latest:user-1:a", 1)
+        await redis_cache.set("sensor_latest:user-2:a", 2)
+        await redis_cache._client.set("other:sensor_latest:user-1:a", b"1")
+
+        deleted = await redis_cache.delete_pattern("sensor_latest:user-1:*")
+
+        assert deleted == 1
+        assert await redis_cache.keys() == ["sensor_latest:user-2:a"]
+        assert await redis_cache._client.exists("other:sensor_latest:user-1:a")
+
+    @pytest.mark.asyncio
+    async def test_shared_between_instances(self) -> None:
+        """Test two backends on one server see each other's writes."""
+        server = fakeredis.FakeServer()
+        worker_a = RedisCacheManager(client=fakeredis.aioredis.FakeRedis(server=server))
+        worker_b = RedisCacheManager(client=fakeredis.aioredis.FakeRedis(server=server))
+
+        await worker_a.set("key", "value")
+        assert await worker_b.get("key") == "value"
+
+        await worker_b.delete("key")
+        assert await worker_a.get("key") is None
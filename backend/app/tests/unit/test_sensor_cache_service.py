@@ -0,0 +1,430 @@
+"""
+Unit tests for SensorCacheService.
+Covers single-flight fetches, stale-while-revalidate and data source selection.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.cache import CacheManager
+from app.services import sensor_cache_service
+from app.services.sensor_cache_service import SensorCacheService, SensorReading
+
+
+def make_reading(value: float, timestamp: datetime | None = None) -> SensorReading:
+    return SensorReading(
+        id=1,
+        device_assignment_id="device-1",
+        reading_type="temperature",
+        value=value,
+        unit="C",
+        timestamp=timestamp or datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+class TestSensorCacheService:
+    """Unit tests for SensorCacheService caching behaviour."""
+
+    @pytest.fixture
+    def service(self):
+        """Create a service over a fresh in-process cache."""
+        return SensorCacheService(CacheManager())
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_fetch(self, service) -> None:
+        """Test concurrent callers on a cold key trigger a single DB fetch."""
+        calls = 0
+
+        async def fetch(*args):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return [make_reading(21.5)]
+
+        with patch.object(
+            service, "_fetch_latest_sensor_readings_from_db", side_effect=fetch
+        ):
+            results = await asyncio.gather(
+                *(service.get_latest_sensor_readings("user-1") for _ in range(10))
+            )
+
+        assert calls == 1
+        assert all(result[0].value == 21.5 for result in results)
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_refreshing(self, service) -> None:
+        """Test expired values are served while one background refresh runs."""
+        values = iter([20.0, 25.0])
+
+        async def fetch(*args):
+            return [make_reading(next(values))]
+
+        with patch.object(
+            service, "_fetch_latest_sensor_readings_from_db", side_effect=fetch
+        ):
+            await service.get_latest_sensor_readings("user-1")
+
+            # Past the 5 minute TTL but inside the stale window
+            stale_time = time.time() + 300 + 1
+            with patch("app.services.sensor_cache_service.time.time") as now:
+                now.return_value = stale_time
+                stale = await service.get_latest_sensor_readings("user-1")
+            await asyncio.sleep(0)
+
+            fresh = await service.get_latest_sensor_readings("user-1")
+
+        assert stale[0].value == 20.0
+        assert fresh[0].value == 25.0
+
+    @pytest.mark.asyncio
+    async def test_failed_fetch_not_cached(self, service) -> None:
+        """Test a failed fetch answers empty, keeps stale data and is retried."""
+        results = iter([None, [make_reading(20.0)], None, [make_reading(25.0)]])
+
+        async def fetch(*args):
+            return next(results)
+
+        with patch.object(
+            service, "_fetch_latest_sensor_readings_from_db", side_effect=fetch
+        ):
+            assert await service.get_latest_sensor_readings("user-1") == []
+            assert (await service.get_latest_sensor_readings("user-1"))[0].value == 20
+
+            # A failed background refresh leaves the stale value in place
+            stale_time = time.time() + 300 + 1
+            with patch("app.services.sensor_cache_service.time.time") as now:
+                now.return_value = stale_time
+                stale = await service.get_latest_sensor_readings("user-1")
+                await asyncio.sleep(0)
+                again = await service.get_latest_sensor_readings("user-1")
+                await asyncio.sleep(0)
+
+        assert stale[0].value == 20.0
+        assert again[0].value == 20.0
+
+    @pytest.mark.asyncio
+    async def test_local_backend_returns_cached_objects(self, service) -> None:
+        """Test in-process hits reuse the cached objects without rebuilding."""
+        reading = make_reading(21.5)
+
+        with patch.object(
+            service,
+            "_fetch_latest_sensor_readings_from_db",
+            side_effect=AsyncMock(return_value=[reading]),
+        ):
+            await service.get_latest_sensor_readings("user-1")
+            cached = await service.get_latest_sensor_readings("user-1")
+
+        assert cached[0] is reading
+
+    @pytest.mark.asyncio
+    async def test_remote_backend_round_trip(self) -> None:
+        """Test readings survive serialization through a remote backend."""
+        fakeredis = pytest.importorskip("fakeredis")
+        from app.core.redis_cache import RedisCacheManager
+
+        service = SensorCacheService(
+            RedisCacheManager(client=fakeredis.aioredis.FakeRedis())
+        )
+        reading = make_reading(21.5)
+
+        with patch.object(
+            service,
+            "_fetch_latest_sensor_readings_from_db",
+            side_effect=AsyncMock(return_value=[reading]),
+        ):
+            await service.get_latest_sensor_readings("user-1")
+            cached = await service.get_latest_sensor_readings("user-1")
+
+        assert cached == [reading]
+        assert cached[0] is not reading
+
+    @pytest.mark.asyncio
+    async def test_history_and_aggregates_from_ring_buffer(self, service) -> None:
+        """Test a fetched history window seeds the buffer for later queries."""
+        now = datetime.now(timezone.utc)
+        fetch = AsyncMock(return_value=[make_reading(20.0, now - timedelta(hours=2))])
+
+        with patch.object(service, "_fetch_sensor_history_from_db", side_effect=fetch):
+            await service.get_sensor_history(
+                "user-1", "device-1", "temperature", 24, resolution="raw"
+            )
+        service.record_readings("user-1", [make_reading(30.0, now)])
+
+        history = await service.get_sensor_history(
+            "user-1", "device-1", "temperature", 6, resolution="raw"
+        )
+        aggregates = await service.get_sensor_aggregates(
+            "user-1", ["device-1"], ["temperature"], period_hours=6
+        )
+
+        assert fetch.await_count == 1
+        assert [reading.value for reading in history] == [20.0, 30.0]
+        assert aggregates[0].avg_value == 25.0
+        assert aggregates[0].count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_history_fetch_not_cached_or_seeded(self, service) -> None:
+        """Test a failed fetch leaves the series to be fetched again."""
+        now = datetime.now(timezone.utc)
+        fetch = AsyncMock(
+            side_effect=[None, [make_reading(20.0, now - timedelta(hours=1))]]
+        )
+
+        with patch.object(service, "_fetch_sensor_history_from_db", side_effect=fetch):
+            failed = await service.get_sensor_history(
+                "user-1", "device-1", "temperature", 6, resolution="raw"
+            )
+            recovered = await service.get_sensor_history(
+                "user-1", "device-1", "temperature", 6, resolution="raw"
+            )
+
+        assert failed == []
+        assert fetch.await_count == 2
+        assert [reading.value for reading in recovered] == [20.0]
+
+    @pytest.mark.asyncio
+    async def test_history_fetch_pages_through_window(self, service) -> None:
+        """Test history is read page by page until a short page is returned."""
+
+        def row(reading_id: int) -> dict:
+            return {
+                "id": reading_id,
+                "device_assignment_id": "device-1",
+                "reading_type": "temperature",
+                "value": "21.5",
+                "unit": "C",
+                "timestamp": f"2025-01-01T00:00:{reading_id:02d}+00:00",
+                "device_name": "Sensor",
+                "location": None,
+            }
+
+        pages = [[row(1), row(2)], [row(3)]]
+        calls = []
+
+        def rpc(name, params):
+            calls.append(dict(params))
+            query = MagicMock()
+            query.execute = AsyncMock(return_value=MagicMock(data=pages.pop(0)))
+            return query
+
+        client = MagicMock(rpc=rpc)
+        with (
+            patch.object(sensor_cache_service, "HISTORY_PAGE_SIZE", 2),
+            patch.object(
+                sensor_cache_service,
+                "get_shared_async_supabase_client",
+                AsyncMock(return_value=client),
+            ),
+        ):
+            readings = await service._fetch_sensor_history_from_db(
+                "user-1", "device-1", "temperature", 24
+            )
+
+        assert [reading.id for reading in readings] == [1, 2, 3]
+        assert readings[0].value == 21.5
+        assert calls[1]["p_after_id"] == 2
+
+    @pytest.mark.asyncio
+    async def test_static_data_loaded_in_one_call(self, service) -> None:
+        """Test species, varieties and recipes share one catalog fetch."""
+        query = MagicMock()
+        query.execute = AsyncMock(
+            return_value=MagicMock(
+                data={
+                    "species": [{"name": "Basil"}],
+                    "varieties": [{"variety_name": "Genovese"}],
+                    "recipes": [{"name": "Fast basil"}],
+                }
+            )
+        )
+        client = MagicMock()
+        client.rpc.return_value = query
+
+        with patch.object(
+            sensor_cache_service,
+            "get_shared_async_supabase_client",
+            AsyncMock(return_value=client),
+        ):
+            species = await service.get_static_species_data()
+            varieties = await service.get_static_plant_varieties_data()
+            recipes = await service.get_static_grow_recipes_data()
+
+        assert client.rpc.call_count == 1
+        assert species == [{"name": "Basil"}]
+        assert varieties == [{"variety_name": "Genovese"}]
+        assert recipes == [{"name": "Fast basil"}]
+
+    def test_select_history_resolution(self, service) -> None:
+        """Test the finest resolution within the point budget is chosen."""
+        assert service.select_history_resolution(2) == "raw"
+        assert service.select_history_resolution(24) == "1m"
+        assert service.select_history_resolution(168) == "15m"
+        assert service.select_history_resolution(168, max_points=100) == "1h"
+        assert service.select_history_resolution(168, max_points=10) == "1h"
+
+    @pytest.mark.asyncio
+    async def test_long_history_uses_rollups(self, service) -> None:
+        """Test long windows are read from rollups and cached per resolution."""
+        query = MagicMock()
+        query.execute = AsyncMock(
+            return_value=MagicMock(
+                data=[
+                    {
+                        "device_assignment_id": "device-1",
+                        "reading_type": "temperature",
+                        "bucket_start": "2025-01-01T00:00:00+00:00",
+                        "avg_value": 21.25,
+                        "min_value": 20.0,
+                        "max_value": 22.5,
+                        "count": 90,
+                        "unit": "C",
+                    }
+                ]
+            )
+        )
+        client = MagicMock()
+        client.rpc.return_value = query
+
+        with patch.object(
+            sensor_cache_service,
+            "get_shared_async_supabase_client",
+            AsyncMock(return_value=client),
+        ):
+            first = await service.get_sensor_history(
+                "user-1", "device-1", "temperature", 168
+            )
+            second = await service.get_sensor_history(
+                "user-1", "device-1", "temperature", 168
+            )
+
+        assert client.rpc.call_count == 1
+        assert client.rpc.call_args.args[0] == "get_sensor_rollup_history"
+        assert client.rpc.call_args.args[1]["p_resolution"] == "15m"
+        assert first == second
+        assert first[0].value == 21.25
+
+    @pytest.mark.asyncio
+    async def test_downsampled_history_cached_separately(self, service) -> None:
+        """Test downsampled history is computed once and cached on its own key."""
+        now = datetime.now(timezone.utc)
+        readings = [
+            make_reading(float(i % 5), now - timedelta(minutes=100 - i))
+            for i in range(100)
+        ]
+        fetch = AsyncMock(return_value=readings)
+
+        with patch.object(service, "_fetch_sensor_history_from_db", side_effect=fetch):
+            resolution, first = await service.get_downsampled_sensor_history(
+                "user-1", "device-1", "temperature", 2, max_points=10
+            )
+            _, second = await service.get_downsampled_sensor_history(
+                "user-1", "device-1", "temperature", 2, max_points=10
+            )
+
+        assert resolution == "raw"
+        assert len(first) == 10
+        assert first == second
+        assert fetch.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_history_batch_fetches_missing_series_once(self, service) -> None:
+        """Test batched history reads all uncached series with one query."""
+        calls = []
+
+        def rpc(name, params):
+            calls.append((name, dict(params)))
+            rows = [
+                {
+                    "device_assignment_id": device_id,
+                    "reading_type": reading_type,
+                    "unit": "C",
+                    "device_name": "Sensor",
+                    "location": None,
+                    "timestamps": [1735689600.0, 1735690500.0],
+                    "values": [20.0, 21.0],
+                    "ids": None,
+                }
+                for device_id, reading_type in zip(
+                    params["p_device_ids"], params["p_reading_types"], strict=True
+                )
+                if device_id != "device-empty"
+            ]
+            query = MagicMock()
+            query.execute = AsyncMock(return_value=MagicMock(data=rows))
+            return query
+
+        client = MagicMock(rpc=rpc)
+        with patch.object(
+            sensor_cache_service,
+            "get_shared_async_supabase_client",
+            AsyncMock(return_value=client),
+        ):
+            first = await service.get_sensor_history_batch(
+                "user-1",
+                [("device-1", "temperature"), ("device-2", "humidity")],
+                hours=168,
+            )
+            second = await service.get_sensor_history_batch(
+                "user-1",
+                [
+                    ("device-2", "humidity"),
+                    ("device-1", "temperature"),
+                    ("device-empty", "temperature"),
+                ],
+                hours=168,
+            )
+            single = await service.get_sensor_history(
+                "user-1", "device-1", "temperature", 168
+            )
+
+        assert len(calls) == 2
+        assert calls[0][0] == "get_sensor_history_series"
+        assert calls[0][1]["p_resolution"] == "15m"
+        assert calls[1][1]["p_device_ids"] == ["device-empty"]
+        assert list(second) == [
+            ("device-2", "humidity"),
+            ("device-1", "temperature"),
+            ("device-empty", "temperature"),
+        ]
+        assert second[("device-empty", "temperature")] == []
+        assert [r.value for r in first[("device-1", "temperature")]] == [20.0, 21.0]
+        assert first[("device-1", "temperature")][0].id is None
+        assert single == first[("device-1", "temperature")]
+
+    @pytest.mark.asyncio
+    async def test_failed_history_batch_not_seeded(self, service) -> None:
+        """Test series of a failed batch fetch are fetched again next time."""
+        now = datetime.now(timezone.utc)
+        fetch = AsyncMock(
+            side_effect=[
+                None,
+                {
+                    ("device-1", "temperature"): [
+                        make_reading(20.0, now - timedelta(hours=1))
+                    ]
+                },
+            ]
+        )
+        series = [("device-1", "temperature"), ("device-empty", "temperature")]
+
+        with patch.object(service, "_fetch_history_series_from_db", side_effect=fetch):
+            failed = await service.get_sensor_history_batch(
+                "user-1", series, hours=6, resolution="raw"
+            )
+            recovered = await service.get_sensor_history_batch(
+                "user-1", series, hours=6, resolution="raw"
+            )
+            cached = await service.get_sensor_history_batch(
+                "user-1", series, hours=6, resolution="raw"
+            )
+
+        assert failed == {pair: [] for pair in series}
+        assert fetch.await_count == 2
+        assert [r.value for r in recovered[("device-1", "temperature")]] == [20.0]
+        # Empty series of a successful fetch are seeded like any other
+        assert cached == recovered
@@ -0,0 +1,58 @@
+"""
+Unit tests for sensor series downsampling.
+Covers LTTB and min/max-per-bucket point selection.
+"""
+
+import math
+
+from app.services.sensor_downsampling import (
+    downsample_indices,
+    lttb_indices,
+    min_max_indices,
+)
+
+
+class TestLttb:
+    """Unit tests for Largest-Triangle-Three-Buckets."""
+
+    def test_short_series_unchanged(self) -> None:
+        """Test series within the threshold are returned whole."""
+        assert lttb_indices([0, 1, 2], [5, 6, 7], 10) == [0, 1, 2]
+
+    def test_keeps_endpoints_and_threshold(self) -> None:
+        """Test the output size and that first/last points are kept."""
+        xs = list(range(1000))
+        ys = [math.sin(x / 50) for x in xs]
+
+        indices = lttb_indices(xs, ys, 100)
+
+        assert len(indices) == 100
+        assert indices[0] == 0
+        assert indices[-1] == 999
+        assert indices == sorted(set(indices))
+
+    def test_keeps_spike(self) -> None:
+        """Test a single outlier survives downsampling."""
+        xs = list(range(500))
+        ys = [0.0] * 500
+        ys[250] = 100.0
+
+        assert 250 in lttb_indices(xs, ys, 20)
+
+
+class TestMinMax:
+    """Unit tests for min/max-per-bucket downsampling."""
+
+    def test_keeps_extremes_per_bucket(self) -> None:
+        """Test each bucket contributes its minimum and maximum."""
+        ys = [1, 9, 5, 5, 2, 8, 3, 3]
+
+        assert min_max_indices(ys, 4) == [0, 1, 4, 5]
+
+    def test_dispatch_by_mode(self) -> None:
+        """Test the mode selects the algorithm."""
+        xs = list(range(100))
+        ys = [float(x % 7) for x in xs]
+
+        assert len(downsample_indices(xs, ys, 10, "lttb")) == 10
+        assert len(downsample_indices(xs, ys, 10, "minmax")) <= 10
@@ -0,0 +1,229 @@
+"""
+Unit tests for SensorIngestionService.
+Covers payload parsing, group-commit batching and ownership checks.
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.sensor_ingestion_service import (
+    IngestionBufferFullError,
+    IngestionError,
+    SensorIngestionService,
+    TooManyReadingsError,
+    parse_columnar,
+    parse_ndjson,
+)
+
+DEVICE_ID = "5b1c9f3e-8d4a-4a77-9a55-0c6a7f1d2e01"
+OTHER_DEVICE_ID = "0f2d6c1b-3e4a-4b5c-8d9e-1a2b3c4d5e6f"
+
+
+def make_supabase(owned_ids: list[str]) -> AsyncMock:
+    query = MagicMock()
+    query.select.return_value = query
+    query.eq.return_value = query
+    query.execute = AsyncMock(
+        return_value=MagicMock(data=[{"id": device_id} for device_id in owned_ids])
+    )
+    client = MagicMock()
+    client.table.return_value = query
+    return AsyncMock(return_value=client)
+
+
+def make_database() -> MagicMock:
+    database = MagicMock(is_available=True)
+    database.copy_records_to_table = AsyncMock()
+    return database
+
+
+class TestPayloadParsing:
+    """Unit tests for NDJSON and columnar parsing."""
+
+    def test_parse_ndjson(self) -> None:
+        """Test valid lines are parsed and invalid lines reported by index."""
+        body = "\n".join(
+            [
+                json.dumps(
+                    {
+                        "device_assignment_id": DEVICE_ID,
+                        "reading_type": "temperature",
+                        "value": 21.5,
+                        "timestamp": "2025-01-01T00:00:00Z",
+                    }
+                ),
+                "",
+                json.dumps({"device_assignment_id": DEVICE_ID, "value": "hot"}),
+                "not json",
+                json.dumps(
+                    {
+                        "device_assignment_id": DEVICE_ID,
+                        "reading_type": "temperature",
+                        "value": 21.5,
+                        "timestamp": 1e20,
+                    }
+                ),
+            ]
+        ).encode()
+
+        readings, errors = parse_ndjson(body)
+
+        assert [index for index, _ in readings] == [0]
+        assert readings[0][1].value == 21.5
+        assert readings[0][1].timestamp.year == 2025
+        assert [error.index for error in errors] == [1, 2, 3]
+        assert errors[2].error == "timestamp is out of range"
+
+    def test_parse_columnar_broadcasts_scalars(self) -> None:
+        """Test scalar columns apply to every reading."""
+        body = json.dumps(
+            {
+                "device_assignment_id": DEVICE_ID,
+                "reading_type": "humidity",
+                "value": [40, 41.5, None],
+                "timestamp": [1735689600, 1735689610, 1735689620],
+            }
+        ).encode()
+
+        readings, errors = parse_columnar(body)
+
+        assert [reading.value for _, reading in readings] == [40.0, 41.5]
+        assert all(r.reading_type == "humidity" for _, r in readings)
+        assert [error.index for error in errors] == [2]
+
+    def test_parse_columnar_rejects_ragged_columns(self) -> None:
+        """Test column length mismatches reject the payload."""
+        body = json.dumps(
+            {
+                "device_assignment_id": DEVICE_ID,
+                "reading_type": ["a"],
+                "value": [1, 2],
+            }
+        ).encode()
+
+        with pytest.raises(IngestionError):
+            parse_columnar(body)
+
+    def test_parsers_stop_at_reading_limit(self) -> None:
+        """Test payloads over the reading limit are rejected before parsing rows."""
+        line = json.dumps(
+            {"device_assignment_id": DEVICE_ID, "reading_type": "ph", "value": 6.1}
+        )
+        # Lines past the limit are never parsed, valid or not
+        ndjson = "\n".join([line, "", line, "not json"]).encode()
+        columnar = json.dumps(
+            {"device_assignment_id": DEVICE_ID, "reading_type": "ph", "value": [1, 2]}
+        ).encode()
+
+        assert len(parse_ndjson(ndjson, max_readings=3)[0]) == 2
+        with pytest.raises(TooManyReadingsError):
+            parse_ndjson(ndjson, max_readings=2)
+        assert len(parse_columnar(columnar, max_readings=2)[0]) == 2
+        with pytest.raises(TooManyReadingsError):
+            parse_columnar(columnar, max_readings=1)
+
+
+class TestSensorIngestionService:
+    """Unit tests for buffering and batched writes."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_batch(self) -> None:
+        """Test readings from concurrent requests are written with one COPY."""
+        database = make_database()
+        service = SensorIngestionService(
+            flush_interval=0.01,
+            database_factory=AsyncMock(return_value=database),
+            supabase_factory=make_supabase([DEVICE_ID]),
+        )
+        readings, _ = parse_columnar(
+            json.dumps(
+                {
+                    "device_assignment_id": DEVICE_ID,
+                    "reading_type": "temperature",
+                    "value": [1, 2, 3],
+                }
+            ).encode()
+        )
+
+        results = await asyncio.gather(
+            service.ingest("user-1", readings), service.ingest("user-1", readings)
+        )
+
+        assert database.copy_records_to_table.await_count == 1
+        records = database.copy_records_to_table.await_args.kwargs["records"]
+        assert len(records) == 6
+        assert results[0][0].batch_id == results[1][0].batch_id
+        assert results[0][0].accepted == 3
+
+    @pytest.mark.asyncio
+    async def test_flush_size_triggers_immediate_write(self) -> None:
+        """Test a full buffer is flushed without waiting for the interval."""
+        database = make_database()
+        service = SensorIngestionService(
+            flush_size=2,
+            flush_interval=60,
+            database_factory=AsyncMock(return_value=database),
+            supabase_factory=make_supabase([DEVICE_ID]),
+        )
+        readings, _ = parse_columnar(
+            json.dumps(
+                {
+                    "device_assignment_id": DEVICE_ID,
+                    "reading_type": "temperature",
+                    "value": [1, 2],
+                }
+            ).encode()
+        )
+
+        ack, _ = await asyncio.wait_for(service.ingest("user-1", readings), 1)
+
+        assert ack.accepted == 2
+        assert service.buffered == 0
+
+    @pytest.mark.asyncio
+    async def test_unknown_devices_rejected(self) -> None:
+        """Test readings for devices the user does not own are not written."""
+        database = make_database()
+        service = SensorIngestionService(
+            flush_interval=0.01,
+            database_factory=AsyncMock(return_value=database),
+            supabase_factory=make_supabase([DEVICE_ID]),
+        )
+        readings, _ = parse_columnar(
+            json.dumps(
+                {
+                    "device_assignment_id": [DEVICE_ID, OTHER_DEVICE_ID],
+                    "reading_type": "temperature",
+                    "value": [1, 2],
+                }
+            ).encode()
+        )
+
+        ack, errors = await service.ingest("user-1", readings)
+
+        assert ack.accepted == 1
+        assert [error.index for error in errors] == [1]
+
+    @pytest.mark.asyncio
+    async def test_buffer_limit_applies_backpressure(self) -> None:
+        """Test submissions beyond the buffer limit are refused."""
+        service = SensorIngestionService(
+            max_buffered=2,
+            database_factory=AsyncMock(return_value=make_database()),
+            supabase_factory=make_supabase([DEVICE_ID]),
+        )
+        readings, _ = parse_columnar(
+            json.dumps(
+                {
+                    "device_assignment_id": DEVICE_ID,
+                    "reading_type": "temperature",
+                    "value": [1, 2, 3],
+                }
+            ).encode()
+        )
+
+        with pytest.raises(IngestionBufferFullError):
+            await service.submit("user-1", [reading for _, reading in readings])
@@ -0,0 +1,74 @@
+"""
+Unit tests for the columnar sensor ring buffer.
+"""
+
+import pytest
+
+from app.services.sensor_ring_buffer import SensorRingBuffer
+
+
+class TestSensorRingBuffer:
+    """Unit tests for SensorRingBuffer."""
+
+    @pytest.fixture
+    def ring_buffer(self):
+        """Create a small ring buffer."""
+        return SensorRingBuffer(capacity=4, max_series=2)
+
+    def test_unseeded_series_not_answered(self, ring_buffer) -> None:
+        """Test appends alone never make a series queryable."""
+        ring_buffer.append("user-1", "device-1", "temperature", 100.0, 20.0)
+
+        assert ring_buffer.window("user-1", "device-1", "temperature", 0.0) is None
+
+    def test_seeded_window_and_appends(self, ring_buffer) -> None:
+        """Test a seeded series answers windows including later appends."""
+        ring_buffer.seed(
+            "user-1",
+            "device-1",
+            "temperature",
+            [(110.0, 21.0, 2), (100.0, 20.0, 1)],
+            since=90.0,
+            unit="C",
+        )
+        ring_buffer.append("user-1", "device-1", "temperature", 120.0, 22.0, 3)
+
+        window = ring_buffer.window("user-1", "device-1", "temperature", 105.0)
+
+        assert list(window.timestamps) == [110.0, 120.0]
+        assert list(window.values) == [21.0, 22.0]
+        assert list(window.ids) == [2, 3]
+        assert window.unit == "C"
+
+    def test_overwritten_window_not_answered(self, ring_buffer) -> None:
+        """Test windows reaching into overwritten readings fall back."""
+        ring_buffer.seed("user-1", "device-1", "temperature", [], since=0.0)
+        for second in range(6):
+            ring_buffer.append(
+                "user-1", "device-1", "temperature", float(second), float(second)
+            )
+
+        assert ring_buffer.window("user-1", "device-1", "temperature", 1.0) is None
+        window = ring_buffer.window("user-1", "device-1", "temperature", 2.0)
+        assert list(window.values) == [2.0, 3.0, 4.0, 5.0]
+
+    def test_stats(self, ring_buffer) -> None:
+        """Test min/max/avg over a window."""
+        ring_buffer.seed(
+            "user-1",
+            "device-1",
+            "humidity",
+            [(1.0, 40.0, None), (2.0, 60.0, None), (3.0, 50.0, None)],
+            since=0.0,
+        )
+
+        stats = ring_buffer.stats("user-1", "device-1", "humidity", 0.0)
+
+        assert (stats.count, stats.min_value, stats.max_value) == (3, 40.0, 60.0)
+        assert stats.avg_value == 50.0
+
+    def test_other_users_cannot_read_series(self, ring_buffer) -> None:
+        """Test series are scoped to the user that seeded them."""
+        ring_buffer.seed("user-1", "device-1", "temperature", [], since=0.0)
+
+        assert ring_buffer.window("user-2", "device-1", "temperature", 0.0) is None
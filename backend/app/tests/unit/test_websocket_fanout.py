@@ -0,0 +1,91 @@
+"""
+Unit tests for WebSocketFanout.
+Covers micro-batching, merging of state updates and slow socket isolation.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services.websocket_fanout import WebSocketFanout
+
+USER_ID = "user-1"
+
+
+class FakeWebSocket:
+    """Records sent frames, optionally blocking until released."""
+
+    def __init__(self, blocked: bool = False) -> None:
+        self.frames: list[str] = []
+        self.released = asyncio.Event()
+        if not blocked:
+            self.released.set()
+
+    async def send_text(self, frame: str) -> None:
+        await self.released.wait()
+        self.frames.append(frame)
+
+
+def state_update(entity_id: str, state: str) -> dict:
+    return {
+        "type": "device_state_update",
+        "data": {"entity_id": entity_id, "state": state},
+    }
+
+
+class TestWebSocketFanout:
+    """Unit tests for WebSocketFanout delivery."""
+
+    @pytest.mark.asyncio
+    async def test_burst_merged_into_one_frame(self) -> None:
+        """Test a burst becomes one frame with the latest state per entity."""
+        fanout = WebSocketFanout(batch_interval=0.01)
+        socket = FakeWebSocket()
+        fanout.add(USER_ID, socket)
+
+        fanout.publish(USER_ID, state_update("light.a", "on"))
+        fanout.publish(USER_ID, state_update("light.b", "on"))
+        fanout.publish(USER_ID, state_update("light.a", "off"))
+        await asyncio.sleep(0.05)
+
+        assert len(socket.frames) == 1
+        messages = json.loads(socket.frames[0])
+        assert [(m["data"]["entity_id"], m["data"]["state"]) for m in messages] == [
+            ("light.b", "on"),
+            ("light.a", "off"),
+        ]
+
+        # A lone message is sent as is, not wrapped in an array
+        fanout.publish(USER_ID, {"type": "connection_status", "data": {}})
+        await asyncio.sleep(0.05)
+        assert json.loads(socket.frames[1])["type"] == "connection_status"
+
+        await fanout.close()
+
+    @pytest.mark.asyncio
+    async def test_slow_socket_drops_oldest_without_delaying_others(self) -> None:
+        """Test a blocked socket keeps only its newest frames."""
+        fanout = WebSocketFanout(batch_interval=0.001, queue_size=2)
+        slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+        fanout.add(USER_ID, slow)
+        fanout.add(USER_ID, fast)
+
+        for state in range(5):
+            fanout.publish(USER_ID, state_update("fan.exhaust", str(state)))
+            await asyncio.sleep(0.01)
+
+        assert len(fast.frames) == 5
+        assert fanout.stats()["dropped_frames"] > 0
+
+        slow.released.set()
+        await asyncio.sleep(0.01)
+        assert [json.loads(f)["data"]["state"] for f in slow.frames][-2:] == [
+            "3",
+            "4",
+        ]
+
+        assert fanout.remove(USER_ID, slow) is False
+        assert fanout.remove(USER_ID, fast) is True
+        assert fanout.stats()["sockets"] == 0
+        await fanout.close()
@@ -187,8 +187,12 @@ export function DeviceProvider({ children }: DeviceProviderProps) {
 
       ws.onmessage = (event) => {
         try {
-          const message: DeviceWebSocketMessage = JSON.parse(event.data);
-          handleWebSocketMessage(message);
+          const payload = JSON.parse(event.data);
+          // Bursts of updates arrive batched as an array of messages
+          const messages: DeviceWebSocketMessage[] = Array.isArray(payload)
+            ? payload
+            : [payload];
+          messages.forEach(handleWebSocketMessage);
         } catch (error) {
           // Error parsing WebSocket message
         }
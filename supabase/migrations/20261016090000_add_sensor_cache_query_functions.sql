@@ -0,0 +1,195 @@
+-- Migration: Sensor cache query functions
+-- Description: Read functions used by the backend SensorCacheService on cache
+-- misses. Every sensor_readings scan is bounded by device_assignment_id and a
+-- timestamp range so it is served by
+-- idx_sensor_readings_device_assignment_id_timestamp, and aggregation happens
+-- in the database instead of shipping raw rows to the API.
+--
+-- The functions take an explicit user id and are only executable by the
+-- service role; ownership is enforced through device_assignments.user_id.
+
+-- =====================================================
+-- LATEST READINGS
+-- =====================================================
+
+-- Latest reading per (device, reading type) within a lookback window
+CREATE OR REPLACE FUNCTION public.get_latest_sensor_readings(
+    p_user_id UUID,
+    p_device_ids UUID[] DEFAULT NULL,
+    p_reading_types TEXT[] DEFAULT NULL,
+    p_lookback_hours INTEGER DEFAULT 24
+)
+RETURNS TABLE (
+    id BIGINT,
+    device_assignment_id UUID,
+    reading_type TEXT,
+    value NUMERIC,
+    unit TEXT,
+    "timestamp" TIMESTAMPTZ,
+    device_name TEXT,
+    location TEXT
+)
+LANGUAGE sql STABLE
+SET search_path = public
+AS $$
+    SELECT DISTINCT ON (sr.device_assignment_id, sr.reading_type)
+        sr.id,
+        sr.device_assignment_id,
+        sr.reading_type,
+        sr.value,
+        sr.unit,
+        sr."timestamp",
+        COALESCE(da.device_name, da.friendly_name) AS device_name,
+        da.location_id AS location
+    FROM public.device_assignments da
+    JOIN public.sensor_readings sr ON sr.device_assignment_id = da.id
+    WHERE da.user_id = p_user_id
+      AND (p_device_ids IS NULL OR da.id = ANY (p_device_ids))
+      AND (p_reading_types IS NULL OR sr.reading_type = ANY (p_reading_types))
+      AND sr."timestamp" >= NOW() - make_interval(hours => p_lookback_hours)
+    ORDER BY sr.device_assignment_id, sr.reading_type, sr."timestamp" DESC;
+$$;
+
+-- =====================================================
+-- HISTORY
+-- =====================================================
+
+-- One page of a series in chronological order. Pages are keyset-paginated on
+-- ("timestamp", id) so that long windows are not truncated by PostgREST's
+-- max_rows limit and no page re-scans earlier rows.
+CREATE OR REPLACE FUNCTION public.get_sensor_history(
+    p_user_id UUID,
+    p_device_id UUID,
+    p_reading_type TEXT,
+    p_since TIMESTAMPTZ,
+    p_after_timestamp TIMESTAMPTZ DEFAULT NULL,
+    p_after_id BIGINT DEFAULT NULL,
+    p_limit INTEGER DEFAULT 1000
+)
+RETURNS TABLE (
+    id BIGINT,
+    device_assignment_id UUID,
+    reading_type TEXT,
+    value NUMERIC,
+    unit TEXT,
+    "timestamp" TIMESTAMPTZ,
+    device_name TEXT,
+    location TEXT
+)
+LANGUAGE sql STABLE
+SET search_path = public
+AS $$
+    SELECT
+        sr.id,
+        sr.device_assignment_id,
+        sr.reading_type,
+        sr.value,
+        sr.unit,
+        sr."timestamp",
+        COALESCE(da.device_name, da.friendly_name) AS device_name,
+        da.location_id AS location
+    FROM public.device_assignments da
+    JOIN public.sensor_readings sr ON sr.device_assignment_id = da.id
+    WHERE da.id = p_device_id
+      AND da.user_id = p_user_id
+      AND sr.reading_type = p_reading_type
+      AND sr."timestamp" >= p_since
+      AND (
+          p_after_timestamp IS NULL
+          OR (sr."timestamp", sr.id) > (p_after_timestamp, p_after_id)
+      )
+    ORDER BY sr."timestamp", sr.id
+    LIMIT p_limit;
+$$;
+
+-- =====================================================
+-- AGGREGATES
+-- =====================================================
+
+-- Min/max/avg/count per (device, reading type). With p_bucket set (e.g.
+-- 'hour'), one row per date_trunc bucket is returned instead of one row for
+-- the whole period.
+CREATE OR REPLACE FUNCTION public.get_sensor_aggregates(
+    p_user_id UUID,
+    p_device_ids UUID[] DEFAULT NULL,
+    p_reading_types TEXT[] DEFAULT NULL,
+    p_period_hours INTEGER DEFAULT 24,
+    p_bucket TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    device_assignment_id UUID,
+    reading_type TEXT,
+    avg_value DOUBLE PRECISION,
+    min_value DOUBLE PRECISION,
+    max_value DOUBLE PRECISION,
+    count BIGINT,
+    period_start TIMESTAMPTZ,
+    period_end TIMESTAMPTZ
+)
+LANGUAGE sql STABLE
+SET search_path = public
+AS $$
+    WITH bounds AS (
+        SELECT NOW() AS period_end,
+               NOW() - make_interval(hours => p_period_hours) AS period_start
+    )
+    SELECT
+        sr.device_assignment_id,
+        sr.reading_type,
+        AVG(sr.value)::DOUBLE PRECISION AS avg_value,
+        MIN(sr.value)::DOUBLE PRECISION AS min_value,
+        MAX(sr.value)::DOUBLE PRECISION AS max_value,
+        COUNT(*) AS count,
+        CASE WHEN p_bucket IS NULL THEN b.period_start
+             ELSE date_trunc(p_bucket, sr."timestamp") END AS period_start,
+        CASE WHEN p_bucket IS NULL THEN b.period_end
+             ELSE date_trunc(p_bucket, sr."timestamp")
+                  + ('1 ' || p_bucket)::INTERVAL END AS period_end
+    FROM bounds b
+    JOIN public.device_assignments da ON da.user_id = p_user_id
+    JOIN public.sensor_readings sr ON sr.device_assignment_id = da.id
+    WHERE (p_device_ids IS NULL OR da.id = ANY (p_device_ids))
+      AND (p_reading_types IS NULL OR sr.reading_type = ANY (p_reading_types))
+      AND sr."timestamp" >= b.period_start
+    GROUP BY 1, 2, 7, 8
+    ORDER BY 1, 2, 7;
+$$;
+
+-- =====================================================
+-- STATIC CATALOG
+-- =====================================================
+
+-- Species, seed varieties and grow recipes in a single round trip
+CREATE OR REPLACE FUNCTION public.get_static_catalog()
+RETURNS JSONB
+LANGUAGE sql STABLE
+SET search_path = public
+AS $$
+    SELECT jsonb_build_object(
+        'species', COALESCE(
+            (SELECT jsonb_agg(to_jsonb(s) ORDER BY s.name)
+             FROM public.species s WHERE s.is_active),
+            '[]'::jsonb),
+        'varieties', COALESCE(
+            (SELECT jsonb_agg(to_jsonb(v) ORDER BY v.variety_name)
+             FROM public.seed_varieties v),
+            '[]'::jsonb),
+        'recipes', COALESCE(
+            (SELECT jsonb_agg(to_jsonb(r) ORDER BY r.name)
+             FROM public.grow_recipes r WHERE r.is_active),
+            '[]'::jsonb)
+    );
+$$;
+
+-- =====================================================
+-- PERMISSIONS
+-- =====================================================
+
+REVOKE ALL ON FUNCTION public.get_latest_sensor_readings(UUID, UUID[], TEXT[], INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.get_sensor_history(UUID, UUID, TEXT, TIMESTAMPTZ, TIMESTAMPTZ, BIGINT, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.get_sensor_aggregates(UUID, UUID[], TEXT[], INTEGER, TEXT) FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION public.get_latest_sensor_readings(UUID, UUID[], TEXT[], INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.get_sensor_history(UUID, UUID, TEXT, TIMESTAMPTZ, TIMESTAMPTZ, BIGINT, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.get_sensor_aggregates(UUID, UUID[], TEXT[], INTEGER, TEXT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.get_static_catalog() TO authenticated, service_role;
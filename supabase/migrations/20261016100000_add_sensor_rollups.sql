@@ -0,0 +1,422 @@
+-- Migration: Sensor and grow metric rollups
+-- Description: 1-minute, 15-minute and 1-hour rollups of sensor_readings and
+-- grow_monitoring_metrics so that long history windows and aggregates are
+-- served from a few thousand pre-aggregated rows instead of raw readings.
+--
+-- Rollups store count/sum/min/max per bucket, so coarser buckets and longer
+-- periods can be combined exactly. They are maintained incrementally by
+-- refresh_sensor_rollups() / refresh_grow_metric_rollups(), scheduled every
+-- minute with pg_cron: each run re-aggregates only the buckets since the
+-- last run (minus a late-arrival window) and upserts them.
+
+-- =====================================================
+-- ROLLUP TABLES
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS public.sensor_reading_rollups (
+    resolution TEXT NOT NULL CHECK (resolution IN ('1m', '15m', '1h')),
+    device_assignment_id UUID NOT NULL REFERENCES public.device_assignments(id) ON DELETE CASCADE,
+    reading_type TEXT NOT NULL,
+    bucket_start TIMESTAMPTZ NOT NULL,
+    sample_count INTEGER NOT NULL,
+    value_sum DOUBLE PRECISION NOT NULL,
+    value_min DOUBLE PRECISION NOT NULL,
+    value_max DOUBLE PRECISION NOT NULL,
+    unit TEXT,
+    PRIMARY KEY (resolution, device_assignment_id, reading_type, bucket_start)
+);
+
+COMMENT ON TABLE public.sensor_reading_rollups IS 'Pre-aggregated sensor_readings per 1m/15m/1h bucket, maintained by refresh_sensor_rollups()';
+
+CREATE TABLE IF NOT EXISTS public.grow_metric_rollups (
+    resolution TEXT NOT NULL CHECK (resolution IN ('1m', '15m', '1h')),
+    grow_id UUID NOT NULL REFERENCES public.grows(id) ON DELETE CASCADE,
+    metric_type VARCHAR(50) NOT NULL,
+    bucket_start TIMESTAMPTZ NOT NULL,
+    sample_count INTEGER NOT NULL,
+    value_sum DOUBLE PRECISION NOT NULL,
+    value_min DOUBLE PRECISION NOT NULL,
+    value_max DOUBLE PRECISION NOT NULL,
+    unit VARCHAR(20),
+    PRIMARY KEY (resolution, grow_id, metric_type, bucket_start)
+);
+
+COMMENT ON TABLE public.grow_metric_rollups IS 'Pre-aggregated grow_monitoring_metrics per 1m/15m/1h bucket, maintained by refresh_grow_metric_rollups()';
+
+-- How far each source has been rolled up
+CREATE TABLE IF NOT EXISTS public.rollup_watermarks (
+    source TEXT PRIMARY KEY,
+    rolled_up_to TIMESTAMPTZ NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
+);
+
+-- Rollups are read through the functions below (service role only)
+ALTER TABLE public.sensor_reading_rollups ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.grow_metric_rollups ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.rollup_watermarks ENABLE ROW LEVEL SECURITY;
+
+-- =====================================================
+-- INCREMENTAL MAINTENANCE
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.refresh_sensor_rollups(
+    p_late_window INTERVAL DEFAULT '15 minutes',
+    p_initial_backfill INTERVAL DEFAULT '7 days'
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+    v_epoch CONSTANT TIMESTAMPTZ := 'epoch';
+    v_to TIMESTAMPTZ := date_trunc('minute', NOW());
+    v_from TIMESTAMPTZ;
+    v_buckets INTEGER;
+BEGIN
+    -- Overlapping runs would only repeat the same work
+    IF NOT pg_try_advisory_xact_lock(hashtext('refresh_sensor_rollups')) THEN
+        RETURN 0;
+    END IF;
+
+    SELECT rolled_up_to - p_late_window INTO v_from
+    FROM public.rollup_watermarks WHERE source = 'sensor_readings';
+    v_from := date_trunc('minute', COALESCE(v_from, NOW() - p_initial_backfill));
+
+    -- Minute buckets from raw readings (the current, still open minute is
+    -- rolled up too and rewritten by the next run)
+    INSERT INTO public.sensor_reading_rollups AS r (
+        resolution, device_assignment_id, reading_type, bucket_start,
+        sample_count, value_sum, value_min, value_max, unit
+    )
+    SELECT '1m', sr.device_assignment_id, sr.reading_type,
+           date_bin('1 minute', sr."timestamp", v_epoch),
+           COUNT(*), SUM(sr.value), MIN(sr.value), MAX(sr.value), MAX(sr.unit)
+    FROM public.sensor_readings sr
+    WHERE sr."timestamp" >= v_from
+    GROUP BY 2, 3, 4
+    ON CONFLICT (resolution, device_assignment_id, reading_type, bucket_start) DO UPDATE
+    SET sample_count = EXCLUDED.sample_count,
+        value_sum = EXCLUDED.value_sum,
+        value_min = EXCLUDED.value_min,
+        value_max = EXCLUDED.value_max,
+        unit = EXCLUDED.unit;
+    GET DIAGNOSTICS v_buckets = ROW_COUNT;
+
+    -- 15 minute buckets from minute buckets
+    INSERT INTO public.sensor_reading_rollups AS r (
+        resolution, device_assignment_id, reading_type, bucket_start,
+        sample_count, value_sum, value_min, value_max, unit
+    )
+    SELECT '15m', device_assignment_id, reading_type,
+           date_bin('15 minutes', bucket_start, v_epoch),
+           SUM(sample_count), SUM(value_sum), MIN(value_min), MAX(value_max), MAX(unit)
+    FROM public.sensor_reading_rollups
+    WHERE resolution = '1m'
+      AND bucket_start >= date_bin('15 minutes', v_from, v_epoch)
+    GROUP BY 2, 3, 4
+    ON CONFLICT (resolution, device_assignment_id, reading_type, bucket_start) DO UPDATE
+    SET sample_count = EXCLUDED.sample_count,
+        value_sum = EXCLUDED.value_sum,
+        value_min = EXCLUDED.value_min,
+        value_max = EXCLUDED.value_max,
+        unit = EXCLUDED.unit;
+
+    -- Hour buckets from 15 minute buckets
+    INSERT INTO public.sensor_reading_rollups AS r (
+        resolution, device_assignment_id, reading_type, bucket_start,
+        sample_count, value_sum, value_min, value_max, unit
+    )
+    SELECT '1h', device_assignment_id, reading_type,
+           date_bin('1 hour', bucket_start, v_epoch),
+           SUM(sample_count), SUM(value_sum), MIN(value_min), MAX(value_max), MAX(unit)
+    FROM public.sensor_reading_rollups
+    WHERE resolution = '15m'
+      AND bucket_start >= date_bin('1 hour', v_from, v_epoch)
+    GROUP BY 2, 3, 4
+    ON CONFLICT (resolution, device_assignment_id, reading_type, bucket_start) DO UPDATE
+    SET sample_count = EXCLUDED.sample_count,
+        value_sum = EXCLUDED.value_sum,
+        value_min = EXCLUDED.value_min,
+        value_max = EXCLUDED.value_max,
+        unit = EXCLUDED.unit;
+
+    INSERT INTO public.rollup_watermarks (source, rolled_up_to, updated_at)
+    VALUES ('sensor_readings', v_to, NOW())
+    ON CONFLICT (source) DO UPDATE
+    SET rolled_up_to = EXCLUDED.rolled_up_to, updated_at = EXCLUDED.updated_at;
+
+    RETURN v_buckets;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.refresh_grow_metric_rollups(
+    p_late_window INTERVAL DEFAULT '15 minutes',
+    p_initial_backfill INTERVAL DEFAULT '7 days'
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+    v_epoch CONSTANT TIMESTAMPTZ := 'epoch';
+    v_to TIMESTAMPTZ := date_trunc('minute', NOW());
+    v_from TIMESTAMPTZ;
+    v_buckets INTEGER;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('refresh_grow_metric_rollups')) THEN
+        RETURN 0;
+    END IF;
+
+    SELECT rolled_up_to - p_late_window INTO v_from
+    FROM public.rollup_watermarks WHERE source = 'grow_monitoring_metrics';
+    v_from := date_trunc('minute', COALESCE(v_from, NOW() - p_initial_backfill));
+
+    INSERT INTO public.grow_metric_rollups AS r (
+        resolution, grow_id, metric_type, bucket_start,
+        sample_count, value_sum, value_min, value_max, unit
+    )
+    SELECT '1m', gm.grow_id, gm.metric_type,
+           date_bin('1 minute', gm.recorded_at, v_epoch),
+           COUNT(*), SUM(gm.value), MIN(gm.value), MAX(gm.value), MAX(gm.unit)
+    FROM public.grow_monitoring_metrics gm
+    WHERE gm.recorded_at >= v_from
+    GROUP BY 2, 3, 4
+    ON CONFLICT (resolution, grow_id, metric_type, bucket_start) DO UPDATE
+    SET sample_count = EXCLUDED.sample_count,
+        value_sum = EXCLUDED.value_sum,
+        value_min = EXCLUDED.value_min,
+        value_max = EXCLUDED.value_max,
+        unit = EXCLUDED.unit;
+    GET DIAGNOSTICS v_buckets = ROW_COUNT;
+
+    INSERT INTO public.grow_metric_rollups AS r (
+        resolution, grow_id, metric_type, bucket_start,
+        sample_count, value_sum, value_min, value_max, unit
+    )
+    SELECT '15m', grow_id, metric_type,
+           date_bin('15 minutes', bucket_start, v_epoch),
+           SUM(sample_count), SUM(value_sum), MIN(value_min), MAX(value_max), MAX(unit)
+    FROM public.grow_metric_rollups
+    WHERE resolution = '1m'
+      AND bucket_start >= date_bin('15 minutes', v_from, v_epoch)
+    GROUP BY 2, 3, 4
+    ON CONFLICT (resolution, grow_id, metric_type, bucket_start) DO UPDATE
+    SET sample_count = EXCLUDED.sample_count,
+        value_sum = EXCLUDED.value_sum,
+        value_min = EXCLUDED.value_min,
+        value_max = EXCLUDED.value_max,
+        unit = EXCLUDED.unit;
+
+    INSERT INTO public.grow_metric_rollups AS r (
+        resolution, grow_id, metric_type, bucket_start,
+        sample_count, value_sum, value_min, value_max, unit
+    )
+    SELECT '1h', grow_id, metric_type,
+           date_bin('1 hour', bucket_start, v_epoch),
+           SUM(sample_count), SUM(value_sum), MIN(value_min), MAX(value_max), MAX(unit)
+    FROM public.grow_metric_rollups
+    WHERE resolution = '15m'
+      AND bucket_start >= date_bin('1 hour', v_from, v_epoch)
+    GROUP BY 2, 3, 4
+    ON CONFLICT (resolution, grow_id, metric_type, bucket_start) DO UPDATE
+    SET sample_count = EXCLUDED.sample_count,
+        value_sum = EXCLUDED.value_sum,
+        value_min = EXCLUDED.value_min,
+        value_max = EXCLUDED.value_max,
+        unit = EXCLUDED.unit;
+
+    INSERT INTO public.rollup_watermarks (source, rolled_up_to, updated_at)
+    VALUES ('grow_monitoring_metrics', v_to, NOW())
+    ON CONFLICT (source) DO UPDATE
+    SET rolled_up_to = EXCLUDED.rolled_up_to, updated_at = EXCLUDED.updated_at;
+
+    RETURN v_buckets;
+END;
+$$;
+
+-- =====================================================
+-- QUERY FUNCTIONS
+-- =====================================================
+
+-- One page of a rolled-up series, keyset-paginated on bucket_start
+CREATE OR REPLACE FUNCTION public.get_sensor_rollup_history(
+    p_user_id UUID,
+    p_device_id UUID,
+    p_reading_type TEXT,
+    p_resolution TEXT,
+    p_since TIMESTAMPTZ,
+    p_after TIMESTAMPTZ DEFAULT NULL,
+    p_limit INTEGER DEFAULT 1000
+)
+RETURNS TABLE (
+    device_assignment_id UUID,
+    reading_type TEXT,
+    bucket_start TIMESTAMPTZ,
+    avg_value DOUBLE PRECISION,
+    min_value DOUBLE PRECISION,
+    max_value DOUBLE PRECISION,
+    count INTEGER,
+    unit TEXT,
+    device_name TEXT,
+    location TEXT
+)
+LANGUAGE sql STABLE
+SET search_path = public
+AS $$
+    SELECT
+        r.device_assignment_id,
+        r.reading_type,
+        r.bucket_start,
+        r.value_sum / r.sample_count AS avg_value,
+        r.value_min AS min_value,
+        r.value_max AS max_value,
+        r.sample_count AS count,
+        r.unit,
+        COALESCE(da.device_name, da.friendly_name) AS device_name,
+        da.location_id AS location
+    FROM public.device_assignments da
+    JOIN public.sensor_reading_rollups r ON r.device_assignment_id = da.id
+    WHERE da.id = p_device_id
+      AND da.user_id = p_user_id
+      AND r.resolution = p_resolution
+      AND r.reading_type = p_reading_type
+      AND r.bucket_start >= date_bin(
+          (CASE p_resolution WHEN '1m' THEN '1 minute'
+                             WHEN '15m' THEN '15 minutes'
+                             ELSE '1 hour' END)::INTERVAL,
+          p_since, TIMESTAMPTZ 'epoch')
+      AND (p_after IS NULL OR r.bucket_start > p_after)
+    ORDER BY r.bucket_start
+    LIMIT p_limit;
+$$;
+
+-- Replaces get_sensor_aggregates, which scanned raw readings and is no
+-- longer called
+DROP FUNCTION IF EXISTS public.get_sensor_aggregates(UUID, UUID[], TEXT[], INTEGER, TEXT);
+
+-- Min/max/avg/count per (device, reading type) over a period. Whole hours
+-- are read from hourly rollups and the partial hours at either end from
+-- minute rollups, so at most ~180 rows are read per series for any period.
+CREATE OR REPLACE FUNCTION public.get_sensor_aggregates_from_rollups(
+    p_user_id UUID,
+    p_device_ids UUID[] DEFAULT NULL,
+    p_reading_types TEXT[] DEFAULT NULL,
+    p_period_hours INTEGER DEFAULT 24
+)
+RETURNS TABLE (
+    device_assignment_id UUID,
+    reading_type TEXT,
+    avg_value DOUBLE PRECISION,
+    min_value DOUBLE PRECISION,
+    max_value DOUBLE PRECISION,
+    count BIGINT,
+    period_start TIMESTAMPTZ,
+    period_end TIMESTAMPTZ
+)
+LANGUAGE sql STABLE
+SET search_path = public
+AS $$
+    WITH bounds AS (
+        SELECT
+            NOW() - make_interval(hours => p_period_hours) AS period_start,
+            NOW() AS period_end,
+            date_trunc('hour', NOW() - make_interval(hours => p_period_hours))
+                + INTERVAL '1 hour' AS hours_from,
+            date_trunc('hour', NOW()) AS hours_to
+    ),
+    buckets AS (
+        SELECT r.*
+        FROM bounds b
+        JOIN public.sensor_reading_rollups r
+          ON (r.resolution = '1h'
+              AND r.bucket_start >= b.hours_from AND r.bucket_start < b.hours_to)
+          OR (r.resolution = '1m'
+              AND ((r.bucket_start >= date_trunc('minute', b.period_start)
+                    AND r.bucket_start < b.hours_from)
+                   OR r.bucket_start >= b.hours_to))
+        JOIN public.device_assignments da ON da.id = r.device_assignment_id
+        WHERE da.user_id = p_user_id
+          AND (p_device_ids IS NULL OR da.id = ANY (p_device_ids))
+          AND (p_reading_types IS NULL OR r.reading_type = ANY (p_reading_types))
+    )
+    SELECT
+        bk.device_assignment_id,
+        bk.reading_type,
+        SUM(bk.value_sum) / SUM(bk.sample_count) AS avg_value,
+        MIN(bk.value_min) AS min_value,
+        MAX(bk.value_max) AS max_value,
+        SUM(bk.sample_count)::BIGINT AS count,
+        b.period_start,
+        b.period_end
+    FROM buckets bk
+    CROSS JOIN bounds b
+    GROUP BY bk.device_assignment_id, bk.reading_type, b.period_start, b.period_end
+    ORDER BY 1, 2;
+$$;
+
+-- One page of a rolled-up grow metric series
+CREATE OR REPLACE FUNCTION public.get_grow_metric_rollup_history(
+    p_grow_id UUID,
+    p_metric_type TEXT,
+    p_resolution TEXT,
+    p_since TIMESTAMPTZ,
+    p_after TIMESTAMPTZ DEFAULT NULL,
+    p_limit INTEGER DEFAULT 1000
+)
+RETURNS TABLE (
+    bucket_start TIMESTAMPTZ,
+    avg_value DOUBLE PRECISION,
+    min_value DOUBLE PRECISION,
+    max_value DOUBLE PRECISION,
+    count INTEGER,
+    unit VARCHAR(20)
+)
+LANGUAGE sql STABLE
+SET search_path = public
+AS $$
+    SELECT r.bucket_start,
+           r.value_sum / r.sample_count,
+           r.value_min,
+           r.value_max,
+           r.sample_count,
+           r.unit
+    FROM public.grow_metric_rollups r
+    WHERE r.resolution = p_resolution
+      AND r.grow_id = p_grow_id
+      AND r.metric_type = p_metric_type
+      AND r.bucket_start >= p_since
+      AND (p_after IS NULL OR r.bucket_start > p_after)
+    ORDER BY r.bucket_start
+    LIMIT p_limit;
+$$;
+
+-- =====================================================
+-- PERMISSIONS
+-- =====================================================
+
+REVOKE ALL ON FUNCTION public.refresh_sensor_rollups(INTERVAL, INTERVAL) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.refresh_grow_metric_rollups(INTERVAL, INTERVAL) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.get_sensor_rollup_history(UUID, UUID, TEXT, TEXT, TIMESTAMPTZ, TIMESTAMPTZ, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.get_sensor_aggregates_from_rollups(UUID, UUID[], TEXT[], INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.get_grow_metric_rollup_history(UUID, TEXT, TEXT, TIMESTAMPTZ, TIMESTAMPTZ, INTEGER) FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION public.refresh_sensor_rollups(INTERVAL, INTERVAL) TO service_role;
+GRANT EXECUTE ON FUNCTION public.refresh_grow_metric_rollups(INTERVAL, INTERVAL) TO service_role;
+GRANT EXECUTE ON FUNCTION public.get_sensor_rollup_history(UUID, UUID, TEXT, TEXT, TIMESTAMPTZ, TIMESTAMPTZ, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.get_sensor_aggregates_from_rollups(UUID, UUID[], TEXT[], INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.get_grow_metric_rollup_history(UUID, TEXT, TEXT, TIMESTAMPTZ, TIMESTAMPTZ, INTEGER) TO service_role;
+
+-- =====================================================
+-- SCHEDULING
+-- =====================================================
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule(
+            'refresh-rollups',
+            '* * * * *',
+            'SELECT public.refresh_sensor_rollups(); SELECT public.refresh_grow_metric_rollups();'
+        );
+    END IF;
+END $$;
@@ -0,0 +1,71 @@
+-- Migration: Batched sensor history
+-- Description: Fetches many (device, reading type) series in one query for
+-- dashboard loads. Each series is returned as a single row of parallel
+-- arrays (columnar), which keeps the result far below PostgREST's max_rows
+-- limit and avoids per-reading JSON objects.
+
+CREATE OR REPLACE FUNCTION public.get_sensor_history_series(
+    p_user_id UUID,
+    p_device_ids UUID[],
+    p_reading_types TEXT[],
+    p_resolution TEXT,
+    p_since TIMESTAMPTZ
+)
+RETURNS TABLE (
+    device_assignment_id UUID,
+    reading_type TEXT,
+    unit TEXT,
+    device_name TEXT,
+    location TEXT,
+    timestamps DOUBLE PRECISION[],
+    "values" DOUBLE PRECISION[],
+    ids BIGINT[]
+)
+LANGUAGE sql STABLE
+SET search_path = public
+AS $$
+    -- p_device_ids and p_reading_types are zipped into (device, type) pairs
+    WITH series AS (
+        SELECT DISTINCT p.device_id, p.reading_type,
+               COALESCE(da.device_name, da.friendly_name) AS device_name,
+               da.location_id AS location
+        FROM unnest(p_device_ids, p_reading_types) AS p(device_id, reading_type)
+        JOIN public.device_assignments da
+          ON da.id = p.device_id AND da.user_id = p_user_id
+    )
+    SELECT s.device_id, s.reading_type, MAX(sr.unit), s.device_name, s.location,
+           array_agg(EXTRACT(EPOCH FROM sr."timestamp")::DOUBLE PRECISION
+                     ORDER BY sr."timestamp", sr.id),
+           array_agg(sr.value::DOUBLE PRECISION ORDER BY sr."timestamp", sr.id),
+           array_agg(sr.id ORDER BY sr."timestamp", sr.id)
+    FROM series s
+    JOIN public.sensor_readings sr
+      ON sr.device_assignment_id = s.device_id
+     AND sr.reading_type = s.reading_type
+     AND sr."timestamp" >= p_since
+    WHERE p_resolution = 'raw'
+    GROUP BY s.device_id, s.reading_type, s.device_name, s.location
+
+    UNION ALL
+
+    SELECT s.device_id, s.reading_type, MAX(r.unit), s.device_name, s.location,
+           array_agg(EXTRACT(EPOCH FROM r.bucket_start)::DOUBLE PRECISION
+                     ORDER BY r.bucket_start),
+           array_agg(r.value_sum / r.sample_count ORDER BY r.bucket_start),
+           NULL::BIGINT[]
+    FROM series s
+    JOIN public.sensor_reading_rollups r
+      ON r.resolution = p_resolution
+     AND r.device_assignment_id = s.device_id
+     AND r.reading_type = s.reading_type
+     AND r.bucket_start >= date_bin(
+         (CASE p_resolution WHEN '1m' THEN '1 minute'
+                            WHEN '15m' THEN '15 minutes'
+                            ELSE '1 hour' END)::INTERVAL,
+         p_since, TIMESTAMPTZ 'epoch')
+    WHERE p_resolution <> 'raw'
+    GROUP BY s.device_id, s.reading_type, s.device_name, s.location;
+$$;
+
+REVOKE ALL ON FUNCTION public.get_sensor_history_series(UUID, UUID[], TEXT[], TEXT, TIMESTAMPTZ) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_sensor_history_series(UUID, UUID[], TEXT[], TEXT, TIMESTAMPTZ) TO service_role;
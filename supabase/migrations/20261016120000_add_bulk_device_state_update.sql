@@ -0,0 +1,45 @@
+-- Migration: Batched device state updates
+-- Description: Upserts the latest state of many Home Assistant entities in
+-- one statement. The backend buffers state changes per (user, entity) and
+-- flushes them together instead of calling update_device_state per event.
+-- p_states is a JSON array of objects with user_id, entity_id, state,
+-- attributes and updated_at (when the backend received the change).
+-- A row is never overwritten by an older state, so a batch retried after a
+-- newer one was written cannot roll the device back.
+
+CREATE OR REPLACE FUNCTION public.update_device_states(p_states JSONB)
+RETURNS VOID
+LANGUAGE sql SECURITY DEFINER
+SET search_path = public
+AS $$
+    INSERT INTO public.device_states (
+        user_id, home_assistant_entity_id, state, attributes,
+        last_updated, last_changed
+    )
+    SELECT s.user_id, s.entity_id, s.state, COALESCE(s.attributes, '{}'::JSONB),
+           s.updated_at, s.updated_at
+    FROM jsonb_to_recordset(p_states) AS s(
+        user_id UUID,
+        entity_id TEXT,
+        state TEXT,
+        attributes JSONB,
+        updated_at TIMESTAMPTZ
+    )
+    ON CONFLICT (user_id, home_assistant_entity_id)
+    DO UPDATE SET
+        state = EXCLUDED.state,
+        attributes = EXCLUDED.attributes,
+        last_updated = EXCLUDED.last_updated,
+        last_changed = CASE
+            WHEN device_states.state IS DISTINCT FROM EXCLUDED.state
+                THEN EXCLUDED.last_changed
+            ELSE device_states.last_changed
+        END
+    WHERE device_states.last_updated IS NULL
+        OR device_states.last_updated <= EXCLUDED.last_updated;
+$$;
+
+COMMENT ON FUNCTION public.update_device_states(JSONB) IS 'Upserts the latest states of many devices with change tracking';
+
+REVOKE ALL ON FUNCTION public.update_device_states(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.update_device_states(JSONB) TO service_role;